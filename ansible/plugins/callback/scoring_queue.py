@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+DOCUMENTATION = """
+    name: scoring_queue
+    type: aggregate
+    short_description: Stream IOC check results to the scoring backend
+    description:
+        - Sends one compact JSON line per IOC check result (host, IOC, rc, parsed
+          status, duration) to the Unix socket in RTS_RESULT_SOCKET, tagged with
+          RTS_RUN_ID, as soon as the result is produced.
+        - Only tasks named "Execute <ioc> check" are reported. A final "done"
+          record tells the backend the run has no more results.
+    requirements:
+        - enabled with ANSIBLE_CALLBACKS_ENABLED=scoring_queue
+"""
+
+import json
+import os
+import re
+import socket
+import time
+
+from ansible.plugins.callback import CallbackBase
+
+# Check tasks are named by the orchestrator's playbook generators
+CHECK_TASK = re.compile(r'^Execute (.+) check$')
+
+# Matches fastapi_backend.ansible.circuit_breaker.UNREACHABLE
+UNREACHABLE = -2
+
+# Matches fastapi_backend.ansible.script_cache.SCRIPT_MISSING_RC
+SCRIPT_MISSING_RC = 127
+
+
+class CallbackModule(CallbackBase):
+    """
+    Streams IOC check results to the orchestrator's result socket instead of
+    leaving them in playbook stdout for the backend to parse after exit.
+    """
+
+    CALLBACK_VERSION = 2.0
+    CALLBACK_TYPE = 'aggregate'
+    CALLBACK_NAME = 'scoring_queue'
+    CALLBACK_NEEDS_ENABLED = True
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.socket_path = os.environ.get('RTS_RESULT_SOCKET')
+        self.run_id = os.environ.get('RTS_RUN_ID', '')
+        self.sock = None
+        self.started = {}  # (host, task uuid) -> start time
+
+    def v2_runner_on_start(self, host, task):
+        self.started[(host.get_name(), task._uuid)] = time.time()
+
+    def v2_runner_on_ok(self, result):
+        self._report(result)
+
+    def v2_runner_on_failed(self, result, ignore_errors=False):
+        # A cached check whose script isn't staged yet, its rescue reports the real result
+        if result._result.get('rc') == SCRIPT_MISSING_RC:
+            return
+        self._report(result)
+
+    def v2_runner_on_unreachable(self, result):
+        self._report(result, unreachable=True)
+
+    def v2_playbook_on_stats(self, stats):
+        self._send({'run': self.run_id, 'done': True})
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+
+    def _report(self, result, unreachable=False):
+        match = CHECK_TASK.match(result._task.get_name())
+        if match is None:
+            # Display/debug tasks
+            return
+
+        host = result._host.get_name()
+        res = result._result
+        started = self.started.pop((host, result._task._uuid), None)
+
+        record = {
+            'run': self.run_id,
+            'host': host,
+            'ioc': match.group(1),
+            'rc': res.get('rc'),
+            'duration': round(time.time() - started, 3) if started else None
+        }
+
+        if unreachable or res.get('unreachable'):
+            record['status'] = UNREACHABLE
+            record['error'] = f"Host unreachable: {res.get('msg', '')}"
+        else:
+            record['status'], error = script_status(res.get('stdout') or '')
+            if error:
+                record['error'] = error if res.get('stdout') else res.get('msg') or error
+
+        self._send(record)
+
+    def _send(self, record):
+        if not self.socket_path:
+            return
+
+        try:
+            if self.sock is None:
+                self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                self.sock.connect(self.socket_path)
+            self.sock.sendall(json.dumps(record).encode() + b'\n')
+        except OSError as e:
+            self._display.warning(f"scoring_queue: could not send result to {self.socket_path}: {e}")
+            self.sock = None
+
+
+def script_status(stdout):
+    """(status, error) from the last JSON line a check script printed"""
+    for line in reversed(stdout.strip().splitlines()):
+        line = line.strip()
+        if line.startswith('{') and line.endswith('}'):
+            try:
+                output = json.loads(line)
+            except ValueError as e:
+                return -1, f"Failed to parse JSON output: {e}"
+            if not isinstance(output, dict) or output.get('status') not in (-1, 0, 1):
+                return -1, f"Invalid status value: {output.get('status') if isinstance(output, dict) else None}"
+            return output['status'], output.get('error')
+
+    return -1, "No JSON output found in script response"
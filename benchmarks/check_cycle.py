@@ -0,0 +1,245 @@
+"""
+End-to-end check cycle benchmark at several inventory scales, compared
+against recorded JSON baselines.
+
+Run from the repository root:
+
+    python -m benchmarks.check_cycle                      # compare with the baseline
+    python -m benchmarks.check_cycle --save               # record a new baseline
+    python -m benchmarks.check_cycle --scales small,large --cycles 3
+
+Each scale runs in its own process with a throwaway SQLite database
+(RTS_DATABASE_URL) and a synthetic inventory whose every OS uses the
+simulated transport. CompetitionOrchestrator.run_checks drives each cycle
+through the real task queue, executor workers, output parser and result
+writes, and the cycle is finalized as in a competition.
+
+Per scale it reports the mean cycle wall time (first check queued to last
+result saved), task throughput, p50/p95/p99 per-check latency, result rows
+written per second and the process's peak RSS. A metric more than
+--tolerance worse than the baseline is a regression, and the run exits 1.
+Baselines are machine-specific, re-record them when the hardware changes.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BASELINE_PATH = Path(__file__).parent / "baselines" / "check_cycle.json"
+
+# name -> (teams, boxes per team, IOCs per OS)
+SCALES = {
+    "small": (5, 4, 10),
+    "medium": (20, 6, 10),
+    "large": (50, 10, 10)
+}
+
+# metric -> True if higher is better
+METRICS = {
+    "cycle_seconds": False,
+    "tasks_per_second": True,
+    "latency_p50": False,
+    "latency_p95": False,
+    "latency_p99": False,
+    "db_writes_per_second": True,
+    "peak_rss_mb": False
+}
+
+
+async def run_scale(teams: int, boxes: int, iocs: int, args) -> dict:
+    """Run cycles through a fresh orchestrator, in this process's throwaway database"""
+    from sqlmodel import SQLModel, Session, func, select
+
+    from fastapi_backend.ansible.latency import latency_tracker, percentile
+    from fastapi_backend.core.competition_state import CompetitionStatus
+    from fastapi_backend.core.orchestrator import CompetitionOrchestrator
+    from fastapi_backend.database.db_init import DatabaseInitializer
+    from fastapi_backend.database.db_writer import DATABASE_URL, engine
+    from fastapi_backend.database.models import BlueTeams, CheckInstance, IOCCheckResult
+
+    # SQL echo would dominate the timings
+    engine.echo = False
+
+    # The view models are mapped as tables too, leave those names to the real views
+    SQLModel.metadata.create_all(engine, tables=[BlueTeams.__table__, CheckInstance.__table__, IOCCheckResult.__table__])
+    DatabaseInitializer(DATABASE_URL).create_scoring_views()
+    with Session(engine) as session:
+        session.add_all(BlueTeams(team_num=team_num, total_score=0) for team_num in range(1, teams + 1))
+        session.commit()
+
+    orch = CompetitionOrchestrator()
+    orch.ansible_dir = Path(args.work_dir) / "ansible"
+    orch.ansible_dir.mkdir(exist_ok=True)
+    orch.inventory_manager.ansible_dir = orch.ansible_dir
+    orch.executor_type = args.executor
+    if args.workers:
+        orch.min_check_workers = orch.max_check_workers = args.workers
+    orch.synthetic_inventory = {'teams': teams, 'boxes': boxes, 'iocs': iocs}
+    orch.check_transports = {os_name: "simulated" for os_name in ('linux', 'windows', 'firewall')}
+    orch.simulation = {
+        'latency_median': args.latency,
+        'latency_sigma': args.sigma,
+        'failure_rate': 0.0,  # Retries wait out a backoff, which would swamp the pipeline's own cost
+        'flip_rate': 0.1,
+        'seed': 0
+    }
+
+    await orch._load_inventory()
+    await orch._load_iocs()
+    await orch._initialize_executor()
+    orch.state.set_status(CompetitionStatus.RUNNING)
+    orch.executor.start_workers()
+
+    try:
+        for _ in range(args.cycles):
+            await orch.run_checks()
+            await asyncio.gather(*orch.cycle_tasks)
+    finally:
+        await orch._stop_executor()
+        orch._close_transports()
+
+    cycles = list(orch.cycle_history)
+    with Session(engine) as session:
+        rows = session.exec(select(func.count()).select_from(IOCCheckResult)).one()
+
+    expected = sum(cycle["expected"] for cycle in cycles)
+    completed = sum(cycle["completed"] for cycle in cycles)
+    seconds = sum(cycle["duration_seconds"] or 0 for cycle in cycles)
+    samples = [s for history in latency_tracker.samples.values() for s in history]
+
+    return {
+        "tasks": expected,
+        "completed": completed,
+        "rows": rows,
+        "cycle_seconds": seconds / len(cycles),
+        "tasks_per_second": completed / seconds if seconds else 0.0,
+        "latency_p50": percentile(samples, 50) if samples else None,
+        "latency_p95": percentile(samples, 95) if samples else None,
+        "latency_p99": percentile(samples, 99) if samples else None,
+        "db_writes_per_second": rows / seconds if seconds else 0.0,
+        # ru_maxrss is in kilobytes on Linux
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    }
+
+
+def spawn_scale(name: str, args) -> dict:
+    """Run one scale in a child process so its database and peak RSS are its own"""
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, RTS_DATABASE_URL=f"sqlite:///{Path(tmp) / 'bench.db'}")
+        cmd = [
+            sys.executable, "-m", "benchmarks.check_cycle", "--child", name, "--work-dir", tmp,
+            "--cycles", str(args.cycles), "--executor", args.executor, "--workers", str(args.workers),
+            "--latency", str(args.latency), "--sigma", str(args.sigma)
+        ]
+        start = time.perf_counter()
+        proc = subprocess.run(cmd, env=env, capture_output=True, text=True, timeout=args.timeout)
+        if proc.returncode != 0:
+            raise RuntimeError(f"Scale {name} failed:\n{proc.stderr[-2000:]}")
+
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    result["wall_seconds"] = time.perf_counter() - start
+    return {key: round(value, 4) if isinstance(value, float) else value for key, value in result.items()}
+
+
+def machine() -> dict:
+    return {
+        "platform": platform.platform(),
+        "python": platform.python_version(),
+        "cpus": os.cpu_count()
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """Metrics more than tolerance worse than the baseline, as printable lines"""
+    regressions = []
+    for name, result in results.items():
+        recorded = baseline.get("scales", {}).get(name)
+        if not recorded:
+            continue
+
+        for metric, higher_is_better in METRICS.items():
+            new, old = result.get(metric), recorded.get(metric)
+            if new is None or not old:
+                continue
+            change = (old - new) / old if higher_is_better else (new - old) / old
+            if change > tolerance:
+                regressions.append(f"{name} {metric}: {old:.3f} -> {new:.3f} ({change:+.0%} worse)")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", default=",".join(SCALES), help=f"comma-separated, from {', '.join(SCALES)}")
+    parser.add_argument("--cycles", type=int, default=2, help="check cycles per scale")
+    parser.add_argument("--executor", choices=("thread", "async"), default="thread")
+    parser.add_argument("--workers", type=int, default=0, help="fixed worker count (0 = autoscale with the orchestrator's bounds)")
+    parser.add_argument("--latency", type=float, default=0.02, help="median simulated check seconds")
+    parser.add_argument("--sigma", type=float, default=0.3, help="lognormal sigma of check run time")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed fraction worse than baseline")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--save", action="store_true", help="record these results as the baseline")
+    parser.add_argument("--timeout", type=int, default=900, help="seconds allowed per scale")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--work-dir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        logging.basicConfig(level=logging.ERROR)
+        print(json.dumps(asyncio.run(run_scale(*SCALES[args.child], args))))
+        return
+
+    names = [name.strip() for name in args.scales.split(",") if name.strip()]
+    unknown = [name for name in names if name not in SCALES]
+    if unknown:
+        parser.error(f"unknown scales: {', '.join(unknown)}")
+
+    results = {}
+    for name in names:
+        results[name] = {"teams_boxes_iocs": list(SCALES[name]), **spawn_scale(name, args)}
+
+    print(f"{'scale':<8}{'tasks':>7}{'cycle (s)':>11}{'tasks/s':>9}{'p50 (s)':>9}{'p95 (s)':>9}"
+          f"{'p99 (s)':>9}{'writes/s':>10}{'RSS (MB)':>10}")
+    for name, result in results.items():
+        print(f"{name:<8}{result['tasks']:>7}{result['cycle_seconds']:>11.2f}{result['tasks_per_second']:>9.1f}"
+              f"{result['latency_p50']:>9.3f}{result['latency_p95']:>9.3f}{result['latency_p99']:>9.3f}"
+              f"{result['db_writes_per_second']:>10.1f}{result['peak_rss_mb']:>10.1f}")
+
+    ok = all(result["completed"] == result["tasks"] == result["rows"] for result in results.values())
+    if not ok:
+        print("some cycles did not save a result for every check")
+
+    settings = {key: getattr(args, key) for key in ("cycles", "executor", "workers", "latency", "sigma")}
+    if args.save:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps(
+            {"machine": machine(), "settings": settings, "scales": results}, indent=2, sort_keys=True
+        ) + "\n")
+        print(f"baseline saved to {args.baseline}")
+    elif args.baseline.exists():
+        baseline = json.loads(args.baseline.read_text())
+        if baseline.get("settings") != settings:
+            print(f"warning: baseline was recorded with {baseline.get('settings')}")
+        if baseline.get("machine") != machine():
+            print(f"warning: baseline was recorded on {baseline.get('machine')}")
+
+        regressions = compare(results, baseline, args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        print(f"{len(regressions)} regressions against {args.baseline} (tolerance {args.tolerance:.0%})")
+        ok = ok and not regressions
+    else:
+        print(f"no baseline at {args.baseline}, run with --save to record one")
+
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Compare the per-check cost of exec'ing ansible-playbook against forking it
+from the pre-imported fork server.
+
+Run from the repository root:
+
+    python -m benchmarks.fork_server --runs 20 --concurrency 4
+
+Both modes go through worker.run_playbook with a one-task check playbook
+against localhost over Ansible's local connection, so the numbers are
+controller overhead rather than network time. CPU is user + system time of
+the playbook processes and their Ansible workers. The fork server's "total"
+also counts the helper process, including its one-off import of Ansible.
+"""
+import argparse
+import json
+import logging
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import yaml
+
+from fastapi_backend.ansible.fork_server import ForkServer
+from fastapi_backend.ansible.latency import percentile
+from fastapi_backend.ansible.worker import PLAYBOOK_ENV, CallbackOutput, run_playbook
+
+
+def write_check(work_dir: Path) -> tuple:
+    """A check script, its playbook and a local inventory, shaped like the generated ones"""
+    script = work_dir / "check.sh"
+    script.write_text("#!/bin/sh\necho '{\"status\": 0, \"message\": \"IOC removed\"}'\n")
+
+    playbook = work_dir / "check.yml"
+    playbook.write_text(yaml.dump([{
+        'name': 'Check bench_ioc on localhost',
+        'hosts': 'localhost',
+        'gather_facts': False,
+        'tasks': [{
+            'name': 'Execute bench_ioc check',
+            'script': str(script),
+            'register': 'check_result',
+            'failed_when': False,
+            'changed_when': False
+        }]
+    }]))
+
+    inventory = work_dir / "inventory.yml"
+    inventory.write_text(yaml.dump({'all': {'hosts': {'localhost': {
+        'ansible_connection': 'local',
+        'ansible_python_interpreter': sys.executable
+    }}}}))
+
+    return str(playbook), str(inventory)
+
+
+def children_cpu() -> float:
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+def run_mode(playbook: str, inventory: str, runs: int, concurrency: int, fork_server=None) -> dict:
+    """Run the check playbook runs times, concurrency at a time"""
+
+    def run_one(_):
+        start = time.perf_counter()
+        result = run_playbook(playbook, inventory, timeout=120, env=PLAYBOOK_ENV, fork_server=fork_server)
+        status = CallbackOutput(result.stdout_text).check_result('localhost', 'bench_ioc').get('status')
+        return time.perf_counter() - start, status
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(run_one, range(runs)))
+    elapsed = time.perf_counter() - start
+
+    latencies = [latency for latency, _ in results]
+    return {
+        "runs": runs,
+        "errors": sum(1 for _, status in results if status != 0),
+        "p50": percentile(latencies, 50),
+        "p95": percentile(latencies, 95),
+        "seconds": elapsed
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=20, help="playbook runs per mode")
+    parser.add_argument("--concurrency", type=int, default=4, help="runs in flight at once")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.ERROR)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        playbook, inventory = write_check(Path(tmp))
+        results = {}
+
+        cpu_before = children_cpu()
+        results["exec"] = run_mode(playbook, inventory, args.runs, args.concurrency)
+        results["exec"]["cpu"] = children_cpu() - cpu_before
+        results["exec"]["cpu_total"] = results["exec"]["cpu"]
+
+        # The helper is a child of this process, so once it exits its CPU and
+        # that of every run it reaped shows up in RUSAGE_CHILDREN
+        cpu_before = children_cpu()
+        startup = time.perf_counter()
+        fork_server = ForkServer(PLAYBOOK_ENV)
+        fork_server.start()
+        run_playbook(playbook, inventory, timeout=120, env=PLAYBOOK_ENV, fork_server=fork_server)
+        startup = time.perf_counter() - startup
+        warmup_cpu = fork_server.get_stats()["cpu_seconds"]
+
+        results["fork server"] = run_mode(playbook, inventory, args.runs, args.concurrency, fork_server)
+        results["fork server"]["cpu"] = fork_server.get_stats()["cpu_seconds"] - warmup_cpu
+        fork_server.stop()
+        results["fork server"]["cpu_total"] = children_cpu() - cpu_before
+
+    print(f"{'mode':<14}{'runs':>6}{'errors':>8}{'p50 (s)':>10}{'p95 (s)':>10}{'seconds':>10}"
+          f"{'cpu/run (s)':>13}{'cpu total':>11}")
+    for mode, result in results.items():
+        print(f"{mode:<14}{result['runs']:>6}{result['errors']:>8}{result['p50']:>10.2f}{result['p95']:>10.2f}"
+              f"{result['seconds']:>10.2f}{result['cpu'] / result['runs']:>13.2f}{result['cpu_total']:>11.2f}")
+
+    exec_result, fork_result = results["exec"], results["fork server"]
+    print(f"fork server helper startup: {startup:.2f}s")
+    print(json.dumps({
+        "latency_saved_p50": round(exec_result["p50"] - fork_result["p50"], 3),
+        "cpu_saved_per_run": round((exec_result["cpu"] - fork_result["cpu"]) / args.runs, 3)
+    }))
+    sys.exit(0 if not exec_result["errors"] and not fork_result["errors"] else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""
+Compare check cycle wall-clock time between the per-task worker() loop and a
+single whole-inventory ansible-playbook run using forks and the free strategy.
+
+Run from the repository root:
+
+    python -m benchmarks.inventory_cycle --local --scale 8
+
+--local rewrites every host to use Ansible's local connection so the
+benchmark runs without the blue team VMs, --scale replicates the configured
+teams to simulate a larger inventory (local mode only).
+"""
+import argparse
+import asyncio
+import logging
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import yaml
+from sqlmodel import SQLModel, Session, select
+
+from fastapi_backend.ansible.worker import worker
+from fastapi_backend.core.inventory_manager import Box, Team
+from fastapi_backend.core.orchestrator import CompetitionOrchestrator
+from fastapi_backend.database.db_writer import create_db_engine
+from fastapi_backend.database.models import IOCCheckResult
+
+
+def build_orchestrator(work_dir: Path, check_mode: str, forks: int, scale: int, local: bool,
+                       runner: str = "subprocess"):
+    """Set up an orchestrator whose generated files live in work_dir"""
+    orch = CompetitionOrchestrator()
+    orch.check_mode = check_mode
+    orch.ansible_forks = forks
+    orch.ansible_runner = runner
+    orch.ansible_dir = work_dir / "ansible"
+    orch.ansible_dir.mkdir(exist_ok=True)
+    orch.inventory_manager.ansible_dir = orch.ansible_dir
+
+    orch.inventory_manager.load_from_config()
+    if scale > 1:
+        replicate_teams(orch, scale)
+    orch.ioc_loader.load_ioc_definitions()
+
+    inventory_path = orch.inventory_manager.generate_ansible_inventory()
+    if local:
+        make_inventory_local(inventory_path)
+
+    asyncio.run(orch._initialize_executor())
+    return orch
+
+
+def replicate_teams(orch, scale: int) -> None:
+    """Copy the configured teams scale times with unique fake IPs"""
+    base_teams = list(orch.inventory_manager.teams.values())
+    for copy in range(1, scale):
+        for base in base_teams:
+            team_num = copy * len(base_teams) + base.team_num
+            team = Team(team_num=team_num, name=f"Team {team_num}")
+            for i, box in enumerate(base.boxes):
+                clone = Box(
+                    ip=f"10.250.{team_num}.{i + 1}",
+                    name=f"{box.name}-{team_num}",
+                    os=box.os,
+                    team_num=team_num
+                )
+                team.boxes.append(clone)
+                orch.inventory_manager.all_boxes.append(clone)
+            orch.inventory_manager.teams[team_num] = team
+
+
+def make_inventory_local(inventory_path: Path) -> None:
+    """Point every host at Ansible's local connection"""
+    with open(inventory_path) as f:
+        inventory = yaml.safe_load(f)
+
+    for group in inventory['all']['children'].values():
+        group['vars'] = {}
+        for host_vars in (group.get('hosts') or {}).values():
+            for key in list(host_vars):
+                if key.startswith('ansible_'):
+                    del host_vars[key]
+            host_vars['ansible_connection'] = 'local'
+            host_vars['ansible_python_interpreter'] = sys.executable
+
+    with open(inventory_path, 'w') as f:
+        yaml.dump(inventory, f)
+
+
+def run_cycle(orch, num_workers: int, db_path: Path) -> dict:
+    """Queue one full cycle and time it until every task is done"""
+    executor = orch.executor
+    db_engine = create_db_engine(f"sqlite:///{db_path}")
+    SQLModel.metadata.create_all(db_engine)
+
+    # Each team gets its own fake check instance id
+    check_ids = {team_num: team_num for team_num in orch.inventory_manager.teams}
+    task_count = sum(asyncio.run(orch._queue_all_checks(check_ids)).values())
+
+    threads = []
+    start = time.perf_counter()
+    for i in range(num_workers):
+        t = threading.Thread(
+            target=worker,
+            args=(
+                executor.task_queue,
+                executor.retries,
+                executor.shutdown,
+                executor.stats,
+                executor.stats_lock,
+                executor.inventory_path,
+                executor.ioc_definitions,
+                db_engine,
+                executor.runner
+            ),
+            daemon=True
+        )
+        t.start()
+        threads.append(t)
+
+    executor.task_queue.join()
+    elapsed = time.perf_counter() - start
+
+    executor.shutdown.set()
+    for t in threads:
+        t.join()
+
+    with Session(db_engine) as session:
+        rows = len(session.exec(select(IOCCheckResult)).all())
+
+    return {"tasks": task_count, "rows": rows, "seconds": elapsed}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=16, help="worker threads for the per-task loop")
+    parser.add_argument("--forks", type=int, default=50, help="Ansible forks for the inventory run")
+    parser.add_argument("--scale", type=int, default=1, help="replicate configured teams this many times")
+    parser.add_argument("--local", action="store_true", help="use Ansible's local connection for every host")
+    parser.add_argument("--runner", choices=("subprocess", "ansible_runner"), default="subprocess",
+                        help="how both modes launch ansible-playbook")
+    args = parser.parse_args()
+
+    if args.scale > 1 and not args.local:
+        parser.error("--scale needs --local, replicated hosts do not exist")
+
+    logging.basicConfig(level=logging.WARNING)
+
+    results = {}
+    for mode, workers in (("task", args.workers), ("inventory", 1)):
+        with tempfile.TemporaryDirectory() as tmp:
+            work_dir = Path(tmp)
+            # Generated playbooks reference scripts as ../../iocs/...
+            (work_dir / "iocs").symlink_to(Path("iocs").resolve())
+            orch = build_orchestrator(work_dir, mode, args.forks, args.scale, args.local, args.runner)
+            results[mode] = run_cycle(orch, workers, work_dir / "bench.db")
+
+    print(f"{'mode':<12}{'tasks':>8}{'rows':>8}{'seconds':>10}")
+    for mode, result in results.items():
+        print(f"{mode:<12}{result['tasks']:>8}{result['rows']:>8}{result['seconds']:>10.2f}")
+    speedup = results["task"]["seconds"] / max(results["inventory"]["seconds"], 1e-9)
+    print(f"inventory mode speedup: {speedup:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+"""
+Compare check output parsing strategies on large multi-host playbook output,
+and replay a corpus of malformed outputs through the parser.
+
+Run from the repository root:
+
+    python -m benchmarks.output_parser --hosts 200 --iocs 10 --fuzz 2000
+
+"line scan" is the old approach: default callback output for each box, with
+every IOC hunting through every line for its debug line. "decode per IOC"
+decodes the JSON callback document again for every lookup, "decode once" is
+CallbackOutput, which decodes it once and indexes results by host and task.
+
+The corpus in benchmarks/output_corpus holds hand-written malformed outputs
+with the status each should parse to (expected.json). --fuzz adds that many
+random mutations of a valid document, which must parse to some status
+without raising.
+"""
+import argparse
+import json
+import logging
+import random
+import sys
+import time
+from pathlib import Path
+
+from fastapi_backend.ansible.output_parser import CallbackOutput, parse_script_output
+from fastapi_backend.ansible.worker import register_name
+
+CORPUS_DIR = Path(__file__).parent / "output_corpus"
+CORPUS_HOST = "10.0.0.1"
+CORPUS_IOC = "sample_ioc"
+STATUSES = (-2, -1, 0, 1)
+
+
+def script_stdout(host_num: int, ioc_num: int) -> str:
+    status = (host_num + ioc_num) % 2
+    return json.dumps({"status": status, "message": "IOC present" if status else "IOC removed",
+                       "details": {"checked": [f"/etc/rts/{ioc_num}/{i}" for i in range(5)]}}) + "\r\n"
+
+
+def build_document(hosts: list, iocs: list) -> str:
+    """A JSON callback document for one inventory run of every IOC on every host"""
+    tasks = []
+    for ioc_num, ioc in enumerate(iocs):
+        tasks.append({
+            "task": {"name": f"Execute {ioc} check", "id": str(ioc_num)},
+            "hosts": {
+                host: {
+                    "changed": False,
+                    "rc": 0,
+                    "stdout": script_stdout(host_num, ioc_num),
+                    "stdout_lines": [script_stdout(host_num, ioc_num).strip()],
+                    "stderr": "",
+                    "stderr_lines": []
+                }
+                for host_num, host in enumerate(hosts)
+            }
+        })
+
+    return json.dumps({
+        "plays": [{"play": {"name": "Check all IOCs on all hosts", "id": "0"}, "tasks": tasks}],
+        "stats": {host: {"ok": len(iocs), "failures": 0, "unreachable": 0} for host in hosts}
+    }, indent=4)
+
+
+def build_box_output(host_num: int, host: str, iocs: list) -> str:
+    """Default callback output of one box playbook that displays each IOC's registered stdout"""
+    lines = [f"PLAY [Check all IOCs on {host}] ****", ""]
+    for ioc_num, ioc in enumerate(iocs):
+        lines += [f"TASK [Execute {ioc} check] ****", f"ok: [{host}]", ""]
+        lines += [f"TASK [Display {ioc} result] ****", f"ok: [{host}] => {{",
+                  f'    "{register_name(ioc)}.stdout": {json.dumps(script_stdout(host_num, ioc_num))}',
+                  "}", ""]
+    lines += ["PLAY RECAP ****", f"{host} : ok={len(iocs) * 2} changed=0 unreachable=0 failed=0"]
+    return "\n".join(lines)
+
+
+def line_scan(stdout: str, var_name: str) -> dict:
+    """The old per-IOC debug line search, kept here as the baseline"""
+    for line in stdout.strip().split('\n'):
+        if f'"{var_name}":' in line:
+            start = line.find('": "') + 4
+            end = line.rfind('"')
+            if start > 3 and end > start:
+                return json.loads(json.loads(line[start - 1:end + 1]).strip())
+    return {"status": -1}
+
+
+def time_mode(fn, rounds: int) -> tuple:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        results = fn()
+    return (time.perf_counter() - start) / rounds, results
+
+
+def run_benchmark(num_hosts: int, num_iocs: int, rounds: int) -> bool:
+    hosts = [f"10.{100 + i // 250}.{i % 250}.1" for i in range(num_hosts)]
+    iocs = [f"bench_ioc_{i}" for i in range(num_iocs)]
+    document = build_document(hosts, iocs)
+    box_outputs = [build_box_output(host_num, host, iocs) for host_num, host in enumerate(hosts)]
+    pairs = [(host, ioc) for host in hosts for ioc in iocs]
+
+    def scan_lines():
+        return [line_scan(box_outputs[host_num], f"{register_name(ioc)}.stdout")['status']
+                for host_num in range(len(hosts)) for ioc in iocs]
+
+    # Decoding per lookup is slow enough that a sample of lookups is timed and scaled up
+    sample = pairs[:50]
+
+    def decode_per_ioc():
+        return [CallbackOutput(document).check_result(host, ioc)['status'] for host, ioc in sample]
+
+    def decode_once():
+        output = CallbackOutput(document)
+        return [output.check_result(host, ioc)['status'] for host, ioc in pairs]
+
+    print(f"{num_hosts} hosts x {num_iocs} IOCs, document {len(document) / 1e6:.1f} MB")
+    print(f"{'mode':<16}{'seconds':>10}{'per result (us)':>18}")
+    timings = {}
+    baseline = None
+    for mode, fn, mode_rounds in (("line scan", scan_lines, rounds),
+                                  ("decode per IOC", decode_per_ioc, 1),
+                                  ("decode once", decode_once, rounds)):
+        seconds, results = time_mode(fn, mode_rounds)
+        seconds *= len(pairs) / len(results)
+        timings[mode] = seconds
+        baseline = baseline or results
+        if results != baseline[:len(results)]:
+            print(f"{mode}: results differ from line scan")
+            return False
+        print(f"{mode:<16}{seconds:>10.3f}{seconds / len(pairs) * 1e6:>18.1f}")
+
+    print(f"decode once vs line scan: {timings['line scan'] / max(timings['decode once'], 1e-9):.1f}x, "
+          f"vs decode per IOC: {timings['decode per IOC'] / max(timings['decode once'], 1e-9):.1f}x")
+    return True
+
+
+def run_corpus() -> bool:
+    """Parse every corpus file and check it lands on its expected status"""
+    expected = json.loads((CORPUS_DIR / "expected.json").read_text())
+    failures = 0
+    for name, case in sorted(expected.items()):
+        output = CallbackOutput((CORPUS_DIR / name).read_text(errors='replace'))
+        result = output.check_result(CORPUS_HOST, CORPUS_IOC)
+        if result.get('status') != case['status']:
+            failures += 1
+            print(f"FAIL {name}: expected {case['status']}, got {result}")
+
+    print(f"corpus: {len(expected) - failures}/{len(expected)} cases parsed as expected")
+    return not failures
+
+
+def mutate(rng: random.Random, text: str) -> str:
+    """One random corruption of a playbook output"""
+    cut = rng.randrange(len(text) + 1)
+    kind = rng.choice(("truncate", "delete", "duplicate", "replace", "insert", "nest"))
+    if kind == "truncate":
+        return text[:cut]
+    if kind == "delete":
+        return text[:cut] + text[cut + rng.randrange(1, 200):]
+    if kind == "duplicate":
+        return text[:cut] + text[cut - rng.randrange(1, 200):]
+    if kind == "replace":
+        return text[:cut] + rng.choice('{}[]",:\\\n0-x\x00�') + text[cut + 1:]
+    if kind == "insert":
+        return text[:cut] + rng.choice(('null', '[]', '{}', '"', '\\u12', '\n{\n', 'NaN')) + text[cut:]
+    depth = rng.randrange(500, 5000)
+    return text[:cut] + '[' * depth + text[cut:]
+
+
+def run_fuzz(iterations: int, seed: int) -> bool:
+    """Random mutations of valid outputs must parse to a status, never raise"""
+    rng = random.Random(seed)
+    seeds = [(CORPUS_DIR / name).read_text() for name in
+             ("warnings_before_document.txt", "unreachable.txt", "default_callback.txt")]
+    failures = 0
+    for i in range(iterations):
+        text = mutate(rng, rng.choice(seeds))
+        try:
+            status = CallbackOutput(text).check_result(CORPUS_HOST, CORPUS_IOC).get('status')
+            parse_script_output(text)
+        except Exception as e:
+            status = f"{type(e).__name__}: {e}"
+        if status not in STATUSES:
+            failures += 1
+            if failures <= 5:
+                print(f"FAIL mutation {i}: {status}")
+
+    print(f"fuzz: {iterations - failures}/{iterations} mutations handled (seed {seed})")
+    return not failures
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hosts", type=int, default=200, help="hosts in the synthetic inventory run")
+    parser.add_argument("--iocs", type=int, default=10, help="IOCs checked on every host")
+    parser.add_argument("--rounds", type=int, default=3, help="repetitions for the faster modes")
+    parser.add_argument("--fuzz", type=int, default=1000, help="random mutations to parse (0 = skip)")
+    parser.add_argument("--seed", type=int, default=1, help="fuzz random seed")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.ERROR)
+
+    ok = run_benchmark(args.hosts, args.iocs, args.rounds)
+    ok = run_corpus() and ok
+    if args.fuzz:
+        ok = run_fuzz(args.fuzz, args.seed) and ok
+
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
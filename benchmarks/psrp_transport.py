@@ -0,0 +1,157 @@
+"""
+Compare Windows check throughput between one pooled PSRP runspace per box and
+a fresh WinRM shell per check, against a mocked PSRP endpoint.
+
+Run from the repository root:
+
+    python -m benchmarks.psrp_transport --boxes 20 --rounds 3
+
+The mock replaces pypsrp's WSMan, RunspacePool and PowerShell inside
+fastapi_backend.ansible.psrp_transport, so the transport's own open, invoke
+and reopen code runs unchanged. --handshake-delay is the cost of WinRM
+authentication plus shell creation, --invoke-delay the cost of one check
+script, --drop-every kills a runspace after that many invocations to exercise
+reconnects.
+"""
+import argparse
+import itertools
+import json
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from pypsrp.exceptions import WinRMError
+
+from fastapi_backend.ansible import psrp_transport
+from fastapi_backend.ansible.ioc_definition import IOCDefinitionLoader
+from fastapi_backend.ansible.psrp_transport import PSRPConnectionPool
+from fastapi_backend.ansible.worker_queue import IOCTask
+from fastapi_backend.core.inventory_manager import Box
+
+
+class MockEndpoint:
+    """Shared settings and counters for the mocked pypsrp classes"""
+    handshake_delay = 1.0
+    invoke_delay = 0.05
+    drop_every = 0
+    invocations = itertools.count(1)
+    lock = threading.Lock()
+
+
+class MockWSMan:
+    def __init__(self, server, **kwargs):
+        self.server = server
+
+
+class MockRunspacePool:
+    def __init__(self, connection, **kwargs):
+        self.connection = connection
+        self.opened = False
+
+    def open(self):
+        time.sleep(MockEndpoint.handshake_delay)
+        self.opened = True
+
+    def close(self):
+        self.opened = False
+
+
+class MockPowerShell:
+    def __init__(self, runspace_pool):
+        self.pool = runspace_pool
+        self.output = []
+        self.had_errors = False
+        self.streams = type('Streams', (), {'error': []})()
+
+    def add_script(self, script):
+        self.script = script
+
+    def invoke(self):
+        with MockEndpoint.lock:
+            count = next(MockEndpoint.invocations)
+        if not self.pool.opened or (MockEndpoint.drop_every and count % MockEndpoint.drop_every == 0):
+            self.pool.opened = False
+            raise WinRMError("Mock endpoint dropped the shell")
+
+        time.sleep(MockEndpoint.invoke_delay)
+        self.output = [json.dumps({"status": 0, "message": "IOC removed", "details": self.pool.connection.server})]
+
+
+def install_mock() -> None:
+    """Swap pypsrp's classes in the transport module for the mocks"""
+    psrp_transport.WSMan = MockWSMan
+    psrp_transport.RunspacePool = MockRunspacePool
+    psrp_transport.PowerShell = MockPowerShell
+
+
+def run_round(pool: PSRPConnectionPool, tasks: list, iocs: dict, workers: int) -> dict:
+    """Run every task once through the pool"""
+    def check(task):
+        try:
+            return pool.run_check(task, iocs[task.ioc_name])
+        except Exception as e:
+            return {"status": -1, "error": str(e)}
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool_workers:
+        results = list(pool_workers.map(check, tasks))
+    elapsed = time.perf_counter() - start
+
+    errors = sum(1 for r in results if r.get('status', -1) == -1)
+    return {"checks": len(results), "errors": errors, "seconds": elapsed}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--boxes", type=int, default=20, help="fake Windows boxes to check")
+    parser.add_argument("--rounds", type=int, default=3, help="check cycles to run per mode")
+    parser.add_argument("--workers", type=int, default=16, help="concurrent checks")
+    parser.add_argument("--handshake-delay", type=float, default=1.0, help="seconds to authenticate and open a shell")
+    parser.add_argument("--invoke-delay", type=float, default=0.05, help="seconds to run one check script")
+    parser.add_argument("--drop-every", type=int, default=0, help="fail every Nth invocation (0 = never)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.ERROR)
+
+    MockEndpoint.handshake_delay = args.handshake_delay
+    MockEndpoint.invoke_delay = args.invoke_delay
+    MockEndpoint.drop_every = args.drop_every
+    install_mock()
+
+    loader = IOCDefinitionLoader()
+    loader.load_ioc_definitions()
+    windows_iocs = loader.get_iocs_for_os('windows')
+    iocs = {ioc.name: ioc for ioc in windows_iocs}
+
+    boxes = {
+        f"10.251.0.{i + 1}": Box(ip=f"10.251.0.{i + 1}", name=f"windows-{i + 1}", os="windows", team_num=i + 1)
+        for i in range(args.boxes)
+    }
+    tasks = [
+        IOCTask(team_num=box.team_num, box_ip=ip, box_os="windows", ioc_name=ioc.name,
+                ioc_script=ioc.check_script, check_id=1, playbook_path="")
+        for ip, box in boxes.items()
+        for ioc in windows_iocs
+    ]
+
+    print(f"{'mode':<12}{'checks':>8}{'errors':>8}{'opens':>8}{'reopens':>9}{'seconds':>10}")
+    totals = {}
+    for mode, persistent in (("pooled", True), ("per-check", False)):
+        pool = PSRPConnectionPool(boxes, persistent=persistent)
+        try:
+            rounds = [run_round(pool, tasks, iocs, args.workers) for _ in range(args.rounds)]
+            stats = pool.get_stats()
+        finally:
+            pool.close()
+
+        seconds = sum(r["seconds"] for r in rounds)
+        totals[mode] = seconds
+        print(f"{mode:<12}{sum(r['checks'] for r in rounds):>8}{sum(r['errors'] for r in rounds):>8}"
+              f"{stats['opens']:>8}{stats['reopens']:>9}{seconds:>10.2f}")
+
+    print(f"pooled speedup: {totals['per-check'] / max(totals['pooled'], 1e-9):.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+"""
+Load-test the check pipeline offline: a synthetic inventory checked over the
+simulated transport, through the task queue, worker threads, retry stage and
+circuit breaker, DB writes and cycle finalization, then the scoreboard views.
+
+Run from the repository root:
+
+    python -m benchmarks.simulated_load --teams 50 --boxes 10 --iocs 10 --workers 64
+
+Every OS uses the simulated transport, so no VM or Ansible run is involved.
+Results go to a throwaway SQLite database with the real tables and views.
+--latency and --sigma set the lognormal check run time, the rate options
+control script errors, status flips between cycles and unreachable boxes.
+"""
+import argparse
+import asyncio
+import logging
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from sqlalchemy import text
+from sqlmodel import SQLModel, Session, select
+
+from fastapi_backend.ansible.worker import worker
+from fastapi_backend.core.check_cycle import CheckCycle, cycle_tracker
+from fastapi_backend.core.orchestrator import CompetitionOrchestrator
+from fastapi_backend.database.db_init import DatabaseInitializer
+from fastapi_backend.database.db_writer import create_db_engine
+from fastapi_backend.database.models import BlueTeams, CheckInstance, IOCCheckResult
+
+
+def build_orchestrator(work_dir: Path, args) -> CompetitionOrchestrator:
+    """An orchestrator with a synthetic inventory whose every OS uses the simulated transport"""
+    orch = CompetitionOrchestrator()
+    orch.ansible_dir = work_dir / "ansible"
+    orch.ansible_dir.mkdir(exist_ok=True)
+    orch.inventory_manager.ansible_dir = orch.ansible_dir
+    orch.max_checks_per_host = args.max_per_host
+
+    orch.synthetic_inventory = {'teams': args.teams, 'boxes': args.boxes, 'iocs': args.iocs}
+    orch.check_transports = {os_name: "simulated" for os_name in ('linux', 'windows', 'firewall')}
+    orch.simulation = {
+        'latency_median': args.latency,
+        'latency_sigma': args.sigma,
+        'failure_rate': args.failure_rate,
+        'flip_rate': args.flip_rate,
+        'unreachable_rate': args.unreachable_rate,
+        'connect_delay': args.latency,
+        'seed': args.seed
+    }
+
+    async def setup():
+        await orch._load_inventory()
+        await orch._load_iocs()
+        await orch._initialize_executor()
+
+    asyncio.run(setup())
+    return orch
+
+
+def create_database(db_path: Path, teams) -> object:
+    """A fresh database with the real tables, scoring views and one row per team"""
+    url = f"sqlite:///{db_path}"
+    db_engine = create_db_engine(url)
+    # The view models are mapped as tables too, leave those names to the real views
+    SQLModel.metadata.create_all(
+        db_engine, tables=[BlueTeams.__table__, CheckInstance.__table__, IOCCheckResult.__table__]
+    )
+    DatabaseInitializer(url).create_scoring_views()
+
+    with Session(db_engine) as session:
+        for team_num in teams:
+            session.add(BlueTeams(team_num=team_num, total_score=0))
+        session.commit()
+    return db_engine
+
+
+def run_cycle(orch, db_engine, cycle_num: int, deadline_seconds: float) -> dict:
+    """Queue one full cycle and time it until every result is saved and scored"""
+    executor = orch.executor
+
+    with Session(db_engine) as session:
+        checks = [
+            CheckInstance(blue_team_num=team_num, timestamp=datetime.now(timezone.utc), score=0)
+            for team_num in orch.inventory_manager.teams
+        ]
+        session.add_all(checks)
+        session.commit()
+        check_ids = {check.blue_team_num: check.check_id for check in checks}
+
+    cycle = CheckCycle(cycle_num, check_ids)
+    cycle_tracker.register(cycle)
+    executor.retries.start_cycle(deadline=time.time() + deadline_seconds)
+    executor.breaker.start_cycle()
+
+    start = time.perf_counter()
+    cycle.expect(asyncio.run(orch._queue_all_checks(check_ids)))
+    finished = cycle.wait(deadline_seconds)
+    elapsed = time.perf_counter() - start
+
+    scores = cycle.finalize(db_engine)
+    cycle_tracker.unregister(cycle)
+
+    with Session(db_engine) as session:
+        statuses = session.exec(
+            select(IOCCheckResult.status).where(IOCCheckResult.check_instance_id.in_(list(check_ids.values())))
+        ).all()
+
+    return {
+        "cycle": cycle_num,
+        "finished": finished,
+        "checks": cycle.expected,
+        "rows": len(statuses),
+        "seconds": elapsed,
+        "present": statuses.count(1),
+        "remediated": statuses.count(0),
+        "failed": statuses.count(-1),
+        "unreachable": statuses.count(-2),
+        "top_score": max(scores.values(), default=0)
+    }
+
+
+def time_views(db_engine) -> dict:
+    """Seconds to read each scoreboard view in full"""
+    timings = {}
+    with Session(db_engine) as session:
+        for view in ("blue_teams_scoreboard", "team_latest_ioc_details", "score_history"):
+            start = time.perf_counter()
+            session.exec(text(f"SELECT * FROM {view}")).all()
+            timings[view] = time.perf_counter() - start
+    return timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--teams", type=int, default=50)
+    parser.add_argument("--boxes", type=int, default=10, help="boxes per team")
+    parser.add_argument("--iocs", type=int, default=10, help="IOCs per OS")
+    parser.add_argument("--cycles", type=int, default=2)
+    parser.add_argument("--workers", type=int, default=64, help="worker threads")
+    parser.add_argument("--max-per-host", type=int, default=2, help="checks in flight per box")
+    parser.add_argument("--latency", type=float, default=0.2, help="median simulated check seconds")
+    parser.add_argument("--sigma", type=float, default=0.5, help="lognormal sigma of check run time")
+    parser.add_argument("--failure-rate", type=float, default=0.01)
+    parser.add_argument("--flip-rate", type=float, default=0.1)
+    parser.add_argument("--unreachable-rate", type=float, default=0.02)
+    parser.add_argument("--deadline", type=float, default=300, help="seconds allowed per cycle")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.ERROR)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        work_dir = Path(tmp)
+        orch = build_orchestrator(work_dir, args)
+        executor = orch.executor
+        db_engine = create_database(work_dir / "load.db", orch.inventory_manager.teams)
+
+        threads = []
+        for _ in range(args.workers):
+            t = threading.Thread(
+                target=worker,
+                args=(
+                    executor.task_queue,
+                    executor.retries,
+                    executor.shutdown,
+                    executor.stats,
+                    executor.stats_lock,
+                    executor.inventory_path,
+                    executor.ioc_definitions,
+                    db_engine,
+                    executor.runner,
+                    executor.transports,
+                    executor.breaker
+                ),
+                daemon=True
+            )
+            t.start()
+            threads.append(t)
+        executor.retries.start()
+
+        results = [run_cycle(orch, db_engine, cycle_num, args.deadline) for cycle_num in range(1, args.cycles + 1)]
+        views = time_views(db_engine)
+
+        executor.retries.stop()
+        executor.shutdown.set()
+        for t in threads:
+            t.join()
+        simulation = next(iter(executor.transports.values())).get_stats()
+
+    print(f"{'cycle':<7}{'checks':>8}{'rows':>8}{'seconds':>10}{'checks/s':>10}"
+          f"{'present':>9}{'fixed':>7}{'failed':>8}{'unreach':>9}")
+    for result in results:
+        print(f"{result['cycle']:<7}{result['checks']:>8}{result['rows']:>8}{result['seconds']:>10.2f}"
+              f"{result['checks'] / result['seconds']:>10.1f}{result['present']:>9}{result['remediated']:>7}"
+              f"{result['failed']:>8}{result['unreachable']:>9}")
+    for view, seconds in views.items():
+        print(f"{view}: {seconds * 1000:.1f} ms")
+    print(f"worker p90 per task: {executor.task_queue.service_time():.3f}s, simulation: {simulation}")
+
+    ok = all(result["finished"] and result["rows"] == result["checks"] for result in results)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+Compare Linux check throughput between a pooled persistent SSH connection per
+box and a fresh SSH connection per check, against a local asyncssh server
+standing in for the blue team boxes' sshd.
+
+Run from the repository root:
+
+    python -m benchmarks.ssh_transport --boxes 20 --rounds 5
+
+Each fake box is a different 127.0.0.x loopback address on the same server.
+The stand-in runs check scripts on this machine, --auth-delay adds a pause to
+password authentication to approximate a real sshd's login cost.
+"""
+import argparse
+import asyncio
+import logging
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import asyncssh
+
+from fastapi_backend.ansible.ioc_definition import IOCDefinitionLoader
+from fastapi_backend.ansible.ssh_transport import SSHConnectionPool
+from fastapi_backend.ansible.worker_queue import IOCTask
+from fastapi_backend.core.inventory_manager import Box
+
+
+class _StandInServer(asyncssh.SSHServer):
+    """Accepts any password after auth_delay seconds"""
+
+    def __init__(self, auth_delay: float):
+        self.auth_delay = auth_delay
+
+    def begin_auth(self, username: str) -> bool:
+        return True
+
+    def password_auth_supported(self) -> bool:
+        return True
+
+    async def validate_password(self, username: str, password: str) -> bool:
+        await asyncio.sleep(self.auth_delay)
+        return True
+
+
+async def _run_command(process: asyncssh.SSHServerProcess) -> None:
+    """Run the requested command locally, feeding it the client's stdin"""
+    script = await process.stdin.read()
+    proc = await asyncio.create_subprocess_shell(
+        process.command or 'true',
+        stdin=asyncio.subprocess.PIPE,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE
+    )
+    stdout, stderr = await proc.communicate(script.encode())
+    process.stdout.write(stdout.decode(errors='replace'))
+    process.stderr.write(stderr.decode(errors='replace'))
+    process.exit(proc.returncode)
+
+
+def start_stand_in(auth_delay: float) -> int:
+    """Start the stand-in sshd in a background thread and return its port"""
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        port = s.getsockname()[1]
+
+    loop = asyncio.new_event_loop()
+    started = threading.Event()
+
+    async def serve():
+        await asyncssh.create_server(
+            lambda: _StandInServer(auth_delay),
+            '', port,
+            server_host_keys=[asyncssh.generate_private_key('ssh-ed25519')],
+            process_factory=_run_command
+        )
+        started.set()
+
+    threading.Thread(target=loop.run_forever, daemon=True, name="SSHStandIn").start()
+    asyncio.run_coroutine_threadsafe(serve(), loop).result()
+    started.wait()
+    return port
+
+
+def run_round(pool: SSHConnectionPool, tasks: list, iocs: dict, workers: int) -> dict:
+    """Run every task once through the pool"""
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool_workers:
+        results = list(pool_workers.map(lambda t: pool.run_check(t, iocs[t.ioc_name]), tasks))
+    elapsed = time.perf_counter() - start
+
+    errors = sum(1 for r in results if r.get('status', -1) == -1)
+    return {"checks": len(results), "errors": errors, "seconds": elapsed}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--boxes", type=int, default=20, help="fake Linux boxes to check")
+    parser.add_argument("--rounds", type=int, default=5, help="check cycles to run per mode")
+    parser.add_argument("--workers", type=int, default=16, help="concurrent checks")
+    parser.add_argument("--auth-delay", type=float, default=0.05, help="seconds the stand-in spends on each login")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    loader = IOCDefinitionLoader()
+    loader.load_ioc_definitions()
+    linux_iocs = loader.get_iocs_for_os('linux')
+    iocs = {ioc.name: ioc for ioc in linux_iocs}
+
+    port = start_stand_in(args.auth_delay)
+    boxes = {
+        f"127.0.0.{i + 1}": Box(ip=f"127.0.0.{i + 1}", name=f"linux-{i + 1}", os="linux",
+                                team_num=i + 1, username="bench", password="bench", port=port)
+        for i in range(args.boxes)
+    }
+    tasks = [
+        IOCTask(team_num=box.team_num, box_ip=ip, box_os="linux", ioc_name=ioc.name,
+                ioc_script=ioc.check_script, check_id=1, playbook_path="")
+        for ip, box in boxes.items()
+        for ioc in linux_iocs
+    ]
+
+    print(f"{'mode':<12}{'checks':>8}{'errors':>8}{'connects':>10}{'seconds':>10}{'checks/s':>10}")
+    totals = {}
+    for mode, persistent in (("pooled", True), ("per-check", False)):
+        pool = SSHConnectionPool(boxes, persistent=persistent)
+        try:
+            rounds = [run_round(pool, tasks, iocs, args.workers) for _ in range(args.rounds)]
+            stats = pool.get_stats()
+        finally:
+            pool.close()
+
+        checks = sum(r["checks"] for r in rounds)
+        seconds = sum(r["seconds"] for r in rounds)
+        totals[mode] = seconds
+        print(f"{mode:<12}{checks:>8}{sum(r['errors'] for r in rounds):>8}"
+              f"{stats['connects']:>10}{seconds:>10.2f}{checks / seconds:>10.1f}")
+
+    print(f"pooled speedup: {totals['per-check'] / max(totals['pooled'], 1e-9):.2f}x")
+
+
+if __name__ == "__main__":
+    main()
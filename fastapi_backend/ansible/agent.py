@@ -0,0 +1,173 @@
+"""
+Remote check agent.
+
+Leases IOC check tasks from the orchestrator's TaskBroker, runs their
+playbooks locally and streams the raw output back. Run from a checkout of
+this repository so the IOC check scripts are available:
+
+    python -m fastapi_backend.ansible.agent --broker unix:/tmp/rts_broker.sock
+    python -m fastapi_backend.ansible.agent --broker 10.0.0.5:7700 --concurrency 8
+"""
+import argparse
+import json
+import logging
+import os
+import socket
+import subprocess
+import tempfile
+import threading
+import time
+import uuid
+from pathlib import Path
+
+from fastapi_backend.ansible.agent_broker import parse_broker_address
+from fastapi_backend.ansible.worker import playbook_options, playbook_timeout, run_playbook
+from fastapi_backend.ansible.worker_queue import task_from_dict
+
+class BrokerConnection:
+    """Newline-delimited JSON request/response channel to the broker"""
+
+    def __init__(self, address: str):
+        bind = parse_broker_address(address)
+        if isinstance(bind, str):
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        else:
+            self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.connect(bind)
+        self.file = self.sock.makefile('rwb')
+
+    def request(self, message: dict) -> dict:
+        self.file.write(json.dumps(message).encode() + b'\n')
+        self.file.flush()
+        line = self.file.readline()
+        if not line:
+            raise ConnectionError("Broker closed the connection")
+        return json.loads(line)
+
+    def close(self) -> None:
+        self.file.close()
+        self.sock.close()
+
+class CheckAgent:
+    """Pulls tasks from a broker and executes them with ansible-playbook"""
+
+    def __init__(self, broker_address: str, concurrency: int = 4, agent_id: str = None):
+        self.logger = logging.getLogger(__name__)
+        self.broker_address = broker_address
+        self.concurrency = concurrency
+        self.agent_id = agent_id or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self.shutdown = threading.Event()
+        self.inventory_path = None
+
+    def run(self) -> None:
+        """Run worker loops until interrupted"""
+        self._sync_inventory()
+
+        threads = [
+            threading.Thread(target=self._work_loop, daemon=True, name=f"Agent-{i + 1}")
+            for i in range(self.concurrency)
+        ]
+        for t in threads:
+            t.start()
+        self.logger.info(f"Agent {self.agent_id} running {self.concurrency} workers against {self.broker_address}")
+
+        try:
+            while any(t.is_alive() for t in threads):
+                time.sleep(0.5)
+        except KeyboardInterrupt:
+            self.shutdown.set()
+
+    def _sync_inventory(self) -> None:
+        """Fetch the orchestrator's inventory into this checkout"""
+        conn = BrokerConnection(self.broker_address)
+        try:
+            hello = conn.request({'op': 'hello', 'agent_id': self.agent_id})
+        finally:
+            conn.close()
+
+        self.inventory_path = hello['inventory_path']
+        if hello.get('inventory') is not None:
+            _write_atomic(Path(self.inventory_path), hello['inventory'])
+
+    def _work_loop(self) -> None:
+        """Lease, execute and report tasks over one broker connection"""
+        conn = None
+        while not self.shutdown.is_set():
+            try:
+                if conn is None:
+                    conn = BrokerConnection(self.broker_address)
+
+                lease = conn.request({'op': 'lease', 'agent_id': self.agent_id, 'wait': 5})
+                if not lease.get('lease_id'):
+                    continue
+
+                result = self._execute(lease)
+                conn.request({'op': 'result', 'agent_id': self.agent_id, 'lease_id': lease['lease_id'], **result})
+
+            except (OSError, ConnectionError) as e:
+                self.logger.warning(f"Broker connection lost ({e}), reconnecting...")
+                if conn:
+                    conn.close()
+                conn = None
+                time.sleep(2)
+
+    def _execute(self, lease: dict) -> dict:
+        """Run a leased task's playbook and return its raw output, or the error that stopped it"""
+        timeout = lease.get('timeout')
+        start_time = time.time()
+
+        try:
+            # A task this agent can't rebuild is reported back, not left to expire
+            task = task_from_dict(lease['task'])
+
+            # Use the orchestrator's copy of the playbook, it may be newer than ours
+            if lease.get('playbook') is not None:
+                _write_atomic(Path(task.playbook_path), lease['playbook'])
+
+            # The broker sizes the timeout from its latency history
+            timeout = timeout or playbook_timeout(task)
+
+            extra_args, env = playbook_options(task)
+            result = run_playbook(
+                task.playbook_path,
+                self.inventory_path,
+                timeout=timeout,
+                extra_args=extra_args,
+                env=env
+            )
+            return {'rc': result.rc, 'stdout': result.stdout_text, 'error': None,
+                    'duration': time.time() - start_time}
+
+        except subprocess.TimeoutExpired:
+            return {'rc': None, 'stdout': '', 'error': f"Check timed out after {timeout}s",
+                    'timed_out': True, 'duration': timeout}
+        except Exception as e:
+            self.logger.error(f"Failed to run leased task {lease.get('lease_id')}: {e}")
+            return {'rc': None, 'stdout': '', 'error': str(e) or type(e).__name__}
+
+def _write_atomic(path: Path, content: str) -> None:
+    """Write a file without other agents on this host seeing a partial copy"""
+    if path.exists() and path.read_text() == content:
+        return
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f'.{path.name}.')
+    with os.fdopen(fd, 'w') as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Remote IOC check agent")
+    parser.add_argument('--broker', required=True, help="unix:/path/to.sock or host:port")
+    parser.add_argument('--concurrency', type=int, default=4, help="tasks to run at once")
+    parser.add_argument('--agent-id', default=None, help="name reported to the broker")
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    CheckAgent(args.broker, args.concurrency, args.agent_id).run()
+
+if __name__ == '__main__':
+    main()
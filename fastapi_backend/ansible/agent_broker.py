@@ -0,0 +1,327 @@
+import json
+import logging
+import os
+import queue
+import socketserver
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional, Tuple, Union
+
+from sqlmodel import Session
+
+from fastapi_backend.ansible.latency import latency_tracker
+from fastapi_backend.ansible.worker import (
+    admit_task,
+    count_results,
+    parse_batch_output,
+    parse_single_output,
+    playbook_timeout,
+    record_result,
+    short_circuit_results,
+)
+from fastapi_backend.ansible.worker_queue import task_to_dict
+from fastapi_backend.database.db_writer import engine
+from fastapi_backend.database.result_writer import result_writer
+
+def parse_broker_address(address: str) -> Union[str, Tuple[str, int]]:
+    """'unix:/path/to.sock' -> path, 'host:port' -> (host, port)"""
+    if address.startswith('unix:'):
+        return address[len('unix:'):]
+
+    host, _, port = address.rpartition(':')
+    return (host or '127.0.0.1', int(port))
+
+@dataclass
+class Lease:
+    """A task handed to an agent that must be completed before its deadline"""
+    lease_id: str
+    task: object
+    agent_id: str
+    deadline: float
+    leased_at: float
+
+class _AgentHandler(socketserver.StreamRequestHandler):
+    """One agent connection speaking newline-delimited JSON"""
+
+    def handle(self):
+        broker: TaskBroker = self.server.broker
+
+        try:
+            for line in self.rfile:
+                try:
+                    request = json.loads(line)
+                    response = broker.handle_request(request)
+                except Exception as e:
+                    broker.logger.error(f"Bad agent request: {e}")
+                    response = {'ok': False, 'error': str(e)}
+
+                self.wfile.write(json.dumps(response).encode() + b'\n')
+                self.wfile.flush()
+
+        except (ConnectionResetError, BrokenPipeError):
+            # Agent died, its leases expire and get re-delivered
+            broker.logger.warning("Agent connection dropped")
+
+class _TCPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+class _UnixServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+class TaskBroker:
+    """
+    Serves the executor's task queue to remote check agents.
+    Agents lease tasks over TCP or a Unix socket, run them, and send back the
+    raw playbook output, which is parsed and saved here. Leases that are not
+    completed before their deadline are put back on the queue for another agent.
+    """
+
+    def __init__(self, executor, address: str, lease_grace: int = 30):
+        self.logger = logging.getLogger(__name__)
+        self.executor = executor
+        self.address = address
+        self.lease_grace = lease_grace  # Seconds added to a task's playbook timeout
+
+        self.leases: Dict[str, Lease] = {}
+        self.agents: Dict[str, Dict] = {}
+        self.lock = threading.Lock()
+
+        self.server: Optional[socketserver.BaseServer] = None
+        self.shutdown = threading.Event()
+        self.threads = []
+
+        self.stats = {
+            'leased': 0,
+            'completed': 0,
+            'redelivered': 0,
+            'stale_results': 0
+        }
+
+    def start(self) -> None:
+        """Start serving agents and reaping expired leases"""
+        bind = parse_broker_address(self.address)
+
+        if isinstance(bind, str):
+            # Remove a stale socket left by a previous run
+            if os.path.exists(bind):
+                os.unlink(bind)
+            self.server = _UnixServer(bind, _AgentHandler)
+        else:
+            self.server = _TCPServer(bind, _AgentHandler)
+        self.server.broker = self
+
+        self.shutdown.clear()
+        result_writer.start(engine)
+        self.executor.retries.start()
+        for target, name in ((self.server.serve_forever, "AgentBroker"),
+                             (self._reap_expired_leases, "AgentLeaseReaper")):
+            t = threading.Thread(target=target, daemon=True, name=name)
+            t.start()
+            self.threads.append(t)
+
+        self.logger.info(f"Agent broker listening on {self.address}")
+
+    def stop(self) -> None:
+        """Stop serving and put outstanding leases back on the queue"""
+        self.shutdown.set()
+        self.executor.retries.stop()
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+            if isinstance(parse_broker_address(self.address), str):
+                Path(parse_broker_address(self.address)).unlink(missing_ok=True)
+            self.server = None
+
+        for t in self.threads:
+            t.join(timeout=5)
+        self.threads.clear()
+
+        # Results agents already reported are committed before the broker is gone
+        result_writer.stop()
+
+        with self.lock:
+            leases = list(self.leases.values())
+            self.leases.clear()
+        for lease in leases:
+            self._requeue(lease)
+
+        self.logger.info("Agent broker stopped")
+
+    def handle_request(self, request: Dict) -> Dict:
+        """Dispatch one agent request"""
+        op = request.get('op')
+        agent_id = request.get('agent_id', 'unknown')
+        self._touch_agent(agent_id)
+
+        if op == 'hello':
+            # Agents write the inventory into their own checkout
+            inventory_path = self.executor.inventory_path
+            return {
+                'ok': True,
+                'inventory_path': inventory_path,
+                'inventory': Path(inventory_path).read_text() if inventory_path else None
+            }
+
+        if op == 'lease':
+            return self.lease(agent_id, wait=float(request.get('wait', 5)))
+
+        if op == 'result':
+            accepted = self.complete(
+                request['lease_id'],
+                rc=request.get('rc'),
+                stdout=request.get('stdout') or '',
+                error=request.get('error'),
+                timed_out=bool(request.get('timed_out')),
+                duration=request.get('duration')
+            )
+            return {'ok': accepted}
+
+        return {'ok': False, 'error': f"Unknown op: {op}"}
+
+    def lease(self, agent_id: str, wait: float) -> Dict:
+        """Hand the next queued task to an agent, blocking up to wait seconds"""
+        give_up = time.monotonic() + wait
+        while True:
+            try:
+                task = self.executor.task_queue.get(timeout=max(give_up - time.monotonic(), 0))
+            except queue.Empty:
+                return {'ok': True, 'lease_id': None}
+
+            # Agents can't wait on a half-open host's probe, so only open circuits are skipped
+            if admit_task(task, self.executor.breaker, timeout=0):
+                break
+            self._short_circuit(task)
+
+        now = time.time()
+        timeout = playbook_timeout(task)
+        lease = Lease(
+            lease_id=uuid.uuid4().hex,
+            task=task,
+            agent_id=agent_id,
+            deadline=now + timeout + self.lease_grace,
+            leased_at=now
+        )
+
+        with self.lock:
+            self.leases[lease.lease_id] = lease
+            self.agents[agent_id]['leased'] += 1
+            self.stats['leased'] += 1
+        with self.executor.stats_lock:
+            self.executor.stats['in_progress'] += 1
+            self.executor.stats['queue_size'] = self.executor.task_queue.qsize()
+
+        return {
+            'ok': True,
+            'lease_id': lease.lease_id,
+            'deadline': lease.deadline,
+            'timeout': timeout,  # Agents have no latency history of their own
+            'task': task_to_dict(task),
+            'playbook': Path(task.playbook_path).read_text() if task.playbook_path else None
+        }
+
+    def complete(self, lease_id: str, rc: Optional[int], stdout: str,
+                 error: Optional[str] = None, timed_out: bool = False,
+                 duration: Optional[float] = None) -> bool:
+        """Parse and save an agent's result, ignoring leases that already expired"""
+        with self.lock:
+            lease = self.leases.pop(lease_id, None)
+            if lease is None:
+                self.stats['stale_results'] += 1
+                return False
+            self.agents.setdefault(lease.agent_id, self._new_agent())['completed'] += 1
+            self.stats['completed'] += 1
+
+        task = lease.task
+        is_batch = getattr(task, 'tasks', None) is not None
+        ioc_definitions = self.executor.ioc_definitions
+
+        try:
+            if error is not None:
+                parsed = [(t, -1, {'error': error}) for t in (task.tasks if is_batch else [task])]
+            elif is_batch:
+                parsed = parse_batch_output(task, rc, stdout, ioc_definitions)
+            else:
+                status, output_data = parse_single_output(task, rc, stdout, ioc_definitions)
+                parsed = [(task, status, output_data)]
+
+            # Older agents don't report how long the playbook ran
+            if not is_batch and duration is not None:
+                latency_tracker.observe(task, parsed[0][1], duration, timed_out)
+
+            with Session(engine) as db_session:
+                results = [
+                    record_result(
+                        db_session, ioc_task, status, output_data,
+                        execution_time=time.time() - lease.leased_at,
+                        retries=self.executor.retries,
+                        timed_out=timed_out
+                    )
+                    for ioc_task, status, output_data in parsed
+                ]
+
+            self.executor.breaker.record_results(results)
+            with self.executor.stats_lock:
+                count_results(self.executor.stats, results)
+
+        finally:
+            with self.executor.stats_lock:
+                self.executor.stats['in_progress'] -= 1
+            self.executor.task_queue.task_done(task)
+
+        return True
+
+    def get_stats(self) -> Dict:
+        """Broker and per-agent statistics"""
+        with self.lock:
+            return {
+                **self.stats,
+                'outstanding_leases': len(self.leases),
+                'agents': {agent_id: dict(info) for agent_id, info in self.agents.items()}
+            }
+
+    def _reap_expired_leases(self) -> None:
+        """Re-deliver tasks whose agent died or went silent"""
+        while not self.shutdown.wait(1.0):
+            now = time.time()
+            with self.lock:
+                expired = [lease for lease in self.leases.values() if lease.deadline < now]
+                for lease in expired:
+                    del self.leases[lease.lease_id]
+                    self.stats['redelivered'] += 1
+
+            for lease in expired:
+                self.logger.warning(
+                    f"Lease {lease.lease_id} on agent {lease.agent_id} expired, re-queueing "
+                    f"{getattr(lease.task, 'ioc_name', lease.task.playbook_path)}"
+                )
+                self._requeue(lease)
+
+    def _short_circuit(self, task) -> None:
+        """Save a task on an unreachable host without leasing it"""
+        try:
+            with Session(engine) as db_session:
+                results = short_circuit_results(task, db_session)
+            with self.executor.stats_lock:
+                count_results(self.executor.stats, results)
+        finally:
+            self.executor.task_queue.task_done(task)
+
+    def _requeue(self, lease: Lease) -> None:
+        """Put a leased task back on the queue and close out the original get()"""
+        self.executor.task_queue.put(lease.task)
+        with self.executor.stats_lock:
+            self.executor.stats['in_progress'] -= 1
+        self.executor.task_queue.task_done(lease.task)
+
+    def _touch_agent(self, agent_id: str) -> None:
+        with self.lock:
+            agent = self.agents.setdefault(agent_id, self._new_agent())
+            agent['last_seen'] = time.time()
+
+    @staticmethod
+    def _new_agent() -> Dict:
+        return {'leased': 0, 'completed': 0, 'last_seen': time.time()}
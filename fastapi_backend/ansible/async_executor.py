@@ -0,0 +1,447 @@
+import asyncio
+import logging
+import os
+import queue
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from sqlmodel import Session
+
+from fastapi_backend.ansible.autoscaler import WorkerAutoscaler
+from fastapi_backend.ansible.circuit_breaker import HostCircuitBreaker
+from fastapi_backend.ansible.fork_server import ForkServer
+from fastapi_backend.ansible.latency import latency_tracker
+from fastapi_backend.ansible.retry import RetryScheduler
+from fastapi_backend.ansible.task_queue import CheckTaskQueue
+from fastapi_backend.ansible.worker import (
+    PLAYBOOK_ENV,
+    admit_task,
+    build_playbook_command,
+    connect_timeout,
+    count_results,
+    log_playbook_result,
+    parse_batch_output,
+    parse_deploy_output,
+    parse_single_output,
+    playbook_options,
+    playbook_timeout,
+    record_result,
+    run_transport_check,
+    save_check_result,
+    short_circuit_results,
+    transport_error,
+)
+from fastapi_backend.ansible.worker_queue import IOCDeployTask
+from fastapi_backend.database.db_writer import engine
+from fastapi_backend.database.result_writer import result_writer
+
+class AsyncIOCCheckExecutor:
+    """
+    asyncio-native check executor.
+    Runs ansible-playbook with asyncio subprocesses inside the orchestrator's
+    event loop instead of one OS thread per worker. Accepts the same
+    IOCTask/IOCBoxTask/IOCInventoryTask objects as IOCCheckExecutor.
+    The task queue wakes the dispatcher when a task may be ready, deploys run
+    as asyncio subprocesses and transports with run_check_async() (SSH, the
+    simulated transport) are awaited on the loop. Only calls that can't be
+    made async, pypsrp checks and DB sessions, use a small thread pool.
+    """
+
+    CHECK_MODES = ('task', 'box', 'inventory')
+
+    def __init__(self, db_session, num_workers: int = 32, check_mode: str = 'task',
+                 forks: int = 50, max_per_host: int = 2, fork_server: bool = False,
+                 queue_order: str = 'fair', min_workers: Optional[int] = None,
+                 max_workers: Optional[int] = None, blocking_threads: int = 16):
+        self.logger = logging.getLogger(__name__)
+        self.db = db_session
+
+        # With bounds the concurrency is resized at runtime, starting from num_workers
+        self.autoscaler = None
+        if min_workers is not None and max_workers is not None:
+            self.autoscaler = WorkerAutoscaler(min_workers, max_workers)
+            num_workers = self.autoscaler.clamp(num_workers)
+        # Maximum number of playbooks running at once
+        self.num_workers = num_workers
+
+        if check_mode not in self.CHECK_MODES:
+            raise ValueError(f"Unknown check mode: {check_mode}")
+        self.check_mode = check_mode
+        self.forks = forks
+        self.runner = 'asyncio'
+
+        # Queues
+        self.task_queue = CheckTaskQueue(max_per_host, queue_order)  # Interactive lane, team round-robin, per-host in-flight limit
+        self.retries = RetryScheduler(self.task_queue.put, self._save_expired_retries)
+        self.breaker = HostCircuitBreaker()  # Fails checks fast on hosts that stopped answering
+        # Forks ansible-playbook runs from one process that has already imported Ansible
+        self.fork_server = ForkServer(PLAYBOOK_ENV) if fork_server else None
+
+        # Concurrency
+        self.semaphore: Optional[asyncio.Semaphore] = None
+        self.retired_slots = 0  # Slots to drop as checks finish after the concurrency shrank
+        self.dispatcher: Optional[asyncio.Task] = None
+        self.autoscale_task: Optional[asyncio.Task] = None
+        self.running: set = set()
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.ready: Optional[asyncio.Event] = None  # Set by the task queue when a task may be dispatchable
+        self.blocking_threads = blocking_threads  # Also bounds how many pypsrp checks run at once
+        self.pool: Optional[ThreadPoolExecutor] = None  # Threads for blocking calls, see _in_thread
+
+        # Statistics
+        self.stats = {
+            'total': 0,
+            'completed': 0,
+            'failed': 0,
+            'timeouts': 0,
+            'in_progress': 0,
+            'queue_size': 0,
+            'retries': 0,
+            'unreachable': 0
+        }
+
+        # Pre-generated components
+        self.inventory_path = None
+        self.playbook_cache = {}  # Cache of pre-generated playbooks
+        self.box_playbook_cache = {}  # Cache of batched per-box playbooks
+        self.inventory_playbook_path = None  # Whole-inventory playbook
+        self.transports = {}  # OS -> native transport used instead of ansible-playbook
+
+        # IOC definitions
+        self.ioc_definitions = {}  # All loaded IOC definitions
+        self.os_ioc_mapping = {    # IOCs grouped by OS
+            'windows': [],
+            'linux': [],
+            'firewall': []
+        }
+
+    @property
+    def started(self) -> bool:
+        return self.dispatcher is not None
+
+    def start_workers(self):
+        """Start the dispatcher task, must be called from the running event loop"""
+        if self.started:
+            return
+        self.logger.info(f"Starting async check dispatcher with concurrency {self.num_workers}...")
+
+        self.loop = asyncio.get_running_loop()
+        self.semaphore = asyncio.Semaphore(self.num_workers)
+        self.ready = asyncio.Event()
+        # Puts come from the API, the retry thread and the loop itself
+        self.task_queue.add_listener(self._wake)
+        self.pool = ThreadPoolExecutor(max_workers=self.blocking_threads, thread_name_prefix="AsyncCheckIO")
+        # Checks hand their results to one batching writer thread
+        result_writer.start(engine)
+        self.dispatcher = asyncio.create_task(self._dispatch())
+        if self.autoscaler:
+            self.autoscale_task = asyncio.create_task(self._autoscale())
+        self.retries.start()
+        if self.fork_server:
+            # Import Ansible now rather than on the first check
+            self.fork_server.start()
+
+    async def stop_workers(self):
+        """Cancel the dispatcher and any in-flight checks"""
+        self.logger.info("Stopping async check dispatcher...")
+
+        # Stop retrying first so nothing new lands on the queue
+        await self._in_thread(self.retries.stop)
+
+        background = [task for task in (self.dispatcher, self.autoscale_task) if task]
+        for task in background:
+            task.cancel()
+        in_flight = list(self.running)
+        for task in in_flight:
+            task.cancel()
+
+        await asyncio.gather(*background, *in_flight, return_exceptions=True)
+
+        self.dispatcher = None
+        self.autoscale_task = None
+        self.running.clear()
+        self.task_queue.remove_listener(self._wake)
+        # Commit whatever finished checks handed over
+        await self._in_thread(result_writer.stop)
+        if self.fork_server:
+            await self._in_thread(self.fork_server.stop)
+        if self.pool:
+            # Cancelled checks may still be finishing a blocking call, don't wait on them
+            self.pool.shutdown(wait=False)
+            self.pool = None
+        self.logger.info("Async check dispatcher stopped")
+
+    def get_stats(self) -> Dict:
+        """Get current statistics"""
+        stats = {**self.stats, 'workers': self.num_workers, 'retry': self.retries.get_stats(), 'circuits': self.breaker.get_stats(),
+                 'result_writer': result_writer.get_stats()}
+        if self.autoscaler:
+            stats['autoscaler'] = self.autoscaler.get_stats()
+        if self.fork_server:
+            stats['fork_server'] = self.fork_server.get_stats()
+        return stats
+
+    async def _in_thread(self, func, *args):
+        """Run a blocking call (pypsrp, DB sessions, stopping threads) in the executor's thread pool"""
+        return await asyncio.get_running_loop().run_in_executor(self.pool, func, *args)
+
+    def resize(self, num_workers: int) -> None:
+        """Change how many checks may run at once, must be called from the event loop"""
+        change = num_workers - self.num_workers
+        self.num_workers = num_workers
+
+        if change < 0:
+            # Running checks keep their slots, which are dropped as they finish
+            self.retired_slots -= change
+            return
+
+        # Cancel out pending retirements before adding new slots
+        revived = min(change, self.retired_slots)
+        self.retired_slots -= revived
+        for _ in range(change - revived):
+            self.semaphore.release()
+
+    async def _autoscale(self) -> None:
+        """Resize the concurrency from queue depth, time left in the cycle and task latency"""
+        while True:
+            await asyncio.sleep(self.autoscaler.interval)
+            try:
+                self.resize(self.autoscaler.evaluate(
+                    self.num_workers,
+                    self.task_queue.qsize(),
+                    self.stats['in_progress'],
+                    self.retries.deadline,
+                    self.task_queue.service_time()
+                ))
+            except Exception as e:
+                self.logger.error(f"Autoscaler error: {e}")
+
+    def _release_slot(self) -> None:
+        if self.retired_slots:
+            self.retired_slots -= 1
+        else:
+            self.semaphore.release()
+
+    def _wake(self) -> None:
+        """Task queue listener, may be called from any thread"""
+        self.loop.call_soon_threadsafe(self.ready.set)
+
+    async def _dispatch(self) -> None:
+        """Pull tasks off the queue and start each once a concurrency slot is free"""
+        while True:
+            await self.semaphore.acquire()
+            task = await self._next_task()
+
+            check = asyncio.create_task(self._run_task(task))
+            self.running.add(check)
+            check.add_done_callback(self.running.discard)
+
+    async def _run_task(self, task) -> None:
+        """Run one queued task and record its results"""
+        self.stats['in_progress'] += 1
+        self.stats['queue_size'] = self.task_queue.qsize()
+        start_time = time.time()
+        timeout = playbook_timeout(task)
+        timed_out = False
+
+        try:
+            if isinstance(task, IOCDeployTask):
+                # Deploys save no check results, their progress goes to the deployment tracker
+                await self._run_deploy(task)
+                return
+
+            # Closed circuits admit without waiting, a half-open host's probe
+            # may keep admit() blocked, so that wait goes to the thread pool
+            if not (hasattr(task, 'forks') or self.breaker.closed(task.box_ip)
+                    or await self._in_thread(admit_task, task, self.breaker, timeout)):
+                results = await self._in_thread(self._save_short_circuited, task)
+                count_results(self.stats, results)
+                return
+
+            is_batch = getattr(task, 'tasks', None) is not None
+            transport = None if is_batch else self.transports.get(task.box_os)
+            if transport is not None:
+                if hasattr(transport, 'run_check_async'):
+                    results = await self._run_transport_async(task, transport)
+                else:
+                    # pypsrp only blocks
+                    results = await self._in_thread(self._run_transport, task)
+                self.breaker.record_results(results)
+                count_results(self.stats, results)
+                return
+
+            extra_args, env = playbook_options(task)
+
+            try:
+                rc, stdout = await self._run_playbook(task.playbook_path, extra_args, env, timeout)
+                if is_batch:
+                    parsed = parse_batch_output(task, rc, stdout, self.ioc_definitions)
+                else:
+                    status, output_data = parse_single_output(task, rc, stdout, self.ioc_definitions)
+                    parsed = [(task, status, output_data)]
+
+            except asyncio.TimeoutError:
+                timed_out = True
+                error = f"Check timed out after {timeout}s"
+                parsed = [(t, -1, {'error': error}) for t in (task.tasks if is_batch else [task])]
+
+            except Exception as e:
+                self.logger.error(f"Async check error for {task.playbook_path}: {e}")
+                parsed = [(t, -1, {'error': str(e)}) for t in (task.tasks if is_batch else [task])]
+
+            # A batch's run time says nothing about any one IOC
+            execution_time = time.time() - start_time
+            if not is_batch:
+                latency_tracker.observe(task, parsed[0][1], execution_time, timed_out)
+
+            # DB writes are blocking, keep them off the event loop
+            results = await self._in_thread(self._save_results, parsed, execution_time, timed_out)
+            self.breaker.record_results(results)
+            count_results(self.stats, results)
+
+        finally:
+            self.stats['in_progress'] -= 1
+            self.task_queue.task_done(task)
+            self._release_slot()
+
+    async def _next_task(self):
+        """Wait until the queue has a task whose host has capacity and take it"""
+        while True:
+            # Cleared before looking, so a put that lands after the look still wakes us
+            self.ready.clear()
+            try:
+                return self.task_queue.get_nowait()
+            except queue.Empty:
+                await self.ready.wait()
+
+    async def _run_transport_async(self, task, transport) -> list:
+        """run_transport_check for a transport whose checks are coroutines, awaited on the loop"""
+        start_time = time.time()
+        ioc = self.ioc_definitions.get(task.ioc_name)
+        timed_out = False
+
+        try:
+            if ioc is None:
+                raise ValueError(f"Unknown IOC: {task.ioc_name}")
+
+            output_data = await transport.run_check_async(task, ioc)
+            status = output_data.get('status', -1)
+
+        except Exception as e:
+            status, output_data, timed_out = transport_error(task, e)
+
+        execution_time = time.time() - start_time
+        latency_tracker.observe(task, status, execution_time, timed_out)
+
+        return await self._in_thread(self._save_results, [(task, status, output_data)], execution_time, timed_out)
+
+    async def _run_deploy(self, deploy_task) -> None:
+        """run_deploy_task with each IOC's deploy-and-verify playbook as an asyncio subprocess"""
+        from fastapi_backend.core.deployment import deployment_tracker
+
+        def report(ioc_name, state, detail=None, seconds=None):
+            deployment_tracker.update(deploy_task.deployment_id, deploy_task.box_ip, ioc_name, state, detail, seconds)
+
+        unreachable = None
+        for ioc_name, playbook_path in deploy_task.playbooks.items():
+            # Once the box stops answering, its remaining deploys would only wait out the timeout
+            if unreachable:
+                report(ioc_name, 'failed', unreachable)
+                continue
+
+            report(ioc_name, 'deploying')
+            start_time = time.time()
+
+            try:
+                extra_args, env = playbook_options(deploy_task)
+                rc, stdout = await self._run_playbook(playbook_path, extra_args, env, deploy_task.timeout)
+                state, detail = parse_deploy_output(deploy_task.box_ip, ioc_name, rc, stdout)
+
+            except asyncio.TimeoutError:
+                state, detail = 'failed', f"Deploy timed out after {deploy_task.timeout}s"
+
+            except Exception as e:
+                state, detail = 'failed', str(e)
+
+            if state == 'unreachable':
+                state = 'failed'
+                unreachable = detail
+            report(ioc_name, state, detail, time.time() - start_time)
+
+    async def _run_playbook(self, playbook_path: str, extra_args: List[str], env: Optional[Dict], timeout: int) -> tuple:
+        """Run ansible-playbook as an asyncio subprocess, killing it on timeout or cancel"""
+        cmd = build_playbook_command(playbook_path, self.inventory_path, extra_args, connect_timeout(timeout))
+
+        if self.fork_server:
+            return await self._run_forked(cmd, env, timeout)
+
+        proc = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            cwd=str(Path.cwd()),
+            env={**os.environ, **env} if env else None
+        )
+
+        try:
+            stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout=timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            proc.kill()
+            await proc.wait()
+            raise
+
+        stdout_text = stdout.decode(errors='replace')
+        log_playbook_result(cmd, proc.returncode, stdout_text, stderr.decode(errors='replace'))
+        return proc.returncode, stdout_text
+
+    async def _run_forked(self, cmd: List[str], env: Optional[Dict], timeout: int) -> tuple:
+        """Run ansible-playbook through the fork server, killing the run on timeout or cancel"""
+        run_id, future = self.fork_server.submit(cmd[1:], env, str(Path.cwd()))
+
+        try:
+            rc, stdout_text, stderr_text = await asyncio.wait_for(asyncio.wrap_future(future), timeout=timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            self.fork_server.kill(run_id)
+            raise
+
+        log_playbook_result(cmd, rc, stdout_text, stderr_text)
+        return rc, stdout_text
+
+    def _save_results(self, parsed: list, execution_time: float, timed_out: bool) -> list:
+        """Save parsed results with a short-lived session, handing failures to the retry stage"""
+        with Session(engine) as db_session:
+            return [
+                record_result(
+                    db_session, ioc_task, status, output_data,
+                    execution_time=execution_time,
+                    retries=self.retries,
+                    timed_out=timed_out
+                )
+                for ioc_task, status, output_data in parsed
+            ]
+
+    def _run_transport(self, task) -> list:
+        """Run and save a check through a blocking native transport, called in the thread pool"""
+        with Session(engine) as db_session:
+            return [run_transport_check(
+                task, self.transports[task.box_os], self.ioc_definitions, db_session, self.retries
+            )]
+
+    def _save_short_circuited(self, task) -> list:
+        """Save a task on an unreachable host without running it"""
+        with Session(engine) as db_session:
+            return short_circuit_results(task, db_session)
+
+    def _save_expired_retries(self, expired: List[tuple]) -> None:
+        """Record retries that ran out of cycle time with their last failure"""
+        with Session(engine) as db_session:
+            for task, output_data in expired:
+                save_check_result(db_session, task=task, status=-1, output_data=output_data, execution_time=0.0)
+
+        # This runs on the retry thread, stats belong to the loop
+        self.loop.call_soon_threadsafe(self._count_failed, len(expired))
+
+    def _count_failed(self, count: int) -> None:
+        self.stats['failed'] += count
@@ -0,0 +1,106 @@
+import logging
+import math
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+from fastapi_backend.ansible.latency import CHECK_TIMEOUT
+
+class WorkerAutoscaler:
+    """
+    Sizes an executor's worker pool from the work left in the current cycle.
+    Every `interval` seconds the executor reports its pool size, queue depth,
+    checks in progress and the cycle deadline. The work left is the queued and
+    running tasks times the p90 time a worker spends on one, and the pool is
+    sized to get through it in `target` of the time remaining in the cycle.
+    It grows to that size at once, but shrinks by at most `step` workers per
+    evaluation and only once the queue is shorter than the pool, always
+    staying between min_workers and max_workers.
+    """
+
+    def __init__(self, min_workers: int, max_workers: int, interval: float = 5.0,
+                 target: float = 0.5, step: int = 2):
+        if min_workers < 1 or max_workers < min_workers:
+            raise ValueError(f"Invalid worker bounds: {min_workers}..{max_workers}")
+
+        self.logger = logging.getLogger(__name__)
+        self.min_workers = min_workers
+        self.max_workers = max_workers
+        self.interval = interval
+        self.target = target
+        self.step = step
+
+        self.decisions: deque = deque(maxlen=20)
+        self.lock = threading.Lock()
+
+        self.stats = {
+            'evaluations': 0,
+            'scaled_up': 0,
+            'scaled_down': 0
+        }
+
+    def clamp(self, workers: int) -> int:
+        return min(max(workers, self.min_workers), self.max_workers)
+
+    def desired(self, current: int, queued: int, in_progress: int,
+                deadline: Optional[float], service_time: Optional[float]) -> Tuple[int, str]:
+        """Pool size for the current load and the reason for it"""
+        if not queued and not in_progress:
+            return self.clamp(current - self.step), "idle"
+
+        # Until a task has finished, assume checks take their default timeout
+        per_task = service_time if service_time is not None else CHECK_TIMEOUT
+        work = (queued + in_progress) * per_task
+
+        if deadline is None:
+            # No cycle deadline (manual checks between cycles), enough to keep the queue moving
+            needed = queued + in_progress
+            reason = f"{queued} queued, no cycle deadline"
+        else:
+            budget = max(deadline - time.time(), self.interval) * self.target
+            needed = math.ceil(work / budget)
+            reason = f"{work:.0f}s of work left, {budget:.0f}s budget"
+
+        if needed > current:
+            return self.clamp(needed), reason
+
+        # Shrink gently, and not while the queue could still keep the pool busy
+        if queued >= current:
+            return self.clamp(current), reason
+        return self.clamp(max(needed, current - self.step)), reason
+
+    def evaluate(self, current: int, queued: int, in_progress: int,
+                 deadline: Optional[float], service_time: Optional[float]) -> int:
+        """Decide the pool size and record the decision if it changes"""
+        workers, reason = self.desired(current, queued, in_progress, deadline, service_time)
+
+        with self.lock:
+            self.stats['evaluations'] += 1
+            if workers == current:
+                return workers
+
+            self.stats['scaled_up' if workers > current else 'scaled_down'] += 1
+            self.decisions.append({
+                "at": datetime.utcnow().isoformat(),
+                "from": current,
+                "to": workers,
+                "queued": queued,
+                "in_progress": in_progress,
+                "service_time": round(service_time, 2) if service_time is not None else None,
+                "reason": reason
+            })
+
+        self.logger.info(f"Scaling check workers {current} -> {workers} ({reason})")
+        return workers
+
+    def get_stats(self) -> Dict:
+        """Bounds, counters and recent scaling decisions"""
+        with self.lock:
+            return {
+                **self.stats,
+                'min_workers': self.min_workers,
+                'max_workers': self.max_workers,
+                'decisions': list(self.decisions)
+            }
@@ -0,0 +1,128 @@
+import logging
+import threading
+import time
+from typing import Dict, List, Optional
+
+# Result status for a check that never reached its box, scores like a failed check
+UNREACHABLE = -2
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+class HostUnreachable(ConnectionError):
+    """A native transport could not connect or authenticate to a box"""
+
+class HostCircuitBreaker:
+    """
+    Per-host circuit breaker.
+    The first connection-level failure on a box opens its circuit, and the
+    box's remaining checks that cycle fail fast with UNREACHABLE instead of
+    each waiting out its own timeout. start_cycle() moves open hosts to
+    half-open: one check goes through as a probe while the box's other
+    checks wait for it. Any result that reached the box closes the circuit,
+    another connection failure opens it again until the next cycle.
+    """
+
+    def __init__(self):
+        self.logger = logging.getLogger(__name__)
+        self.states: Dict[str, str] = {}  # box IP -> state, missing means closed
+        self.opened_at: Dict[str, float] = {}
+        self.probing: set = set()  # Half-open hosts with a probe in flight
+
+        self.lock = threading.Lock()
+        self.changed = threading.Condition(self.lock)
+
+        self.stats = {
+            'opened': 0,
+            'short_circuited': 0,
+            'probes': 0,
+            'recovered': 0
+        }
+
+    def start_cycle(self) -> None:
+        """Let each open host send one probe check this cycle"""
+        with self.changed:
+            for host, state in self.states.items():
+                if state == OPEN:
+                    self.states[host] = HALF_OPEN
+            self.probing.clear()
+            self.changed.notify_all()
+
+    def closed(self, host: str) -> bool:
+        """Whether a host's circuit is closed, so admit() would let its checks through without waiting"""
+        with self.changed:
+            return host not in self.states
+
+    def admit(self, host: str, timeout: Optional[float] = None) -> bool:
+        """
+        Whether a check for this host should run. While a half-open host's probe
+        is in flight this waits for its outcome, up to timeout seconds.
+        """
+        deadline = time.monotonic() + timeout if timeout is not None else None
+
+        with self.changed:
+            while True:
+                state = self.states.get(host, CLOSED)
+                if state == CLOSED:
+                    return True
+
+                if state == OPEN:
+                    self.stats['short_circuited'] += 1
+                    return False
+
+                if host not in self.probing:
+                    self.probing.add(host)
+                    self.stats['probes'] += 1
+                    return True
+
+                remaining = deadline - time.monotonic() if deadline is not None else None
+                if remaining is not None and remaining <= 0:
+                    # The probe is taking too long to tell us anything, run anyway
+                    return True
+                self.changed.wait(remaining)
+
+    def record(self, host: str, status: int, timed_out: bool = False) -> None:
+        """Update a host's circuit from one of its check results"""
+        with self.changed:
+            state = self.states.get(host, CLOSED)
+
+            if timed_out:
+                # Says nothing either way, let the next check probe instead
+                if host not in self.probing:
+                    return
+            elif status == UNREACHABLE:
+                if state != OPEN:
+                    self.logger.warning(f"Host {host} unreachable, failing its checks fast until next cycle")
+                    self.states[host] = OPEN
+                    self.opened_at[host] = time.time()
+                    self.stats['opened'] += 1
+            elif state != CLOSED:
+                self.logger.info(f"Host {host} reachable again, closing its circuit")
+                del self.states[host]
+                self.opened_at.pop(host, None)
+                self.stats['recovered'] += 1
+            else:
+                return
+
+            self.probing.discard(host)
+            self.changed.notify_all()
+
+    def record_results(self, results: List[Dict]) -> None:
+        """Feed result entries from record_result back into the breaker"""
+        for result in results:
+            self.record(result['task'].box_ip, result['status'], result.get('timed_out', False))
+
+    def get_stats(self) -> Dict:
+        """Open and half-open hosts for the admin status API"""
+        with self.lock:
+            return {
+                **self.stats,
+                'hosts': {
+                    host: {
+                        'state': state,
+                        'opened_at': self.opened_at.get(host)
+                    }
+                    for host, state in self.states.items()
+                }
+            }
@@ -0,0 +1,400 @@
+"""
+Pre-forked ansible-playbook controller.
+
+Every ansible-playbook exec starts a new interpreter and imports all of
+Ansible before it opens a single connection. The fork server is one helper
+process that imports Ansible once, then forks a child per playbook request
+and runs the CLI in it. Requests and results travel as JSON lines over the
+helper's stdin and stdout.
+
+The server half of this file runs in the helper under the Python that has
+Ansible installed, so it only uses the standard library. Ansible reads its
+core settings when it is imported, so every ANSIBLE_* variable has to be
+fixed when the helper starts, only other variables can change per request.
+"""
+import concurrent.futures
+import itertools
+import json
+import logging
+import os
+import selectors
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+# Imported by the helper before it starts forking, the rest of Ansible loads lazily per run
+PRELOAD_MODULES = (
+    'ansible.cli.playbook',
+    'ansible.executor.playbook_executor',
+    'ansible.executor.task_queue_manager',
+    'ansible.executor.process.worker',
+    'ansible.inventory.manager',
+    'ansible.vars.manager',
+    'ansible.playbook',
+    'ansible.plugins.loader',
+    'ansible.plugins.strategy.free',
+    'ansible.plugins.strategy.linear',
+    'ansible.plugins.connection.ssh',
+    'ansible.plugins.connection.local',
+    'ansible.plugins.action.script',
+    'ansible.plugins.action.command',
+    'ansible.template',
+)
+
+# Seconds to wait for a killed run to be reaped before giving up on its result
+KILL_GRACE = 5.0
+
+class ForkServer:
+    """
+    Client for the fork server helper process.
+    Runs are submitted with their ansible-playbook arguments and come back
+    as (rc, stdout, stderr) once the helper reaps the forked child. The helper
+    is started on first use and restarted if it dies.
+    """
+
+    def __init__(self, env: Optional[Dict[str, str]] = None, python: Optional[str] = None):
+        self.logger = logging.getLogger(__name__)
+        self.env = dict(env or {})  # Ansible settings fixed for the helper's lifetime
+        self.python = python or ansible_python()
+
+        self.proc: Optional[subprocess.Popen] = None
+        self.reader: Optional[threading.Thread] = None
+        self.pending: Dict[int, concurrent.futures.Future] = {}
+        self.ids = itertools.count(1)
+        self.lock = threading.Lock()
+
+        self.stats = {
+            'runs': 0,
+            'killed': 0,
+            'restarts': 0,
+            'cpu_seconds': 0.0  # User + system CPU of the forked runs, including Ansible's workers
+        }
+
+    def start(self) -> None:
+        with self.lock:
+            self._start()
+
+    def stop(self) -> None:
+        with self.lock:
+            proc, self.proc = self.proc, None
+        if proc is None:
+            return
+
+        # Closing stdin tells the helper to kill its runs and exit
+        try:
+            proc.stdin.close()
+            proc.wait(timeout=KILL_GRACE)
+        except (OSError, subprocess.TimeoutExpired):
+            proc.kill()
+            proc.wait()
+        if self.reader:
+            self.reader.join(timeout=KILL_GRACE)
+            self.reader = None
+
+    def submit(self, args: List[str], env: Optional[Dict[str, str]] = None,
+               cwd: Optional[str] = None) -> Tuple[int, concurrent.futures.Future]:
+        """Start one ansible-playbook run, returning its id and a future for (rc, stdout, stderr)"""
+
+        env = dict(env or {})
+        mismatched = [k for k, v in env.items() if k.startswith('ANSIBLE_') and self.env.get(k) != v]
+        if mismatched:
+            raise ValueError(f"Fork server was started with different settings for {', '.join(mismatched)}")
+
+        future = concurrent.futures.Future()
+        # Running futures can't be cancelled, a run only ends by being reaped
+        future.set_running_or_notify_cancel()
+        with self.lock:
+            if self.proc is None or self.proc.poll() is not None:
+                self._start()
+            run_id = next(self.ids)
+            self.pending[run_id] = future
+            self.stats['runs'] += 1
+            self._send({'id': run_id, 'args': args, 'env': env, 'cwd': cwd or str(Path.cwd())})
+
+        return run_id, future
+
+    def kill(self, run_id: int) -> None:
+        """Kill a run and every process it started, its future still resolves once it is reaped"""
+        with self.lock:
+            if run_id in self.pending and self.proc is not None:
+                self.stats['killed'] += 1
+                self._send({'kill': run_id})
+
+    def run(self, args: List[str], timeout: float, env: Optional[Dict[str, str]] = None,
+            cwd: Optional[str] = None) -> Tuple[int, str, str]:
+        """Run ansible-playbook to completion, raising subprocess.TimeoutExpired like subprocess.run"""
+
+        run_id, future = self.submit(args, env, cwd)
+        try:
+            return future.result(timeout=timeout)
+        except concurrent.futures.TimeoutError:
+            self.kill(run_id)
+            try:
+                future.result(timeout=KILL_GRACE)
+            except Exception:
+                pass
+            raise subprocess.TimeoutExpired(['ansible-playbook'] + args, timeout)
+
+    def get_stats(self) -> Dict:
+        with self.lock:
+            return {
+                **self.stats,
+                'cpu_seconds': round(self.stats['cpu_seconds'], 2),
+                'active': len(self.pending),
+                'pid': self.proc.pid if self.proc else None
+            }
+
+    def _start(self) -> None:
+        """Start the helper, caller holds the lock"""
+        if self.proc is not None:
+            self.stats['restarts'] += 1
+
+        stderr = tempfile.TemporaryFile()
+        self.proc = subprocess.Popen(
+            [self.python, str(Path(__file__).resolve())],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            # A file rather than the parent's stderr, which Ansible refuses if it is non-blocking
+            stderr=stderr,
+            env={**os.environ, **self.env},
+            text=True,
+            bufsize=1
+        )
+        self.reader = threading.Thread(target=self._read, args=(self.proc, stderr), daemon=True, name="ForkServerReader")
+        self.reader.start()
+        self.logger.info(f"Fork server started with pid {self.proc.pid}")
+
+    def _send(self, message: Dict) -> None:
+        """Write one request line, caller holds the lock"""
+        try:
+            self.proc.stdin.write(json.dumps(message) + '\n')
+            self.proc.stdin.flush()
+        except (OSError, ValueError) as e:
+            # The reader fails every pending run once it sees the helper exit
+            self.logger.error(f"Fork server request failed: {e}")
+
+    def _read(self, proc: subprocess.Popen, stderr_file) -> None:
+        """Resolve futures as the helper reports finished runs"""
+        for line in proc.stdout:
+            try:
+                message = json.loads(line)
+            except ValueError:
+                self.logger.warning(f"Fork server sent malformed line: {line!r}")
+                continue
+
+            with self.lock:
+                future = self.pending.pop(message.get('id'), None)
+                self.stats['cpu_seconds'] += message.get('cpu', 0.0)
+            if future is None:
+                continue
+
+            if 'error' in message:
+                future.set_exception(RuntimeError(f"Fork server: {message['error']}"))
+            else:
+                future.set_result((message['rc'], _read_output(message['stdout']), _read_output(message['stderr'])))
+
+        # Helper exited, nothing in flight will ever be reported
+        proc.wait()
+        stderr_file.seek(0)
+        stderr = stderr_file.read().decode(errors='replace').strip()
+        stderr_file.close()
+
+        with self.lock:
+            if self.proc is proc or self.proc is None:
+                lost, self.pending = self.pending, {}
+            else:
+                lost = {}
+        for future in lost.values():
+            future.set_exception(RuntimeError(f"Fork server exited with code {proc.returncode}"))
+        if lost or proc.returncode:
+            self.logger.error(f"Fork server exited with code {proc.returncode}, {len(lost)} runs lost: {stderr[-2000:]}")
+
+class ForkedProcess:
+    """Popen-like handle on one fork server run, for code that polls its playbook process"""
+
+    def __init__(self, server: ForkServer, args: List[str], env: Optional[Dict[str, str]] = None,
+                 cwd: Optional[str] = None):
+        self.server = server
+        self.run_id, self.future = server.submit(args, env, cwd)
+        self.returncode: Optional[int] = None
+        self.stdout_text = ''
+        self.stderr_text = ''
+
+    def poll(self) -> Optional[int]:
+        if self.returncode is None and self.future.done():
+            self.returncode, self.stdout_text, self.stderr_text = self.future.result()
+        return self.returncode
+
+    def wait(self, timeout: Optional[float] = None) -> int:
+        if self.returncode is None:
+            self.returncode, self.stdout_text, self.stderr_text = self.future.result(timeout=timeout)
+        return self.returncode
+
+    def kill(self) -> None:
+        self.server.kill(self.run_id)
+
+def ansible_python() -> str:
+    """Python interpreter of the ansible-playbook that build_playbook_command runs"""
+    venv_python = Path('/home/kali/rts_venv/bin/python')
+    return str(venv_python) if venv_python.exists() else sys.executable
+
+def _read_output(path: str) -> str:
+    """Read and remove one of a run's output files"""
+    try:
+        with open(path, errors='replace') as f:
+            return f.read()
+    finally:
+        Path(path).unlink(missing_ok=True)
+
+# Helper process
+
+def serve() -> None:
+    """Helper main loop, single threaded so forking never copies another thread's locks"""
+
+    # Keep the response channel away from fd 1, which forked runs write their output to
+    responses = os.fdopen(os.dup(sys.stdout.fileno()), 'w', buffering=1)
+    requests = os.fdopen(os.dup(sys.stdin.fileno()), 'rb', buffering=0)
+    devnull = os.open(os.devnull, os.O_RDWR)
+    os.dup2(devnull, sys.stdin.fileno())
+    os.dup2(devnull, sys.stdout.fileno())
+
+    for module in PRELOAD_MODULES:
+        try:
+            __import__(module)
+        except ImportError as e:
+            # Module layout differs between Ansible versions, runs import what is missing
+            print(f"Fork server could not preload {module}: {e}", file=sys.stderr)
+
+    children: Dict[int, Tuple[int, str, str]] = {}  # pid -> (run id, stdout path, stderr path)
+    pids: Dict[int, int] = {}  # run id -> pid
+    selector = selectors.DefaultSelector()
+    selector.register(requests, selectors.EVENT_READ)
+    buffer = b''
+    closed = False
+
+    while not closed or children:
+        if not closed and selector.select(timeout=0.05):
+            chunk = requests.read(65536)
+            if not chunk:
+                # Client went away, take every run down with it
+                closed = True
+                selector.unregister(requests)
+                for pid in children:
+                    _kill_group(pid)
+            buffer += chunk
+            *lines, buffer = buffer.split(b'\n')
+            for line in lines:
+                _handle_request(line, children, pids, responses, [requests, responses])
+        elif closed:
+            time.sleep(0.05)
+
+        # Reap finished runs
+        while children:
+            try:
+                pid, wait_status, usage = os.wait4(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid == 0:
+                break
+            if pid not in children:
+                continue
+
+            run_id, stdout_path, stderr_path = children.pop(pid)
+            pids.pop(run_id, None)
+            _respond(responses, {
+                'id': run_id,
+                'rc': os.waitstatus_to_exitcode(wait_status),
+                'stdout': stdout_path,
+                'stderr': stderr_path,
+                'cpu': usage.ru_utime + usage.ru_stime
+            })
+
+def _handle_request(line: bytes, children: Dict, pids: Dict, responses, inherited: list) -> None:
+    try:
+        request = json.loads(line)
+    except ValueError:
+        return
+
+    if 'kill' in request:
+        pid = pids.get(request['kill'])
+        if pid is not None:
+            _kill_group(pid)
+        return
+
+    run_id = request.get('id')
+    stdout_fd, stdout_path = tempfile.mkstemp(prefix='rts_fork_', suffix='.out')
+    stderr_fd, stderr_path = tempfile.mkstemp(prefix='rts_fork_', suffix='.err')
+    try:
+        pid = os.fork()
+    except OSError as e:
+        pid = None
+        _respond(responses, {'id': run_id, 'error': str(e)})
+
+    if pid == 0:
+        _run_child(request, stdout_fd, stderr_fd, inherited)
+
+    os.close(stdout_fd)
+    os.close(stderr_fd)
+    if pid is None:
+        os.unlink(stdout_path)
+        os.unlink(stderr_path)
+        return
+
+    # Also set in the child, whichever runs first, so an early kill still finds the group
+    try:
+        os.setpgid(pid, pid)
+    except OSError:
+        pass
+    children[pid] = (run_id, stdout_path, stderr_path)
+    pids[run_id] = pid
+
+def _run_child(request: Dict, stdout_fd: int, stderr_fd: int, inherited: list) -> None:
+    """Body of a forked run, never returns"""
+    exit_code = 1
+    try:
+        # Own process group, so a kill reaches Ansible's worker processes too
+        os.setpgid(0, 0)
+        for f in inherited:
+            f.close()
+        os.dup2(stdout_fd, sys.stdout.fileno())
+        os.dup2(stderr_fd, sys.stderr.fileno())
+        os.close(stdout_fd)
+        os.close(stderr_fd)
+
+        os.chdir(request['cwd'])
+        os.environ.update(request.get('env') or {})
+
+        from ansible.cli.playbook import PlaybookCLI
+        try:
+            PlaybookCLI.cli_executor(['ansible-playbook'] + request['args'])
+        except SystemExit as e:
+            exit_code = e.code if isinstance(e.code, int) else 1
+    except BaseException as e:
+        print(f"Fork server child failed: {e!r}", file=sys.stderr)
+    finally:
+        try:
+            sys.stdout.flush()
+            sys.stderr.flush()
+        finally:
+            os._exit(exit_code)
+
+def _kill_group(pid: int) -> None:
+    try:
+        os.killpg(pid, signal.SIGKILL)
+    except OSError:
+        pass
+
+def _respond(responses, message: Dict) -> None:
+    try:
+        responses.write(json.dumps(message) + '\n')
+    except OSError:
+        # Client is gone, runs are being killed anyway
+        pass
+
+if __name__ == '__main__':
+    serve()
@@ -1,11 +1,12 @@
 from dataclasses import dataclass
-import json
 from pathlib import Path
 from typing import List, Dict, Optional
 import logging
 
 import yaml
 
+from fastapi_backend.ansible.output_parser import parse_script_output
+
 @dataclass
 class IOCDefinition:
     """Represents a single IOC definition"""
@@ -84,6 +85,28 @@ class IOCDefinitionLoader:
         for os, iocs in self.os_ioc_mapping.items():
             self.logger.info(f"  - {os}: {len(iocs)} IOCs")
 
+    def create_synthetic_iocs(self, iocs_per_os: int = 10):
+        """Create placeholder IOCs for load tests, they have no scripts and need the simulated transport"""
+
+        # Same difficulty mix validate_ioc_distribution expects from 10 IOCs
+        difficulties = [1, 1, 1, 1, 2, 2, 2, 3, 3, 3]
+
+        for os in self.os_ioc_mapping:
+            for i in range(iocs_per_os):
+                ioc = IOCDefinition(
+                    name=f"{os}_synthetic_ioc_{i + 1}",
+                    description=f"Synthetic {os} IOC for load testing",
+                    difficulty=difficulties[i % len(difficulties)],
+                    os=os,
+                    check_script=f"check_scripts/{os}/Synthetic_IOC_{i + 1}_Check.sh",
+                    deploy_script=None,
+                    discovery="Not specified"
+                )
+                self.ioc_definitions[ioc.name] = ioc
+                self.os_ioc_mapping[os].append(ioc)
+
+        self.logger.info(f"Created {len(self.ioc_definitions)} synthetic IOC definitions")
+
     def validate_ioc_distribution(self):
         """Ensure proper distribution of IOCs per OS (4 easy, 3 medium, 3 hard)"""
 
@@ -138,39 +161,4 @@ class IOCDefinitionLoader:
     def parse_ioc_check_output(self, stdout: str, ioc: IOCDefinition) -> Dict:
         """Parse the JSON output from an IOC check script"""
 
-        try:
-            # Look for JSON in output (should be last line)
-            lines = stdout.strip().split('\n')
-            json_output = None
-
-            for line in reversed(lines):
-                line = line.strip()
-                if line.startswith('{') and line.endswith('}'):
-                    json_output = json.loads(line)
-                    break
-
-            if not json_output:
-                return {
-                    "status": -1,
-                    "error": "No JSON output found in script response"
-                }
-
-            # Validate expected fields
-            if json_output.get('status') not in [-1, 0, 1]:
-                return {
-                    "status": -1,
-                    "error": f"Invalid status value: {json_output.get('status')}"
-                }
-
-            return json_output
-
-        except json.JSONDecodeError as e:
-            return {
-                "status": -1,
-                "error": f"Failed to parse JSON output: {e}"
-            }
-        except Exception as e:
-            return {
-                "status": -1,
-                "error": f"Unexpected error parsing output: {e}"
-            }
\ No newline at end of file
+        return parse_script_output(stdout)
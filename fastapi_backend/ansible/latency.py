@@ -0,0 +1,81 @@
+import math
+import threading
+from collections import deque
+from typing import Deque, Dict, Tuple
+
+# Seconds allowed for a single IOC check until its latency has been learned
+CHECK_TIMEOUT = 30
+
+class LatencyTracker:
+    """
+    Rolling latency history per (box, IOC), used to size each check's timeout.
+    A check's timeout is its p99 latency times `factor`, clamped between
+    `floor` and `ceiling`, once `min_samples` runs have been seen. Until then
+    it gets CHECK_TIMEOUT. A timed out run is recorded at the timeout it hit,
+    so a slow but healthy check earns a longer timeout on its next run.
+    """
+
+    def __init__(self, window: int = 200, factor: float = 3.0, floor: float = 5.0,
+                 ceiling: float = 120.0, min_samples: int = 5, default: float = CHECK_TIMEOUT):
+        self.window = window
+        self.factor = factor
+        self.floor = floor
+        self.ceiling = ceiling
+        self.min_samples = min_samples
+        self.default = default
+
+        self.samples: Dict[Tuple[str, str], Deque[float]] = {}
+        self.lock = threading.Lock()
+
+    def observe(self, task, status: int, seconds: float, timed_out: bool = False) -> None:
+        """Record how long an IOCTask's check took, ignoring fast failures that say nothing about latency"""
+        if timed_out or status in (0, 1):
+            self.record(task.box_ip, task.ioc_name, seconds)
+
+    def record(self, box_ip: str, ioc_name: str, seconds: float) -> None:
+        with self.lock:
+            history = self.samples.get((box_ip, ioc_name))
+            if history is None:
+                history = self.samples[(box_ip, ioc_name)] = deque(maxlen=self.window)
+            history.append(seconds)
+
+    def timeout_for(self, box_ip: str, ioc_name: str) -> float:
+        """Seconds to allow the next check of this IOC on this box"""
+        with self.lock:
+            history = self.samples.get((box_ip, ioc_name))
+            if not history or len(history) < self.min_samples:
+                return self.default
+            p99 = percentile(history, 99)
+
+        return min(max(p99 * self.factor, self.floor), self.ceiling)
+
+    def get_stats(self) -> Dict:
+        """Learned latencies and timeouts for the admin status API"""
+        with self.lock:
+            histories = {key: list(history) for key, history in self.samples.items()}
+
+        learned = {}
+        for (box_ip, ioc_name), history in sorted(histories.items()):
+            learned[f"{box_ip}/{ioc_name}"] = {
+                "samples": len(history),
+                "p50": round(percentile(history, 50), 2),
+                "p99": round(percentile(history, 99), 2),
+                "timeout": round(self.timeout_for(box_ip, ioc_name), 2)
+            }
+
+        return {
+            "factor": self.factor,
+            "floor": self.floor,
+            "ceiling": self.ceiling,
+            "default": self.default,
+            "learned": learned
+        }
+
+def percentile(samples, pct: float) -> float:
+    """Nearest-rank percentile of a non-empty sample"""
+    ordered = sorted(samples)
+    rank = max(math.ceil(pct / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+# Shared by every executor and agent in this process
+latency_tracker = LatencyTracker()
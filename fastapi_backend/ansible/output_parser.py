@@ -0,0 +1,128 @@
+import json
+import logging
+import re
+from typing import Dict, Optional, Tuple
+
+from fastapi_backend.ansible.circuit_breaker import UNREACHABLE
+
+logger = logging.getLogger(__name__)
+
+_decoder = json.JSONDecoder()
+
+# The JSON callback prints its document as a top-level object starting on its own line
+_DOCUMENT_START = re.compile(r'^\{', re.MULTILINE)
+
+class CallbackOutput:
+    """
+    One ansible-playbook run's stdout, decoded once.
+    With the JSON stdout callback every task's per-host result, including the
+    check script's registered stdout, is read straight out of the document.
+    Output from any other callback falls back to finding the debug task line
+    that displays the registered variable.
+    """
+
+    def __init__(self, stdout: str):
+        self.stdout = stdout or ''
+        self.document = decode_callback_document(self.stdout)
+        self.results = index_host_results(self.document) if self.document is not None else {}
+
+    @property
+    def is_json(self) -> bool:
+        return self.document is not None
+
+    def check_result(self, host: str, ioc_name: str, var_name: str = 'check_result.stdout',
+                     allow_raw_fallback: bool = True) -> Dict:
+        """Parsed output of one IOC's check script on one host"""
+
+        if self.document is None:
+            return parse_debug_output(self.stdout, var_name, allow_raw_fallback)
+
+        host_result = self.results.get((host, f'Execute {ioc_name} check'))
+        if host_result is None:
+            return {"status": -1, "error": "No result reported for host"}
+        if host_result.get('unreachable'):
+            return {"status": UNREACHABLE, "error": f"Host unreachable: {host_result.get('msg', '')}"}
+        if host_result.get('stdout') and isinstance(host_result['stdout'], str):
+            return parse_script_output(host_result['stdout'])
+
+        return {"status": -1, "error": str(host_result.get('msg') or 'No output from check script')}
+
+def decode_callback_document(stdout: str) -> Optional[Dict]:
+    """The JSON callback document in a playbook's stdout, or None if it has none"""
+
+    # Warnings and deprecation notices can come before the document
+    for match in _DOCUMENT_START.finditer(stdout):
+        try:
+            document, _ = _decoder.raw_decode(stdout, match.start())
+        except (ValueError, RecursionError):
+            continue
+        if isinstance(document, dict) and 'plays' in document:
+            return document
+
+    return None
+
+def index_host_results(document: Dict) -> Dict[Tuple[str, str], Dict]:
+    """Index a JSON callback document by (host, task name)"""
+
+    # Anything not shaped like the callback's output is skipped rather than trusted
+    host_results = {}
+    for play in _dicts(document.get('plays')):
+        # The free strategy can report one task several times, once per batch of hosts
+        for task in _dicts(play.get('tasks')):
+            task_info = task.get('task')
+            task_name = task_info.get('name', '') if isinstance(task_info, dict) else ''
+            hosts = task.get('hosts')
+            if not isinstance(hosts, dict):
+                continue
+            for host, host_result in hosts.items():
+                if isinstance(host_result, dict):
+                    host_results[(host, task_name)] = host_result
+
+    return host_results
+
+def _dicts(items) -> list:
+    return [item for item in items if isinstance(item, dict)] if isinstance(items, list) else []
+
+def parse_debug_output(stdout: str, var_name: str, allow_raw_fallback: bool = True) -> Dict:
+    """Find a registered variable in default callback output, where a debug task prints it as a JSON string"""
+
+    # Format is: "check_result.stdout": "{\"status\": 1, ...}\r\n"
+    marker = f'"{var_name}": '
+    for line in stdout.splitlines():
+        start = line.find(marker)
+        if start == -1:
+            continue
+        try:
+            value, _ = _decoder.raw_decode(line, start + len(marker))
+        except (ValueError, RecursionError) as e:
+            logger.warning(f"Failed to parse JSON from line: {e}")
+            continue
+        if isinstance(value, str):
+            return parse_script_output(value)
+
+    # Batched output holds several scripts' JSON, so only the keyed debug line is safe
+    if allow_raw_fallback:
+        return parse_script_output(stdout)
+
+    return {"status": -1, "error": "No JSON output found in script response"}
+
+def parse_script_output(text: str) -> Dict:
+    """Parse the JSON a check script prints as its last JSON line"""
+
+    for line in reversed(text.strip().splitlines()):
+        line = line.strip()
+        if line.startswith('{') and line.endswith('}'):
+            try:
+                output = json.loads(line)
+            except (ValueError, RecursionError) as e:
+                return {"status": -1, "error": f"Failed to parse JSON output: {e}"}
+            break
+    else:
+        return {"status": -1, "error": "No JSON output found in script response"}
+
+    # Validate expected fields
+    if not isinstance(output, dict) or output.get('status') not in (-1, 0, 1):
+        status = output.get('status') if isinstance(output, dict) else None
+        return {"status": -1, "error": f"Invalid status value: {status}"}
+
+    return output
@@ -0,0 +1,201 @@
+import logging
+import math
+import threading
+import time
+from pathlib import Path
+from typing import Dict
+
+from pypsrp.complex_objects import PSInvocationState
+from pypsrp.exceptions import WinRMError
+from pypsrp.powershell import PowerShell, RunspacePool
+from pypsrp.wsman import WSMan
+from requests.exceptions import RequestException
+
+from fastapi_backend.ansible.circuit_breaker import HostUnreachable
+from fastapi_backend.ansible.output_parser import parse_script_output
+from fastapi_backend.ansible.worker import CHECK_TIMEOUT, playbook_timeout
+
+class PSRPConnectionPool:
+    """
+    Native PSRP transport for Windows IOC checks.
+    Keeps one pypsrp RunspacePool open per box for the whole competition and
+    runs each .ps1 check script in it, so WinRM authentication and shell
+    creation happen once per box instead of once per check. A pool that
+    fails is closed and reopened on the next check.
+
+    Checks against the same box share its runspace and run one at a time,
+    different boxes run in parallel on the calling worker threads. A check
+    that hasn't finished within its learned timeout (playbook_timeout, as
+    for the SSH transport), including time spent waiting for the box, is
+    stopped and raises TimeoutError.
+    """
+
+    def __init__(self, boxes: Dict[str, object], persistent: bool = True,
+                 operation_timeout: int = CHECK_TIMEOUT):
+        self.logger = logging.getLogger(__name__)
+        self.boxes = boxes  # box IP -> inventory Box (credentials, port and connection)
+        self.persistent = persistent  # False opens a fresh runspace pool per check
+        self.operation_timeout = operation_timeout  # Longest single WS-Man request, checks poll in steps up to this
+
+        self.pools: Dict[str, RunspacePool] = {}
+        self.box_locks: Dict[str, threading.Lock] = {}
+        self.pools_lock = threading.Lock()
+        self.scripts: Dict[str, tuple] = {}  # script path -> (mtime, text)
+
+        self.stats = {
+            'checks': 0,
+            'opens': 0,
+            'reopens': 0
+        }
+        self.stats_lock = threading.Lock()
+
+    def run_check(self, task, ioc) -> Dict:
+        """Run an IOC's check script on the task's box and return the parsed output"""
+        box = self.boxes.get(task.box_ip)
+        if box is None:
+            return {"status": -1, "error": f"No inventory entry for {task.box_ip}"}
+
+        script = self._load_script(ioc.check_script)
+        timeout = playbook_timeout(task)
+        deadline = time.monotonic() + timeout
+
+        # Another check hung on this box must not hold this one past its deadline
+        lock = self._box_lock(box.ip)
+        if not lock.acquire(timeout=timeout):
+            raise TimeoutError(f"Waited {timeout}s for another check on {box.ip}")
+        try:
+            if not self.persistent:
+                pool = self._open_pool(box)
+                try:
+                    stdout = self._invoke(pool, script, deadline)
+                finally:
+                    self._close_pool(pool)
+            else:
+                stdout = self._run_pooled(box, script, deadline)
+        finally:
+            lock.release()
+
+        with self.stats_lock:
+            self.stats['checks'] += 1
+
+        return parse_script_output(stdout)
+
+    def close(self) -> None:
+        """Close every open runspace pool"""
+        with self.pools_lock:
+            pools = list(self.pools.values())
+            self.pools.clear()
+
+        for pool in pools:
+            self._close_pool(pool)
+
+    def get_stats(self) -> Dict:
+        """Pool statistics"""
+        with self.stats_lock:
+            return {**self.stats, 'open_pools': len(self.pools)}
+
+    def _run_pooled(self, box, script: str, deadline: float) -> str:
+        """Run a script in the box's pool, reopening it once if it died (caller holds the box lock)"""
+        for attempt in (1, 2):
+            pool = self.pools.get(box.ip)
+            if pool is None:
+                pool = self._open_pool(box)
+                with self.pools_lock:
+                    self.pools[box.ip] = pool
+
+            try:
+                return self._invoke(pool, script, deadline)
+
+            except TimeoutError:
+                # TimeoutError is an OSError, but the runspace is fine, only the script hung
+                raise
+
+            except (WinRMError, RequestException, OSError) as e:
+                # Runspace or WinRM shell is gone, drop it and open a new one
+                with self.pools_lock:
+                    self.pools.pop(box.ip, None)
+                self._close_pool(pool)
+                if attempt == 2:
+                    raise
+                self.logger.warning(f"PSRP runspace pool on {box.ip} failed ({e}), reopening")
+                with self.stats_lock:
+                    self.stats['reopens'] += 1
+
+    def _open_pool(self, box) -> RunspacePool:
+        """Authenticate to the box and open a runspace pool, matching its inventory connection settings"""
+        ssl = box.connection == 'psrp'
+        wsman = WSMan(
+            box.ip,
+            port=box.port,
+            username=box.username,
+            password=box.password,
+            ssl=ssl,
+            auth='basic',
+            encryption='auto' if ssl else 'never',
+            cert_validation=False,
+            operation_timeout=self.operation_timeout,
+            read_timeout=self.operation_timeout + 10
+        )
+        pool = RunspacePool(wsman)
+        try:
+            pool.open()
+        except (WinRMError, RequestException, OSError) as e:
+            raise HostUnreachable(f"PSRP connection to {box.ip} failed: {e}") from e
+
+        with self.stats_lock:
+            self.stats['opens'] += 1
+        return pool
+
+    def _invoke(self, pool: RunspacePool, script: str, deadline: float) -> str:
+        """Run a script in a pool and return its output as text, stopping it at the deadline"""
+        ps = PowerShell(pool)
+        ps.add_script(script)
+        ps.begin_invoke()
+
+        # invoke() would poll until the script ends, however long that takes
+        while ps.state == PSInvocationState.RUNNING:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                self._stop(pool, ps)
+                raise TimeoutError("Check script did not finish before its deadline")
+            ps.poll_invoke(timeout=max(min(math.ceil(remaining), self.operation_timeout), 1))
+
+        output = '\n'.join(str(line) for line in ps.output)
+        if not output and ps.had_errors:
+            raise RuntimeError('; '.join(str(err) for err in ps.streams.error) or "Check script failed")
+        return output
+
+    def _stop(self, pool: RunspacePool, ps: PowerShell) -> None:
+        """Stop a hung pipeline, closing the box's pool if even that fails so the next check reopens it"""
+        try:
+            ps.stop()
+        except Exception as e:
+            self.logger.warning(f"Failed to stop timed out check, closing its runspace pool: {e}")
+            with self.pools_lock:
+                for ip, open_pool in list(self.pools.items()):
+                    if open_pool is pool:
+                        del self.pools[ip]
+            self._close_pool(pool)
+
+    def _close_pool(self, pool: RunspacePool) -> None:
+        try:
+            pool.close()
+        except Exception as e:
+            self.logger.debug(f"Error closing runspace pool: {e}")
+
+    def _box_lock(self, ip: str) -> threading.Lock:
+        with self.pools_lock:
+            return self.box_locks.setdefault(ip, threading.Lock())
+
+    def _load_script(self, check_script: str) -> str:
+        """Read a check script, cached until it changes"""
+        path = Path('iocs') / check_script
+        mtime = path.stat().st_mtime
+
+        cached = self.scripts.get(check_script)
+        if cached and cached[0] == mtime:
+            return cached[1]
+
+        text = path.read_text()
+        self.scripts[check_script] = (mtime, text)
+        return text
@@ -0,0 +1,255 @@
+import json
+import logging
+import os
+import queue
+import socketserver
+import subprocess
+import tempfile
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from fastapi_backend.ansible.fork_server import ForkedProcess, ForkServer
+from fastapi_backend.ansible.latency import latency_tracker
+from fastapi_backend.ansible.worker import (
+    build_playbook_command,
+    connect_timeout,
+    playbook_options,
+    playbook_timeout,
+    record_result,
+)
+
+# Callback plugin that streams results here, see ansible/plugins/callback/scoring_queue.py
+CALLBACK_PLUGIN_DIR = Path(__file__).resolve().parents[2] / 'ansible' / 'plugins' / 'callback'
+
+# Seconds to wait after ansible-playbook exits for its last records to be read
+DRAIN_TIMEOUT = 2.0
+
+logger = logging.getLogger(__name__)
+
+class _ResultHandler(socketserver.StreamRequestHandler):
+    """One ansible-playbook process sending newline-delimited JSON records"""
+
+    def handle(self):
+        server: ResultSocketServer = self.server.results
+        try:
+            for line in self.rfile:
+                server.dispatch(line)
+        except (ConnectionResetError, BrokenPipeError):
+            server.logger.warning("Result stream dropped")
+
+class _UnixServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+class ResultSocketServer:
+    """
+    Unix socket the scoring_queue callback plugin writes check results to.
+    Each playbook run registers a run id and gets a queue that receives its
+    records as ansible produces them, so results are saved while the
+    playbook is still running and its stdout is never captured.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.logger = logging.getLogger(__name__)
+        self.path = path or os.path.join(tempfile.gettempdir(), f'rts_results_{os.getpid()}.sock')
+
+        self.runs: Dict[str, queue.Queue] = {}
+        self.lock = threading.Lock()
+        self.server: Optional[_UnixServer] = None
+        self.thread: Optional[threading.Thread] = None
+
+        self.stats = {
+            'records': 0,
+            'runs': 0,
+            'orphaned': 0,  # Records for runs that already finished
+            'malformed': 0
+        }
+
+    def start(self) -> None:
+        # Remove a stale socket left by a previous run
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+        self.server = _UnixServer(self.path, _ResultHandler)
+        self.server.results = self
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True, name="ResultSocket")
+        self.thread.start()
+        self.logger.info(f"Result socket listening on {self.path}")
+
+    def stop(self) -> None:
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+            Path(self.path).unlink(missing_ok=True)
+            self.server = None
+        if self.thread:
+            self.thread.join(timeout=5)
+            self.thread = None
+
+    def open_run(self) -> Tuple[str, queue.Queue]:
+        """Register a playbook run, returning its id and the queue its records arrive on"""
+        run_id = uuid.uuid4().hex
+        records = queue.Queue()
+        with self.lock:
+            self.runs[run_id] = records
+            self.stats['runs'] += 1
+        return run_id, records
+
+    def close_run(self, run_id: str) -> None:
+        with self.lock:
+            self.runs.pop(run_id, None)
+
+    def dispatch(self, line: bytes) -> None:
+        """Route one record to the run it belongs to"""
+        try:
+            record = json.loads(line)
+            run_id = record['run']
+        except (ValueError, KeyError, TypeError):
+            with self.lock:
+                self.stats['malformed'] += 1
+            return
+
+        with self.lock:
+            records = self.runs.get(run_id)
+            self.stats['records' if records is not None else 'orphaned'] += 1
+        if records is not None:
+            records.put(record)
+
+    def get_stats(self) -> Dict:
+        with self.lock:
+            return {**self.stats, 'active_runs': len(self.runs)}
+
+def callback_settings(result_server: ResultSocketServer) -> Dict[str, str]:
+    """Environment that enables the scoring_queue callback, the same for every run"""
+    return {
+        'ANSIBLE_CALLBACK_PLUGINS': str(CALLBACK_PLUGIN_DIR),
+        'ANSIBLE_CALLBACKS_ENABLED': 'scoring_queue',
+        # Nothing reads stdout, so skip building the JSON document
+        'ANSIBLE_STDOUT_CALLBACK': 'minimal',
+        'RTS_RESULT_SOCKET': result_server.path
+    }
+
+def callback_env(result_server: ResultSocketServer, run_id: str) -> Dict[str, str]:
+    """Environment that enables the scoring_queue callback for one run"""
+    return {**callback_settings(result_server), 'RTS_RUN_ID': run_id}
+
+def run_callback_ioc_checks(task, inventory_path, ioc_definitions, db_session,
+                            result_server: ResultSocketServer, retries=None,
+                            fork_server: Optional[ForkServer] = None) -> List[Dict]:
+    """
+    Execute an IOCTask, IOCBoxTask or IOCInventoryTask with ansible-playbook,
+    saving each IOC result as the callback plugin streams it in
+    """
+
+    start_time = time.time()
+    timeout = playbook_timeout(task)
+
+    # Single tasks are treated as a batch of one
+    tasks = getattr(task, 'tasks', None) or [task]
+    pending: Dict[Tuple[str, str], object] = {(t.box_ip, t.ioc_name): t for t in tasks}
+    results = []
+
+    def on_record(record: Dict) -> None:
+        ioc_task = pending.pop((record.get('host'), record.get('ioc')), None)
+        if ioc_task is None:
+            # Unrelated hosts, or a duplicate report
+            return
+
+        status = record.get('status', -1)
+        output_data = {'status': status, 'rc': record.get('rc')}
+        if record.get('error'):
+            output_data['error'] = record['error']
+
+        duration = record.get('duration')
+        if duration is not None:
+            latency_tracker.observe(ioc_task, status, duration)
+
+        results.append(record_result(
+            db_session, ioc_task, status, output_data,
+            execution_time=duration if duration is not None else time.time() - start_time,
+            retries=retries
+        ))
+
+    run_id, records = result_server.open_run()
+    error = None
+    timed_out = False
+
+    try:
+        extra_args, _ = playbook_options(task)
+        cmd = build_playbook_command(task.playbook_path, inventory_path, extra_args, connect_timeout(timeout))
+
+        # stdout is never read, stderr is kept small on disk for the log
+        with tempfile.TemporaryFile() as stderr:
+            if fork_server is not None:
+                proc = ForkedProcess(fork_server, cmd[1:], callback_env(result_server, run_id), str(Path.cwd()))
+            else:
+                proc = subprocess.Popen(
+                    cmd,
+                    stdout=subprocess.DEVNULL,
+                    stderr=stderr,
+                    cwd=str(Path.cwd()),
+                    env={**os.environ, **callback_env(result_server, run_id)}
+                )
+
+            deadline = start_time + timeout
+            done = False
+            while not done:
+                if proc.poll() is not None:
+                    # The plugin's last records may still be in flight
+                    try:
+                        record = records.get(timeout=DRAIN_TIMEOUT)
+                    except queue.Empty:
+                        break
+                else:
+                    if time.time() > deadline:
+                        proc.kill()
+                        proc.wait()
+                        timed_out = True
+                        break
+                    try:
+                        record = records.get(timeout=0.2)
+                    except queue.Empty:
+                        continue
+
+                if record.get('done'):
+                    done = True
+                else:
+                    on_record(record)
+
+            proc.wait()
+            if isinstance(proc, ForkedProcess):
+                stderr_text = proc.stderr_text
+            else:
+                stderr.seek(0)
+                stderr_text = stderr.read().decode(errors='replace')
+
+        if timed_out:
+            error = f"Check timed out after {timeout}s"
+        else:
+            error = f"No result reported (rc {proc.returncode})"
+            if proc.returncode and stderr_text:
+                logger.error(f"Ansible-playbook stderr: {stderr_text}")
+
+    except Exception as e:
+        logger.error(f"Callback run failed for {task.playbook_path}: {e}")
+        error = str(e)
+
+    finally:
+        result_server.close_run(run_id)
+
+    # A single check that ran out of time teaches the tracker it needs longer
+    if timed_out and len(tasks) == 1 and pending:
+        latency_tracker.observe(task, -1, timeout, timed_out=True)
+
+    # Anything that never produced a record failed
+    for ioc_task in pending.values():
+        results.append(record_result(
+            db_session, ioc_task, -1, {'error': error},
+            execution_time=time.time() - start_time,
+            retries=retries,
+            timed_out=timed_out
+        ))
+
+    return results
@@ -0,0 +1,154 @@
+import heapq
+import itertools
+import logging
+import random
+import threading
+import time
+from dataclasses import replace
+from typing import Callable, Dict, List, Optional, Tuple
+
+from fastapi_backend.ansible.worker import playbook_timeout
+
+class RetryScheduler:
+    """
+    Retry stage for failed IOC checks.
+    A failed IOCTask is held for a jittered exponential backoff and then put
+    back on the executor's queue with its attempt bumped, as long as the retry
+    can finish before the current cycle's deadline. Retries still waiting when
+    the cycle ends are passed to on_expire so their failure gets recorded.
+    """
+
+    def __init__(self, enqueue: Callable, on_expire: Callable[[List[Tuple]], None],
+                 max_attempts: int = 3, base_delay: float = 2.0, max_delay: float = 30.0):
+        self.logger = logging.getLogger(__name__)
+        self.enqueue = enqueue  # Puts a task back on the executor's queue
+        self.on_expire = on_expire  # Records [(task, output_data)] that ran out of time
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+        self.pending = []  # Heap of (due, seq, task, output_data)
+        self.seq = itertools.count()
+        self.deadline: Optional[float] = None
+        self.cond = threading.Condition()
+        self.running = False
+        self.thread: Optional[threading.Thread] = None
+
+        self.stats = {
+            'scheduled': 0,
+            'requeued': 0,
+            'exhausted': 0,
+            'past_deadline': 0,
+            'expired': 0
+        }
+
+    def start(self) -> None:
+        """Start the thread that releases due retries"""
+        with self.cond:
+            if self.running:
+                return
+            self.running = True
+
+        self.thread = threading.Thread(target=self._run, daemon=True, name="IOCRetry")
+        self.thread.start()
+
+    def stop(self) -> None:
+        """Stop releasing retries and record anything still waiting as failed"""
+        with self.cond:
+            self.running = False
+            self.cond.notify()
+
+        if self.thread:
+            self.thread.join(timeout=5)
+            self.thread = None
+
+        self.end_cycle()
+
+    def start_cycle(self, deadline: float) -> None:
+        """Begin a new check cycle whose retries must finish by deadline (epoch seconds)"""
+        self.end_cycle()
+        with self.cond:
+            self.deadline = deadline
+            self.cond.notify()
+
+    def end_cycle(self) -> None:
+        """Drop the current cycle's pending retries, recording them as failed"""
+        with self.cond:
+            expired = self.pending
+            self.pending = []
+            self.deadline = None
+
+        self._expire(expired)
+
+    def schedule(self, task, output_data: Dict) -> bool:
+        """
+        Queue a failed task for another attempt.
+        Returns False if it is out of attempts or the retry could not finish
+        before the cycle deadline, in which case the caller records the failure.
+        """
+        if getattr(task, 'tasks', None) is not None or task.attempt >= self.max_attempts:
+            with self.cond:
+                self.stats['exhausted'] += 1
+            return False
+
+        due = time.time() + self.backoff(task.attempt)
+
+        with self.cond:
+            if not self.running or self.deadline is None or due + playbook_timeout(task) > self.deadline:
+                self.stats['past_deadline'] += 1
+                return False
+
+            heapq.heappush(self.pending, (due, next(self.seq), task, output_data))
+            self.stats['scheduled'] += 1
+            self.cond.notify()
+
+        return True
+
+    def backoff(self, attempt: int) -> float:
+        """Seconds to wait before retrying after the given attempt, with jitter"""
+        delay = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    def get_stats(self) -> Dict:
+        """Retry statistics"""
+        with self.cond:
+            return {**self.stats, 'pending': len(self.pending)}
+
+    def _run(self) -> None:
+        while True:
+            ready, expired = [], []
+
+            with self.cond:
+                if not self.running:
+                    return
+
+                now = time.time()
+                if self.deadline is not None and now >= self.deadline:
+                    expired, self.pending = self.pending, []
+                while self.pending and self.pending[0][0] <= now:
+                    ready.append(heapq.heappop(self.pending))
+
+                if not ready and not expired:
+                    wake = min(self.pending[0][0], self.deadline or float('inf')) if self.pending else None
+                    self.cond.wait(wake - now if wake else None)
+                    continue
+
+            for _, _, task, _ in ready:
+                self.enqueue(replace(task, attempt=task.attempt + 1))
+            with self.cond:
+                self.stats['requeued'] += len(ready)
+
+            self._expire(expired)
+
+    def _expire(self, entries: list) -> None:
+        if not entries:
+            return
+
+        with self.cond:
+            self.stats['expired'] += len(entries)
+        self.logger.warning(f"{len(entries)} IOC check retries did not run before the cycle ended")
+
+        try:
+            self.on_expire([(task, output_data) for _, _, task, output_data in entries])
+        except Exception as e:
+            self.logger.error(f"Failed to record expired retries: {e}")
@@ -0,0 +1,130 @@
+import logging
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import ansible_runner
+
+from fastapi_backend.ansible.circuit_breaker import UNREACHABLE
+from fastapi_backend.ansible.latency import latency_tracker
+from fastapi_backend.ansible.output_parser import parse_script_output
+from fastapi_backend.ansible.script_cache import SCRIPT_MISSING_RC
+from fastapi_backend.ansible.worker import (
+    connect_timeout,
+    playbook_timeout,
+    record_result,
+)
+
+# Events that carry a finished task result for one host
+RESULT_EVENTS = ('runner_on_ok', 'runner_on_failed', 'runner_on_unreachable')
+
+logger = logging.getLogger(__name__)
+
+def run_playbook_events(playbook_path: str, inventory_path: str, timeout: int,
+                        on_result: Callable[[str, str, str, Dict, float], None],
+                        forks: Optional[int] = None) -> str:
+    """
+    Run a playbook in-process with ansible_runner, calling on_result(host, task_name,
+    event, res, duration) for every task result as soon as its event arrives.
+    Returns the runner status ('successful', 'failed', 'timeout', ...).
+    """
+
+    def handle_event(event: Dict) -> bool:
+        if event.get('event') in RESULT_EVENTS:
+            data = event.get('event_data', {})
+            on_result(
+                data.get('host', ''),
+                data.get('task', ''),
+                event['event'],
+                data.get('res', {}),
+                data.get('duration') or 0.0
+            )
+        # Results are handled here, so don't keep the event on disk
+        return False
+
+    with tempfile.TemporaryDirectory(prefix='rts_runner_') as private_data_dir:
+        thread, runner = ansible_runner.run_async(
+            private_data_dir=private_data_dir,
+            playbook=str(Path(playbook_path).resolve()),
+            inventory=str(Path(inventory_path).resolve()),
+            cmdline=f'--ssh-common-args="-o ConnectTimeout={connect_timeout(timeout)} -o StrictHostKeyChecking=no"',
+            envvars={'ANSIBLE_HOST_KEY_CHECKING': 'False'},
+            forks=forks,
+            timeout=timeout,
+            event_handler=handle_event,
+            quiet=True
+        )
+        thread.join()
+
+    return runner.status
+
+def run_runner_ioc_checks(task, inventory_path, ioc_definitions, db_session, retries=None) -> List[Dict]:
+    """
+    Execute an IOCTask, IOCBoxTask or IOCInventoryTask through ansible_runner,
+    saving each IOC result as its event arrives
+    """
+
+    start_time = time.time()
+
+    # Single tasks are treated as a batch of one
+    tasks = getattr(task, 'tasks', None) or [task]
+    forks = getattr(task, 'forks', None)
+
+    # Match result events back to the IOC task they belong to
+    pending: Dict[Tuple[str, str], object] = {
+        (t.box_ip, f'Execute {t.ioc_name} check'): t for t in tasks
+    }
+    results = []
+
+    def on_result(host: str, task_name: str, event: str, res: Dict, duration: float) -> None:
+        # A cached check whose script isn't staged yet, its rescue reports the real result
+        if event == 'runner_on_failed' and res.get('rc') == SCRIPT_MISSING_RC:
+            return
+
+        ioc_task = pending.pop((host, task_name), None)
+        if ioc_task is None:
+            # Display/debug tasks and unrelated hosts
+            return
+
+        ioc = ioc_definitions.get(ioc_task.ioc_name)
+        if event == 'runner_on_unreachable':
+            output_data = {"status": UNREACHABLE, "error": f"Host unreachable: {res.get('msg', '')}"}
+        elif ioc and res.get('stdout'):
+            output_data = parse_script_output(res['stdout'])
+        else:
+            output_data = {"status": -1, "error": res.get('msg', 'No output from check script')}
+
+        # Events time each IOC on its own host, even inside a batch
+        latency_tracker.observe(ioc_task, output_data.get('status', -1), duration)
+
+        results.append(record_result(
+            db_session, ioc_task, output_data.get('status', -1), output_data,
+            execution_time=duration,
+            retries=retries
+        ))
+
+    timeout = playbook_timeout(task)
+
+    try:
+        status = run_playbook_events(task.playbook_path, inventory_path, timeout, on_result, forks)
+        error = f"No result reported (runner status: {status})"
+    except Exception as e:
+        logger.error(f"ansible_runner failed for {task.playbook_path}: {e}")
+        status = None
+        error = str(e)
+
+    # A single check that ran out of time teaches the tracker it needs longer
+    if status == 'timeout' and len(tasks) == 1 and pending:
+        latency_tracker.observe(task, -1, timeout, timed_out=True)
+
+    # Anything that never produced an event failed
+    for ioc_task in pending.values():
+        results.append(record_result(
+            db_session, ioc_task, -1, {'error': error},
+            execution_time=time.time() - start_time,
+            retries=retries,
+            timed_out=status == 'timeout'
+        ))
+
+    return results
@@ -0,0 +1,117 @@
+import hashlib
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+# Exit code a cached check uses to say its script has not been staged on the host yet
+SCRIPT_MISSING_RC = 127
+
+class ScriptCache:
+    """
+    Content-addressed copies of check scripts on the target hosts.
+    Instead of the script module uploading a check script on every run, each
+    script is staged once per host under its SHA-256 digest and later checks
+    run it in place. A check whose staged copy is missing exits with
+    SCRIPT_MISSING_RC, and its block's rescue uploads the script and runs it
+    again. Editing a script changes its digest, so the next playbook
+    generation points at a new path and that script alone is uploaded again.
+    """
+
+    REMOTE_DIRS = {
+        'linux': '/var/tmp/rts_checks',
+        'firewall': '/var/tmp/rts_checks',
+        'windows': 'C:\\ProgramData\\rts_checks'
+    }
+
+    def __init__(self, scripts_root: str = 'iocs'):
+        self.scripts_root = Path(scripts_root)
+        self.digests: Dict[str, Tuple[float, str]] = {}  # check_script -> (mtime, digest)
+        self.generated: Dict[str, str] = {}  # check_script -> digest in the current playbooks
+        self.lock = threading.Lock()
+
+    def digest(self, check_script: str) -> str:
+        """SHA-256 of a check script, recomputed only when its mtime changes"""
+        path = self.scripts_root / check_script
+        mtime = path.stat().st_mtime
+
+        with self.lock:
+            cached = self.digests.get(check_script)
+            if cached and cached[0] == mtime:
+                return cached[1]
+
+        digest = hashlib.sha256(path.read_bytes()).hexdigest()
+        with self.lock:
+            self.digests[check_script] = (mtime, digest)
+        return digest
+
+    def changed(self) -> bool:
+        """Whether any script differs from the copy the current playbooks point at"""
+        with self.lock:
+            generated = dict(self.generated)
+
+        for script, digest in generated.items():
+            try:
+                if self.digest(script) != digest:
+                    return True
+            except OSError:
+                # Deleted scripts fall back to the script module on regeneration
+                return True
+        return False
+
+    def check_tasks(self, ioc, os_name: str, register: str, when: Optional[str] = None) -> List[Dict]:
+        """Playbook tasks that run an IOC's check from the host's staged copy, raising OSError if the script is missing"""
+        try:
+            digest = self.digest(ioc.check_script)
+        except OSError:
+            with self.lock:
+                self.generated.pop(ioc.check_script, None)
+            raise
+
+        with self.lock:
+            self.generated[ioc.check_script] = digest
+
+        src = f'../../iocs/{ioc.check_script}'
+        remote_dir = self.REMOTE_DIRS.get(os_name, self.REMOTE_DIRS['linux'])
+
+        if os_name == 'windows':
+            remote_path = f'{remote_dir}\\{digest}.ps1'
+            run = {
+                'win_shell': f"if (-not (Test-Path '{remote_path}')) {{ exit {SCRIPT_MISSING_RC} }}; & '{remote_path}'"
+            }
+            stage = [
+                {'name': 'Create check script cache', 'win_file': {'path': remote_dir, 'state': 'directory'}},
+                {'name': f'Stage {ioc.name} check script', 'win_copy': {'src': src, 'dest': remote_path}}
+            ]
+        else:
+            remote_path = f'{remote_dir}/{digest}{Path(ioc.check_script).suffix}'
+            run = {
+                'shell': f'[ -f {remote_path} ] || exit {SCRIPT_MISSING_RC}; {self._interpreter(ioc.check_script)} {remote_path}'
+            }
+            stage = [
+                {'name': 'Create check script cache', 'file': {'path': remote_dir, 'state': 'directory', 'mode': '0700'}},
+                {'name': f'Stage {ioc.name} check script', 'copy': {'src': src, 'dest': remote_path, 'mode': '0600'}}
+            ]
+
+        # Same name both times, so results are matched the same way as uncached checks
+        execute = {
+            'name': f'Execute {ioc.name} check',
+            **run,
+            'register': register,
+            'failed_when': f'{register}.rc == {SCRIPT_MISSING_RC}',
+            'changed_when': False
+        }
+
+        block = {
+            'name': f'Run {ioc.name} check from cache',
+            'block': [execute],
+            'rescue': stage + [{**execute, 'failed_when': False}]
+        }
+        if when:
+            block['when'] = when
+        return [block]
+
+    def _interpreter(self, check_script: str) -> str:
+        """Interpreter from the script's shebang, so the cache directory needn't allow exec"""
+        with open(self.scripts_root / check_script) as f:
+            first_line = f.readline()
+        return first_line[2:].strip() if first_line.startswith('#!') else '/bin/sh'
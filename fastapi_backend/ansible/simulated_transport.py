@@ -0,0 +1,137 @@
+import asyncio
+import json
+import logging
+import math
+import random
+import threading
+import time
+from typing import Dict, Iterable
+
+from fastapi_backend.ansible.circuit_breaker import HostUnreachable
+from fastapi_backend.ansible.output_parser import parse_script_output
+from fastapi_backend.ansible.worker import playbook_timeout
+
+class SimulatedTransport:
+    """
+    Stand-in check transport for load-testing the check pipeline without
+    blue team VMs.
+    Each check sleeps for a run time drawn from a lognormal distribution
+    around latency_median, then parses the same JSON a check script prints.
+    Every (box, IOC) starts present and flips with flip_rate on each check,
+    modelling blue teams remediating and the red team re-deploying.
+    failure_rate of checks error out like a broken script, runs longer than
+    the check's timeout raise TimeoutError at the timeout, and boxes listed in
+    unreachable (or picked by unreachable_rate) raise HostUnreachable after
+    connect_delay. Draws are seeded, so runs with the same task order repeat.
+    run_check() sleeps the run time in the calling thread, run_check_async()
+    awaits it, as the asyncio executor awaits the SSH pool.
+    """
+
+    def __init__(self, boxes: Dict[str, object], latency_median: float = 0.5, latency_sigma: float = 0.5,
+                 failure_rate: float = 0.01, flip_rate: float = 0.1, unreachable: Iterable[str] = (),
+                 unreachable_rate: float = 0.0, connect_delay: float = 1.0, seed: int = 0):
+        self.logger = logging.getLogger(__name__)
+        self.boxes = boxes  # box IP -> inventory Box
+        self.latency_median = latency_median
+        self.latency_sigma = latency_sigma
+        self.failure_rate = failure_rate
+        self.flip_rate = flip_rate
+        self.connect_delay = connect_delay
+
+        self.random = random.Random(seed)
+        self.unreachable = set(unreachable)
+        picked = round(len(boxes) * unreachable_rate)
+        if picked:
+            self.unreachable.update(self.random.sample(sorted(boxes), picked))
+
+        self.states: Dict[tuple, int] = {}  # (box IP, IOC) -> 1 present, 0 remediated
+        self.lock = threading.Lock()
+
+        self.stats = {
+            'checks': 0,
+            'failures': 0,
+            'timeouts': 0,
+            'unreachable': 0,
+            'flips': 0,
+            'simulated_seconds': 0.0
+        }
+
+    def run_check(self, task, ioc) -> Dict:
+        """Simulate an IOC's check script on the task's box and return its parsed output"""
+        if task.box_ip not in self.boxes:
+            return {"status": -1, "error": f"No inventory entry for {task.box_ip}"}
+
+        run = self._draw(task)
+        time.sleep(run[0])
+        return self._finish(task, ioc, *run)
+
+    async def run_check_async(self, task, ioc) -> Dict:
+        """run_check() without holding a thread while the check runs"""
+        if task.box_ip not in self.boxes:
+            return {"status": -1, "error": f"No inventory entry for {task.box_ip}"}
+
+        run = self._draw(task)
+        await asyncio.sleep(run[0])
+        return self._finish(task, ioc, *run)
+
+    def _draw(self, task) -> tuple:
+        """Pick a check's outcome up front: (seconds it runs, latency or None if its box is unreachable, timeout, failed, status)"""
+        timeout = playbook_timeout(task)
+        if task.box_ip in self.unreachable:
+            return min(self.connect_delay, timeout), None, timeout, False, None
+
+        with self.lock:
+            latency = self.random.lognormvariate(math.log(self.latency_median), self.latency_sigma)
+            failed = self.random.random() < self.failure_rate
+            key = (task.box_ip, task.ioc_name)
+            status = self.states.get(key, 1)
+            if not failed and self.random.random() < self.flip_rate:
+                status = self.states[key] = 1 - status
+                self.stats['flips'] += 1
+
+        return min(latency, timeout), latency, timeout, failed, status
+
+    def _finish(self, task, ioc, seconds: float, latency, timeout: float, failed: bool, status) -> Dict:
+        """Count a simulated check that has run and return its parsed output"""
+        if latency is None:
+            with self.lock:
+                self.stats['unreachable'] += 1
+            raise HostUnreachable(f"{task.box_ip}: simulated connection refused")
+
+        timed_out = latency > timeout
+        with self.lock:
+            self.stats['checks'] += 1
+            self.stats['simulated_seconds'] += seconds
+            if timed_out:
+                self.stats['timeouts'] += 1
+            elif failed:
+                self.stats['failures'] += 1
+
+        if timed_out:
+            raise TimeoutError(f"Simulated check ran {latency:.1f}s")
+
+        # Parsed like the SSH pool parses a real script's stdout
+        if failed:
+            stdout = "simulated check script error: permission denied\n"
+        elif status == 1:
+            stdout = json.dumps({"status": 1, "message": f"IOC detected: {ioc.name} present", "details": task.box_ip}) + "\n"
+        else:
+            stdout = json.dumps({"status": 0, "message": f"IOC removed: {ioc.name} not found", "details": task.box_ip}) + "\n"
+        return parse_script_output(stdout)
+
+    def health_check(self) -> Dict[str, bool]:
+        """Every box but the simulated unreachable ones is healthy"""
+        return {ip: ip not in self.unreachable for ip in self.boxes}
+
+    def close(self) -> None:
+        """Nothing to close, kept for the transport interface"""
+
+    def get_stats(self) -> Dict:
+        """Simulation statistics"""
+        with self.lock:
+            return {
+                **self.stats,
+                'simulated_seconds': round(self.stats['simulated_seconds'], 2),
+                'unreachable_hosts': len(self.unreachable),
+                'remediated': sum(1 for status in self.states.values() if status == 0)
+            }
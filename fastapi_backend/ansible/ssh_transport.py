@@ -0,0 +1,237 @@
+import asyncio
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, Optional
+
+import asyncssh
+
+from fastapi_backend.ansible.circuit_breaker import HostUnreachable
+from fastapi_backend.ansible.output_parser import parse_script_output
+from fastapi_backend.ansible.worker import playbook_timeout
+
+class SSHConnectionPool:
+    """
+    Native SSH transport for Linux and firewall IOC checks.
+    Keeps one long-lived asyncssh connection per box, pipes each check script
+    to the remote shell over that connection and parses its JSON from stdout,
+    bypassing Ansible for the check path. Connections are health-checked in the
+    background and re-established on failure.
+
+    The pool runs its own event loop in a background thread so the thread-based
+    workers can call run_check() synchronously. Given the asyncio executor's
+    loop instead, connections live on that loop and the executor awaits
+    run_check_async() directly, without a thread per check.
+    """
+
+    def __init__(self, boxes: Dict[str, object], persistent: bool = True,
+                 health_interval: int = 60, connect_timeout: int = 10,
+                 loop: Optional[asyncio.AbstractEventLoop] = None):
+        self.logger = logging.getLogger(__name__)
+        self.boxes = boxes  # box IP -> inventory Box (credentials and port)
+        self.persistent = persistent  # False opens a fresh connection per check
+        self.health_interval = health_interval
+        self.connect_timeout = connect_timeout
+
+        self.connections: Dict[str, asyncssh.SSHClientConnection] = {}
+        self.connect_locks: Dict[str, asyncio.Lock] = {}
+        self.scripts: Dict[str, tuple] = {}  # script path -> (mtime, text, interpreter)
+
+        self.stats = {
+            'checks': 0,
+            'connects': 0,
+            'reconnects': 0,
+            'health_checks': 0,
+            'health_failures': 0
+        }
+        self.stats_lock = threading.Lock()
+
+        # asyncssh runs on the caller's loop, or on a dedicated one in a background thread
+        self.thread: Optional[threading.Thread] = None
+        if loop is not None:
+            self.loop = loop
+        else:
+            self.loop = asyncio.new_event_loop()
+            self.thread = threading.Thread(target=self.loop.run_forever, daemon=True, name="SSHPool")
+            self.thread.start()
+        self.health_task = asyncio.run_coroutine_threadsafe(self._health_loop(), self.loop)
+
+    def run_check(self, task, ioc) -> Dict:
+        """Run an IOC's check script on the task's box and return the parsed output, from any thread but the pool's loop"""
+        box = self.boxes.get(task.box_ip)
+        if box is None:
+            return {"status": -1, "error": f"No inventory entry for {task.box_ip}"}
+
+        script, interpreter = self._load_script(ioc.check_script)
+        timeout = playbook_timeout(task)
+        future = asyncio.run_coroutine_threadsafe(
+            self._run_script(box, script, interpreter, timeout), self.loop
+        )
+        # The coroutine enforces its own timeout, this only guards against a stuck loop
+        stdout = future.result(timeout=timeout * 2 + self.connect_timeout)
+
+        return self._parse(stdout)
+
+    async def run_check_async(self, task, ioc) -> Dict:
+        """run_check() for a coroutine on the pool's loop, or any loop when the pool has its own thread"""
+        box = self.boxes.get(task.box_ip)
+        if box is None:
+            return {"status": -1, "error": f"No inventory entry for {task.box_ip}"}
+
+        script, interpreter = self._load_script(ioc.check_script)
+        run = self._run_script(box, script, interpreter, playbook_timeout(task))
+        if self.thread is not None:
+            run = asyncio.wrap_future(asyncio.run_coroutine_threadsafe(run, self.loop))
+        return self._parse(await run)
+
+    def health_check(self) -> Dict[str, bool]:
+        """Probe every pooled connection now, returning host -> healthy"""
+        future = asyncio.run_coroutine_threadsafe(self._check_connections(), self.loop)
+        return future.result(timeout=self.connect_timeout + 10)
+
+    def close(self) -> None:
+        """Close every connection and stop the pool's event loop"""
+        if self.thread is None:
+            # The caller's loop may be the one running this, so don't wait on it
+            self.health_task.cancel()
+            for conn in self.connections.values():
+                conn.close()
+            self.connections.clear()
+            return
+
+        async def _close_all():
+            self.health_task.cancel()
+            for conn in list(self.connections.values()):
+                conn.close()
+            await asyncio.gather(
+                *(conn.wait_closed() for conn in self.connections.values()),
+                return_exceptions=True
+            )
+            self.connections.clear()
+
+        try:
+            asyncio.run_coroutine_threadsafe(_close_all(), self.loop).result(timeout=10)
+        finally:
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self.thread.join(timeout=5)
+
+    def _parse(self, stdout: str) -> Dict:
+        with self.stats_lock:
+            self.stats['checks'] += 1
+        return parse_script_output(stdout)
+
+    def get_stats(self) -> Dict:
+        """Pool statistics"""
+        with self.stats_lock:
+            return {**self.stats, 'open_connections': len(self.connections)}
+
+    async def _run_script(self, box, script: str, interpreter: str, timeout: int) -> str:
+        """Pipe a script to the remote interpreter, reconnecting once if the pooled connection died"""
+        if not self.persistent:
+            # Dedicated connection, closed once this check is done
+            async with await self._connect(box) as conn:
+                return await self._exec(conn, script, interpreter, timeout)
+
+        for attempt in (1, 2):
+            conn = await self._get_connection(box)
+            try:
+                return await self._exec(conn, script, interpreter, timeout)
+
+            except (asyncssh.Error, OSError) as e:
+                # Stale pooled connection, drop it and try a fresh one
+                await self._drop_connection(box.ip)
+                if attempt == 2:
+                    raise
+                self.logger.warning(f"SSH connection to {box.ip} failed ({e}), reconnecting")
+                with self.stats_lock:
+                    self.stats['reconnects'] += 1
+
+    async def _exec(self, conn: asyncssh.SSHClientConnection, script: str,
+                    interpreter: str, timeout: int) -> str:
+        result = await asyncio.wait_for(
+            conn.run(f'{interpreter} -s', input=script, check=False),
+            timeout=timeout
+        )
+        return result.stdout or ''
+
+    async def _get_connection(self, box) -> asyncssh.SSHClientConnection:
+        """Return the pooled connection for a box, connecting if needed"""
+        lock = self.connect_locks.setdefault(box.ip, asyncio.Lock())
+        async with lock:
+            conn = self.connections.get(box.ip)
+            if conn is not None and not conn.is_closed():
+                return conn
+
+            conn = await self._connect(box)
+            self.connections[box.ip] = conn
+            return conn
+
+    async def _connect(self, box) -> asyncssh.SSHClientConnection:
+        try:
+            conn = await asyncssh.connect(
+                box.ip,
+                port=box.port or 22,
+                username=box.username,
+                password=box.password,
+                known_hosts=None,
+                connect_timeout=self.connect_timeout,
+                keepalive_interval=30
+            )
+        except (asyncssh.Error, OSError, asyncio.TimeoutError) as e:
+            raise HostUnreachable(f"SSH connection to {box.ip} failed: {e or type(e).__name__}") from e
+
+        with self.stats_lock:
+            self.stats['connects'] += 1
+        return conn
+
+    async def _drop_connection(self, ip: str) -> None:
+        conn = self.connections.pop(ip, None)
+        if conn is not None:
+            conn.close()
+
+    async def _check_connections(self) -> Dict[str, bool]:
+        """Run a no-op on each pooled connection and drop the ones that fail"""
+        async def probe(ip, conn):
+            try:
+                await asyncio.wait_for(conn.run('true', check=True), timeout=self.connect_timeout)
+                return ip, True
+            except (asyncssh.Error, OSError, asyncio.TimeoutError):
+                await self._drop_connection(ip)
+                return ip, False
+
+        results = dict(await asyncio.gather(
+            *(probe(ip, conn) for ip, conn in list(self.connections.items()))
+        ))
+
+        with self.stats_lock:
+            self.stats['health_checks'] += len(results)
+            self.stats['health_failures'] += sum(1 for healthy in results.values() if not healthy)
+        for ip, healthy in results.items():
+            if not healthy:
+                self.logger.warning(f"SSH health check failed for {ip}, will reconnect on next check")
+
+        return results
+
+    async def _health_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.health_interval)
+            try:
+                await self._check_connections()
+            except Exception as e:
+                self.logger.error(f"SSH health check loop error: {e}")
+
+    def _load_script(self, check_script: str) -> tuple:
+        """Read a check script (cached until it changes) and pick its interpreter from the shebang"""
+        path = Path('iocs') / check_script
+        mtime = path.stat().st_mtime
+
+        cached = self.scripts.get(check_script)
+        if cached and cached[0] == mtime:
+            return cached[1], cached[2]
+
+        text = path.read_text()
+        first_line = text.splitlines()[0] if text else ''
+        interpreter = first_line[2:].strip() if first_line.startswith('#!') else '/bin/sh'
+
+        self.scripts[check_script] = (mtime, text, interpreter)
+        return text, interpreter
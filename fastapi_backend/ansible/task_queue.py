@@ -0,0 +1,281 @@
+import heapq
+import itertools
+import queue
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from fastapi_backend.ansible.latency import percentile
+
+# Extra in-flight checks an interactive task may put on a host that is at its limit
+INTERACTIVE_HOST_RESERVE = 1
+
+class CheckTaskQueue:
+    """
+    Drop-in replacement for queue.Queue that dispatches fairly.
+    Tasks are kept in one lane per box, grouped by team. get() takes from
+    teams in round-robin order, and from each team's boxes in turn, so every
+    team's checks progress together instead of team 1 finishing first. A box
+    is skipped while it already has max_per_host checks in flight, so weak
+    blue team VMs are never flooded.
+
+    Tasks marked interactive (manual and targeted re-checks) go in their own
+    FIFO lane that is always served before the scheduled lanes, and may use
+    one reserved slot on a host that is at its limit, so they reach a worker
+    within seconds even while a full cycle is queued. Within each box's
+    scheduled lane, tasks are ordered by `order`:
+    'fair' keeps queue order, 'difficulty' runs the hardest IOCs first and
+    'stale' runs the IOCs whose last check finished longest ago first.
+
+    Callers hand the task back with task_done(task) to release its host.
+    Consumers that can't block in get(), like the asyncio executor, register
+    a listener that is called whenever a put() or task_done() may have made a
+    task dispatchable, then take it with get_nowait().
+    """
+
+    ORDERS = ('fair', 'difficulty', 'stale')
+
+    def __init__(self, max_per_host: int = 2, order: str = 'fair'):
+        self.max_per_host = max_per_host  # 0 disables the limit
+
+        if order not in self.ORDERS:
+            raise ValueError(f"Unknown queue order: {order}")
+        self.order = order
+
+        # team -> box IP -> heap of (sort key, seq, task), both rotated as tasks are handed out
+        self.lanes: "OrderedDict[object, OrderedDict[Optional[str], List[Tuple]]]" = OrderedDict()
+        self.interactive: deque = deque()  # (queued at, task)
+        self.in_flight: Dict[str, int] = {}
+        self.last_checked: Dict[Tuple[str, str], float] = {}  # (box IP, IOC) -> when its last check finished
+        self.dispatched_at: Dict[int, float] = {}  # id(task) -> when a worker took it
+        self.service_times: deque = deque(maxlen=200)  # Seconds a worker spent on each recent task
+        self.seq = itertools.count()
+        self.queued = 0
+        self.unfinished_tasks = 0
+
+        self.mutex = threading.Lock()
+        self.not_empty = threading.Condition(self.mutex)
+        self.all_tasks_done = threading.Condition(self.mutex)
+        self.listeners: List[Callable[[], None]] = []  # Called outside the mutex, from whichever thread changed the queue
+
+        self.stats = {
+            'dispatched': 0,
+            'host_waits': 0,  # get() calls that found work only on busy hosts
+            'interactive_dispatched': 0,
+            'interactive_wait_max': 0.0  # Longest an interactive task sat in the queue, in seconds
+        }
+
+    def put(self, task, block: bool = True, timeout: Optional[float] = None) -> None:
+        """Add a task to the interactive lane or its team's and box's lane (never blocks, the queue is unbounded)"""
+        with self.mutex:
+            if getattr(task, 'interactive', False):
+                self.interactive.append((time.monotonic(), task))
+            else:
+                team_lanes = self.lanes.setdefault(getattr(task, 'team_num', None), OrderedDict())
+                heapq.heappush(
+                    team_lanes.setdefault(getattr(task, 'box_ip', None), []),
+                    (self._sort_key(task), next(self.seq), task)
+                )
+            self.queued += 1
+            self.unfinished_tasks += 1
+            self.not_empty.notify()
+        self._notify_listeners()
+
+    def put_nowait(self, task) -> None:
+        self.put(task, block=False)
+
+    def get(self, block: bool = True, timeout: Optional[float] = None):
+        """Take the next task whose host has capacity, raising queue.Empty like queue.Queue"""
+        deadline = time.monotonic() + timeout if block and timeout is not None else None
+
+        with self.not_empty:
+            while True:
+                task = self._pop_ready()
+                if task is not None:
+                    return task
+
+                if self.queued:
+                    self.stats['host_waits'] += 1
+                if not block:
+                    raise queue.Empty
+
+                if deadline is None:
+                    self.not_empty.wait()
+                else:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise queue.Empty
+                    self.not_empty.wait(remaining)
+
+    def get_nowait(self):
+        return self.get(block=False)
+
+    def task_done(self, task=None) -> None:
+        """Mark a task finished, releasing its host's in-flight slot when the task is given"""
+        with self.all_tasks_done:
+            if task is not None:
+                finished = time.monotonic()
+                dispatched = self.dispatched_at.pop(id(task), None)
+                if dispatched is not None:
+                    self.service_times.append(finished - dispatched)
+                for ioc_task in getattr(task, 'tasks', None) or [task]:
+                    if getattr(ioc_task, 'ioc_name', None):
+                        self.last_checked[(ioc_task.box_ip, ioc_task.ioc_name)] = finished
+
+                host = getattr(task, 'box_ip', None)
+                if host is not None and self.in_flight.get(host):
+                    self.in_flight[host] -= 1
+                    if not self.in_flight[host]:
+                        del self.in_flight[host]
+                    # A task waiting on this host may be ready now
+                    self.not_empty.notify_all()
+
+            if self.unfinished_tasks <= 0:
+                raise ValueError('task_done() called too many times')
+            self.unfinished_tasks -= 1
+            if self.unfinished_tasks == 0:
+                self.all_tasks_done.notify_all()
+        if task is not None:
+            self._notify_listeners()
+
+    def add_listener(self, listener: Callable[[], None]) -> None:
+        """Call listener whenever a task may have become dispatchable"""
+        with self.mutex:
+            self.listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[], None]) -> None:
+        with self.mutex:
+            if listener in self.listeners:
+                self.listeners.remove(listener)
+
+    def join(self) -> None:
+        """Block until every task put on the queue has been marked done"""
+        with self.all_tasks_done:
+            while self.unfinished_tasks:
+                self.all_tasks_done.wait()
+
+    def discard(self, check_ids: Set[int]) -> int:
+        """Drop queued scheduled tasks for the given check instances, returning how many IOC checks were dropped"""
+        def stale(task) -> bool:
+            return any(ioc_task.check_id in check_ids for ioc_task in getattr(task, 'tasks', None) or [task])
+
+        dropped_tasks = dropped_checks = 0
+        with self.all_tasks_done:
+            for team in list(self.lanes):
+                team_lanes = self.lanes[team]
+                for host in list(team_lanes):
+                    kept = []
+                    for entry in team_lanes[host]:
+                        task = entry[2]
+                        if stale(task):
+                            dropped_tasks += 1
+                            dropped_checks += len(getattr(task, 'tasks', None) or [task])
+                        else:
+                            kept.append(entry)
+
+                    if kept:
+                        heapq.heapify(kept)
+                        team_lanes[host] = kept
+                    else:
+                        del team_lanes[host]
+                if not team_lanes:
+                    del self.lanes[team]
+
+            self.queued -= dropped_tasks
+            self.unfinished_tasks -= dropped_tasks
+            if self.unfinished_tasks == 0:
+                self.all_tasks_done.notify_all()
+
+        return dropped_checks
+
+    def qsize(self) -> int:
+        with self.mutex:
+            return self.queued
+
+    def empty(self) -> bool:
+        return self.qsize() == 0
+
+    def service_time(self, pct: float = 90) -> Optional[float]:
+        """Percentile of recent seconds a worker spent per task, None until a task has finished"""
+        with self.mutex:
+            if not self.service_times:
+                return None
+            return percentile(self.service_times, pct)
+
+    def get_stats(self) -> Dict:
+        """Queue depth per team and hosts currently at their limit"""
+        with self.mutex:
+            return {
+                **self.stats,
+                'interactive_wait_max': round(self.stats['interactive_wait_max'], 2),
+                'queued': self.queued,
+                'interactive_queued': len(self.interactive),
+                'teams_waiting': sum(1 for team_lanes in self.lanes.values() if team_lanes),
+                'hosts_in_flight': len(self.in_flight),
+                'hosts_at_limit': sum(
+                    1 for count in self.in_flight.values()
+                    if self.max_per_host and count >= self.max_per_host
+                )
+            }
+
+    def _notify_listeners(self) -> None:
+        with self.mutex:
+            listeners = list(self.listeners)
+        for listener in listeners:
+            listener()
+
+    def _sort_key(self, task) -> float:
+        """Position of a scheduled task within its box's lane, lowest first"""
+        if self.order == 'difficulty':
+            # Harder IOCs are worth more points, batches carry no difficulty of their own
+            return -getattr(task, 'difficulty', 0)
+        if self.order == 'stale':
+            # Never checked sorts before anything that has been
+            return self.last_checked.get((getattr(task, 'box_ip', None), getattr(task, 'ioc_name', None)), float('-inf'))
+        return 0
+
+    def _has_capacity(self, host: Optional[str], reserve: int = 0) -> bool:
+        return host is None or not self.max_per_host or self.in_flight.get(host, 0) < self.max_per_host + reserve
+
+    def _dispatch(self, host: Optional[str], task):
+        """Account for a task leaving the queue (caller holds mutex)"""
+        if host is not None:
+            self.in_flight[host] = self.in_flight.get(host, 0) + 1
+        self.dispatched_at[id(task)] = time.monotonic()
+        self.queued -= 1
+        self.stats['dispatched'] += 1
+        return task
+
+    def _pop_ready(self):
+        """Interactive lane first, then round-robin over teams and each team's boxes, skipping busy hosts (caller holds mutex)"""
+        for i, (queued_at, task) in enumerate(self.interactive):
+            host = getattr(task, 'box_ip', None)
+            if self._has_capacity(host, INTERACTIVE_HOST_RESERVE):
+                del self.interactive[i]
+                self.stats['interactive_dispatched'] += 1
+                self.stats['interactive_wait_max'] = max(self.stats['interactive_wait_max'], time.monotonic() - queued_at)
+                return self._dispatch(host, task)
+
+        for team in list(self.lanes):
+            team_lanes = self.lanes[team]
+
+            for host in list(team_lanes):
+                if not self._has_capacity(host):
+                    continue
+
+                lane = team_lanes[host]
+                _, _, task = heapq.heappop(lane)
+                if lane:
+                    team_lanes.move_to_end(host)
+                else:
+                    del team_lanes[host]
+
+                if team_lanes:
+                    self.lanes.move_to_end(team)
+                else:
+                    del self.lanes[team]
+
+                return self._dispatch(host, task)
+
+        return None
@@ -1,17 +1,23 @@
-import queue
+import itertools
 import threading
-import ansible_runner
 import time
 import logging
-from dataclasses import dataclass
+from dataclasses import dataclass, field, asdict
 from typing import Dict, List, Optional
 from pathlib import Path
 import yaml
 import json
 from sqlmodel import Session
 
-from fastapi_backend.ansible.worker import worker
+from fastapi_backend.ansible.autoscaler import WorkerAutoscaler
+from fastapi_backend.ansible.circuit_breaker import HostCircuitBreaker
+from fastapi_backend.ansible.fork_server import ForkServer
+from fastapi_backend.ansible.result_socket import ResultSocketServer, callback_settings
+from fastapi_backend.ansible.retry import RetryScheduler
+from fastapi_backend.ansible.task_queue import CheckTaskQueue
+from fastapi_backend.ansible.worker import PLAYBOOK_ENV, save_check_result, worker
 from fastapi_backend.database.db_writer import engine
+from fastapi_backend.database.result_writer import result_writer
 
 @dataclass
 class IOCTask:
@@ -25,19 +31,111 @@ class IOCTask:
     playbook_path: str
     difficulty: int = 2  # Default to medium difficulty
     attempt: int = 1
+    interactive: bool = False  # Manual or targeted check, dispatched ahead of scheduled ones
+
+@dataclass
+class IOCBoxTask:
+    """All IOC checks for one box, run as a single batched playbook"""
+    team_num: int
+    box_ip: str
+    box_os: str
+    check_id: int
+    playbook_path: str
+    tasks: List[IOCTask] = field(default_factory=list)
+    interactive: bool = False
+
+@dataclass
+class IOCInventoryTask:
+    """Every IOC check for every host, run as one free-strategy playbook"""
+    check_id: int
+    playbook_path: str
+    forks: int = 50
+    tasks: List[IOCTask] = field(default_factory=list)
+    interactive: bool = False
+
+@dataclass
+class IOCDeployTask:
+    """Every IOC deploy for one box, run in order, each followed by its check to verify it"""
+    team_num: int
+    box_ip: str
+    box_os: str
+    deployment_id: int
+    playbooks: Dict[str, str] = field(default_factory=dict)  # IOC name -> deploy-and-verify playbook, in deploy order
+    timeout: int = 120  # Seconds allowed per IOC
+    check_id: int = 0  # Not part of a check cycle
+    interactive: bool = False
+
+def task_to_dict(task) -> Dict:
+    """Serialize a queued task so it can be sent to a remote agent"""
+    data = asdict(task)
+    data['type'] = type(task).__name__
+    return data
+
+def task_from_dict(data: Dict):
+    """Rebuild a queued task from task_to_dict output"""
+    data = dict(data)
+    task_type = data.pop('type')
+
+    if task_type == 'IOCTask':
+        return IOCTask(**data)
+
+    data['tasks'] = [IOCTask(**t) for t in data.get('tasks', [])]
+    if task_type == 'IOCBoxTask':
+        return IOCBoxTask(**data)
+    if task_type == 'IOCInventoryTask':
+        return IOCInventoryTask(**data)
+
+    raise ValueError(f"Unknown task type: {task_type}")
 
 class IOCCheckExecutor:
-    def __init__(self, db_session, num_workers: int = 32):
+    # 'task' runs one playbook per IOC, 'box' runs one playbook per box,
+    # 'inventory' runs a single playbook against every host using Ansible's forks
+    CHECK_MODES = ('task', 'box', 'inventory')
+    # 'subprocess' shells out to ansible-playbook, 'ansible_runner' streams events in-process,
+    # 'callback' shells out with the scoring_queue plugin streaming results to a Unix socket
+    RUNNERS = ('subprocess', 'ansible_runner', 'callback')
+
+    def __init__(self, db_session, num_workers: int = 32, check_mode: str = 'task',
+                 forks: int = 50, runner: str = 'subprocess', max_per_host: int = 2,
+                 fork_server: bool = False, queue_order: str = 'fair',
+                 min_workers: Optional[int] = None, max_workers: Optional[int] = None):
         self.logger = logging.getLogger(__name__)
         self.db = db_session
+
+        # With bounds the pool is resized at runtime, starting from num_workers
+        self.autoscaler = None
+        if min_workers is not None and max_workers is not None:
+            self.autoscaler = WorkerAutoscaler(min_workers, max_workers)
+            num_workers = self.autoscaler.clamp(num_workers)
         self.num_workers = num_workers
+
+        if check_mode not in self.CHECK_MODES:
+            raise ValueError(f"Unknown check mode: {check_mode}")
+        self.check_mode = check_mode
+        self.forks = forks
+
+        if runner not in self.RUNNERS:
+            raise ValueError(f"Unknown runner: {runner}")
+        self.runner = runner
         
         # Queues
-        self.task_queue = queue.Queue()
-        self.retry_queue = []  # Store failed tasks for retry after initial run
+        self.task_queue = CheckTaskQueue(max_per_host, queue_order)  # Interactive lane, team round-robin, per-host in-flight limit
+        self.retries = RetryScheduler(self.task_queue.put, self._save_expired_retries)
+        self.breaker = HostCircuitBreaker()  # Fails checks fast on hosts that stopped answering
+        self.result_server = ResultSocketServer() if runner == 'callback' else None
+
+        # Forks ansible-playbook runs from one process that has already imported Ansible
+        self.fork_server = None
+        if fork_server:
+            if runner == 'ansible_runner':
+                raise ValueError("The fork server runs ansible-playbook, ansible_runner runs in-process")
+            self.fork_server = ForkServer(callback_settings(self.result_server) if self.result_server else PLAYBOOK_ENV)
         
         # Threading
         self.workers = []
+        self.worker_stops: Dict[threading.Thread, threading.Event] = {}  # Retires one worker when the pool shrinks
+        self.worker_ids = itertools.count(1)
+        self.autoscale_thread: Optional[threading.Thread] = None
         self.shutdown = threading.Event()
         
         # Statistics
@@ -48,13 +146,17 @@ class IOCCheckExecutor:
             'timeouts': 0,
             'in_progress': 0,
             'queue_size': 0,
-            'retries': 0
+            'retries': 0,
+            'unreachable': 0
         }
         self.stats_lock = threading.Lock()
         
         # Pre-generated components
         self.inventory_path = None
         self.playbook_cache = {}  # Cache of pre-generated playbooks
+        self.box_playbook_cache = {}  # Cache of batched per-box playbooks
+        self.inventory_playbook_path = None  # Whole-inventory playbook
+        self.transports = {}  # OS -> native transport used instead of ansible-playbook
         
         # IOC definitions
         self.ioc_definitions = {}  # All loaded IOC definitions
@@ -69,39 +171,99 @@ class IOCCheckExecutor:
             3: 20   # Hard
         }
 
+    @property
+    def started(self) -> bool:
+        return bool(self.workers)
+
     def start_workers(self):
         """Start worker threads"""
+        if self.started:
+            return
+        self.shutdown.clear()
         self.logger.info(f"Starting {self.num_workers} worker threads...")
 
-        for i in range(self.num_workers):
-            # Pass engine instead of session - each worker will create its own session
-            # This avoids SQLite threading issues
-            t = threading.Thread(
-                target=worker,
-                args=(
-                    self.task_queue,
-                    self.retry_queue,
-                    self.shutdown,
-                    self.stats,
-                    self.stats_lock,
-                    self.inventory_path,
-                    self.ioc_definitions,
-                    engine  # Pass engine, not session
-                ),
-                daemon=True,
-                name=f"IOCWorker-{i+1}"
-            )
-            t.start()
-            self.workers.append(t)
+        if self.result_server:
+            self.result_server.start()
+        if self.fork_server:
+            # Import Ansible now rather than on the first check
+            self.fork_server.start()
+        # Workers hand their results to one batching writer thread
+        result_writer.start(engine)
 
+        for _ in range(self.num_workers):
+            self._start_worker()
+
+        self.retries.start()
+        if self.autoscaler:
+            self.autoscale_thread = threading.Thread(target=self._autoscale, daemon=True, name="IOCAutoscaler")
+            self.autoscale_thread.start()
         self.logger.info(f"Started {len(self.workers)} worker threads")
 
+    def resize(self, num_workers: int) -> None:
+        """Grow or shrink the pool, retired workers exit after their current task"""
+        while len(self.workers) < num_workers:
+            self._start_worker()
+        while len(self.workers) > num_workers:
+            self.worker_stops.pop(self.workers.pop()).set()
+        self.num_workers = num_workers
+
+    def _start_worker(self) -> None:
+        stop = threading.Event()
+        # Pass engine instead of session - each worker will create its own session
+        # This avoids SQLite threading issues
+        t = threading.Thread(
+            target=worker,
+            args=(
+                self.task_queue,
+                self.retries,
+                self.shutdown,
+                self.stats,
+                self.stats_lock,
+                self.inventory_path,
+                self.ioc_definitions,
+                engine,  # Pass engine, not session
+                self.runner,
+                self.transports,
+                self.breaker,
+                self.result_server,
+                self.fork_server,
+                stop
+            ),
+            daemon=True,
+            name=f"IOCWorker-{next(self.worker_ids)}"
+        )
+        t.start()
+        self.workers.append(t)
+        self.worker_stops[t] = stop
+
+    def _autoscale(self) -> None:
+        """Resize the pool from queue depth, time left in the cycle and task latency"""
+        while not self.shutdown.wait(self.autoscaler.interval):
+            try:
+                with self.stats_lock:
+                    in_progress = self.stats['in_progress']
+                self.resize(self.autoscaler.evaluate(
+                    len(self.workers),
+                    self.task_queue.qsize(),
+                    in_progress,
+                    self.retries.deadline,
+                    self.task_queue.service_time()
+                ))
+            except Exception as e:
+                self.logger.error(f"Autoscaler error: {e}")
+
     def stop_workers(self, timeout: int = 30):
         """Stop all worker threads gracefully"""
         self.logger.info("Stopping worker threads...")
 
+        # Stop retrying first so nothing new lands on the queue
+        self.retries.stop()
+
         # Signal all workers to stop
         self.shutdown.set()
+        if self.autoscale_thread:
+            self.autoscale_thread.join(timeout=timeout)
+            self.autoscale_thread = None
 
         # Wait for all workers to finish
         for worker_thread in self.workers:
@@ -111,9 +273,38 @@ class IOCCheckExecutor:
 
         # Clear the worker list
         self.workers.clear()
+        self.worker_stops.clear()
+
+        # Commit whatever the workers handed over before they stopped
+        result_writer.stop()
+
+        if self.result_server:
+            self.result_server.stop()
+        if self.fork_server:
+            self.fork_server.stop()
         self.logger.info("All worker threads stopped")
 
     def get_stats(self) -> Dict:
         """Get current statistics"""
         with self.stats_lock:
-            return self.stats.copy()
\ No newline at end of file
+            stats = self.stats.copy()
+        stats['workers'] = len(self.workers)
+        if self.autoscaler:
+            stats['autoscaler'] = self.autoscaler.get_stats()
+        stats['retry'] = self.retries.get_stats()
+        stats['circuits'] = self.breaker.get_stats()
+        stats['result_writer'] = result_writer.get_stats()
+        if self.result_server:
+            stats['result_socket'] = self.result_server.get_stats()
+        if self.fork_server:
+            stats['fork_server'] = self.fork_server.get_stats()
+        return stats
+
+    def _save_expired_retries(self, expired: List[tuple]) -> None:
+        """Record retries that ran out of cycle time with their last failure"""
+        with Session(engine) as db_session:
+            for task, output_data in expired:
+                save_check_result(db_session, task=task, status=-1, output_data=output_data, execution_time=0.0)
+
+        with self.stats_lock:
+            self.stats['failed'] += len(expired)
\ No newline at end of file
@@ -0,0 +1,281 @@
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from sqlmodel import Session, select
+
+from fastapi_backend.database.models import BlueTeams, CheckInstance, IOCCheckResult
+
+# Points for a remediated IOC, matches the ioc_check_result_with_points view
+DIFFICULTY_POINTS = {1: 10, 2: 15, 3: 20}
+
+class CheckCycle:
+    """
+    One round of checks across every team.
+    Counts final results as they are saved against the number of tasks that
+    were queued and sets `completed` once every one has reported. finalize()
+    then writes each team's CheckInstance.score and only afterwards points
+    BlueTeams.last_check_id at this cycle.
+    """
+
+    def __init__(self, cycle_num: int, check_ids: Dict[int, int]):
+        self.cycle_num = cycle_num
+        self.check_ids = check_ids  # team_num -> CheckInstance.check_id
+        self.teams = {check_id: team_num for team_num, check_id in check_ids.items()}
+
+        self.expected: Optional[int] = None  # Set once every task is queued
+        self.expected_by_team: Dict[int, int] = {}
+        self.completed_by_team: Dict[int, int] = {team_num: 0 for team_num in check_ids}
+        self.completed_count = 0
+        self.cancelled = 0  # Queued checks dropped when the next cycle started
+
+        self.started_at = time.time()
+        self.queued_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.finalized = False
+        self.scores: Dict[int, int] = {}
+
+        self.lock = threading.Lock()
+        self.completed = threading.Event()
+
+    def expect(self, expected_by_team: Dict[int, int]) -> None:
+        """Record how many tasks were queued per team, results may already be arriving"""
+        with self.lock:
+            self.expected_by_team = dict(expected_by_team)
+            self.expected = sum(expected_by_team.values()) - self.cancelled
+            self.queued_at = time.time()
+            self._check_complete()
+
+    def record(self, check_id: int) -> None:
+        """Count one final (non-retried) result for a team in this cycle"""
+        with self.lock:
+            team_num = self.teams.get(check_id)
+            if team_num is None:
+                return
+            self.completed_by_team[team_num] += 1
+            self.completed_count += 1
+            self._check_complete()
+
+    def cancel(self, dropped: int) -> None:
+        """Stop waiting on checks dropped from the queue, their IOCs score nothing this cycle"""
+        with self.lock:
+            self.cancelled += dropped
+            if self.expected is not None:
+                self.expected -= dropped
+            self._check_complete()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until every expected result is in, returns False on timeout"""
+        return self.completed.wait(timeout)
+
+    @property
+    def duration(self) -> Optional[float]:
+        """Seconds from cycle start until the last result arrived"""
+        if self.finished_at is None:
+            return None
+        return self.finished_at - self.started_at
+
+    def finalize(self, db_engine) -> Dict[int, int]:
+        """Write team scores and advance last_check_id in one transaction"""
+        with Session(db_engine) as session:
+            scores = score_check_instances(session, list(self.teams))
+
+            for check_id, score in scores.items():
+                check = session.get(CheckInstance, check_id)
+                if check:
+                    check.score = score
+                    session.add(check)
+
+                team = session.get(BlueTeams, self.teams[check_id])
+                if team:
+                    team.total_score += score
+                    team.last_check_id = check_id
+                    session.add(team)
+
+            session.commit()
+
+        with self.lock:
+            if self.finished_at is None:
+                self.finished_at = time.time()
+            self.finalized = True
+            self.scores = {self.teams[check_id]: score for check_id, score in scores.items()}
+        return self.scores
+
+    def summary(self) -> Dict:
+        """Progress and timing for the admin status API"""
+        with self.lock:
+            return {
+                "cycle": self.cycle_num,
+                "started_at": datetime.utcfromtimestamp(self.started_at).isoformat(),
+                "expected": self.expected,
+                "completed": self.completed_count,
+                "cancelled": self.cancelled,
+                "by_team": {
+                    team_num: {
+                        "expected": self.expected_by_team.get(team_num),
+                        "completed": self.completed_by_team[team_num]
+                    }
+                    for team_num in self.check_ids
+                },
+                "queue_seconds": self.queued_at - self.started_at if self.queued_at else None,
+                "duration_seconds": self.duration,
+                "finalized": self.finalized,
+                "scores": dict(self.scores)
+            }
+
+    def _check_complete(self) -> None:
+        if self.expected is not None and self.completed_count >= self.expected and not self.completed.is_set():
+            self.finished_at = time.time()
+            self.completed.set()
+
+class Recheck:
+    """
+    A targeted re-check of some teams' checks, optionally narrowed to one box
+    and/or IOC. Collects the fresh results as they are saved and sets `done`
+    once every queued check has reported.
+    """
+
+    def __init__(self, check_ids: Dict[int, int], box_ip: Optional[str] = None, ioc_name: Optional[str] = None):
+        self.check_ids = check_ids  # team_num -> CheckInstance.check_id the results are written into
+        self.teams = {check_id: team_num for team_num, check_id in check_ids.items()}
+        self.box_ip = box_ip
+        self.ioc_name = ioc_name
+
+        self.expected: Optional[int] = None
+        self.results: Dict[Tuple[int, str, str], Dict] = {}  # (team, box IP, IOC) -> result
+
+        self.lock = threading.Lock()
+        self.done = threading.Event()
+
+    def matches(self, task) -> bool:
+        return (
+            task.check_id in self.teams
+            and (not self.box_ip or task.box_ip == self.box_ip)
+            and (not self.ioc_name or task.ioc_name == self.ioc_name)
+        )
+
+    def expect(self, expected: int) -> None:
+        with self.lock:
+            self.expected = expected
+            self._check_done()
+
+    def record(self, task, status: int, error: Optional[str]) -> None:
+        with self.lock:
+            team_num = self.teams[task.check_id]
+            self.results[(team_num, task.box_ip, task.ioc_name)] = {
+                "team_num": team_num,
+                "box_ip": task.box_ip,
+                "ioc_name": task.ioc_name,
+                "status": status,
+                "error": error
+            }
+            self._check_done()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self.done.wait(timeout)
+
+    def summary(self) -> Dict:
+        with self.lock:
+            return {
+                "check_ids": dict(self.check_ids),
+                "expected": self.expected,
+                "completed": len(self.results),
+                "results": sorted(self.results.values(), key=lambda r: (r["team_num"], r["box_ip"], r["ioc_name"]))
+            }
+
+    def _check_done(self) -> None:
+        if self.expected is not None and len(self.results) >= self.expected:
+            self.done.set()
+
+class CycleTracker:
+    """Routes saved results to the cycle that owns their check_id, and re-checked results to their Recheck"""
+
+    def __init__(self):
+        self.logger = logging.getLogger(__name__)
+        self.by_check_id: Dict[int, CheckCycle] = {}
+        self.rechecks: List[Recheck] = []
+        self.rechecked: Dict[int, set] = {}  # check_id -> {(box IP, IOC)} re-checked while its cycle runs
+        self.lock = threading.Lock()
+
+    def register(self, cycle: CheckCycle) -> None:
+        with self.lock:
+            for check_id in cycle.teams:
+                self.by_check_id[check_id] = cycle
+
+    def unregister(self, cycle: CheckCycle) -> None:
+        with self.lock:
+            for check_id in cycle.teams:
+                self.by_check_id.pop(check_id, None)
+                self.rechecked.pop(check_id, None)
+
+    def add_recheck(self, recheck: Recheck) -> None:
+        with self.lock:
+            self.rechecks.append(recheck)
+
+    def remove_recheck(self, recheck: Recheck) -> None:
+        with self.lock:
+            if recheck in self.rechecks:
+                self.rechecks.remove(recheck)
+
+    def record_recheck(self, task, status: int, error: Optional[str]) -> bool:
+        """
+        Route a re-checked result to the rechecks waiting on it. Returns True if
+        its check instance was already scored and needs rescoring.
+        """
+        with self.lock:
+            cycle = self.by_check_id.get(task.check_id)
+            if cycle:
+                # The cycle's own check of this IOC may still be queued, it replaces this one when it lands
+                self.rechecked.setdefault(task.check_id, set()).add((task.box_ip, task.ioc_name))
+            waiting = [recheck for recheck in self.rechecks if recheck.matches(task)]
+
+        for recheck in waiting:
+            recheck.record(task, status, error)
+        return cycle is None or cycle.finalized
+
+    def was_rechecked(self, check_id: int, box_ip: str, ioc_name: str) -> bool:
+        """Whether a running cycle's result for this IOC was already written by a re-check"""
+        with self.lock:
+            return (box_ip, ioc_name) in self.rechecked.get(check_id, ())
+
+    def record(self, check_id: int) -> None:
+        with self.lock:
+            cycle = self.by_check_id.get(check_id)
+        if cycle:
+            cycle.record(check_id)
+
+    def active(self) -> List[CheckCycle]:
+        with self.lock:
+            return list({id(cycle): cycle for cycle in self.by_check_id.values()}.values())
+
+def score_check_instances(session: Session, check_ids: List[int]) -> Dict[int, int]:
+    """Points scored in each check instance, from its remediated IOCs"""
+    results = session.exec(
+        select(IOCCheckResult).where(IOCCheckResult.check_instance_id.in_(check_ids))
+    ).all()
+
+    scores = {check_id: 0 for check_id in check_ids}
+    for result in results:
+        if result.status == 0:
+            scores[result.check_instance_id] += DIFFICULTY_POINTS.get(result.difficulty, 0)
+    return scores
+
+def rescore_check_instance(session: Session, check_id: int) -> None:
+    """Bring a finalized check instance's score, and its team's total, up to date after a re-check"""
+    check = session.get(CheckInstance, check_id)
+    if check is None:
+        return
+
+    score = score_check_instances(session, [check_id])[check_id]
+    team = session.get(BlueTeams, check.blue_team_num)
+    if team:
+        team.total_score += score - check.score
+        session.add(team)
+    check.score = score
+    session.add(check)
+    session.commit()
+
+# Shared by every executor, save_check_result reports here
+cycle_tracker = CycleTracker()
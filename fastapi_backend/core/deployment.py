@@ -0,0 +1,142 @@
+import itertools
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+# Steps an IOC goes through on its box, the last three are final
+DEPLOY_STATES = ('queued', 'deploying', 'deployed', 'unverified', 'failed')
+FINAL_STATES = ('deployed', 'unverified', 'failed')
+
+class Deployment:
+    """
+    One run of every IOC's deploy script across the inventory.
+    Tracks each (box, IOC) from queued through deploying to deployed (its
+    check saw the IOC), unverified (the script ran but the check didn't find
+    it) or failed. Every change bumps `version` and is kept as an event, so
+    the admin UI can stream changes instead of re-reading the whole range.
+    """
+
+    def __init__(self, deployment_id: int, items: List[Tuple[int, str, str]]):
+        self.deployment_id = deployment_id
+        self.items: Dict[Tuple[str, str], Dict] = {
+            (box_ip, ioc_name): {
+                "team_num": team_num,
+                "box_ip": box_ip,
+                "ioc_name": ioc_name,
+                "state": "queued",
+                "detail": None,
+                "seconds": None
+            }
+            for team_num, box_ip, ioc_name in items
+        }
+
+        self.version = 0
+        self.events: deque = deque(maxlen=1000)  # (version, item) for streaming clients
+        self.started_at = time.time()
+        self.finished_at: Optional[float] = None
+
+        self.lock = threading.Lock()
+        self.finished = threading.Event()
+        self._check_finished()
+
+    def update(self, box_ip: str, ioc_name: str, state: str, detail: Optional[str] = None,
+               seconds: Optional[float] = None) -> None:
+        """Move one IOC on one box to a new state"""
+        with self.lock:
+            item = self.items.get((box_ip, ioc_name))
+            if item is None:
+                return
+            item.update(state=state, detail=detail, seconds=round(seconds, 2) if seconds is not None else None)
+            self.version += 1
+            self.events.append((self.version, dict(item)))
+            self._check_finished()
+
+    def events_since(self, version: int) -> Tuple[int, Optional[List[Dict]]]:
+        """The current version and the items changed after `version`, None if some of those changes were already dropped"""
+        with self.lock:
+            if version < self.version and (not self.events or self.events[0][0] > version + 1):
+                return self.version, None
+            return self.version, [item for event_version, item in self.events if event_version > version]
+
+    def summary(self, detailed: bool = True) -> Dict:
+        """Counts per state for the admin status API, and per box and the errors so far when detailed"""
+        with self.lock:
+            items = list(self.items.values())
+            version = self.version
+
+        by_state = {state: 0 for state in DEPLOY_STATES}
+        hosts: Dict[str, Dict] = {}
+        for item in items:
+            by_state[item["state"]] += 1
+            host = hosts.setdefault(item["box_ip"], {
+                "team_num": item["team_num"],
+                "total": 0,
+                "done": 0,
+                "failed": 0,
+                "current": None
+            })
+            host["total"] += 1
+            if item["state"] in FINAL_STATES:
+                host["done"] += 1
+            if item["state"] in ('unverified', 'failed'):
+                host["failed"] += 1
+            if item["state"] == 'deploying':
+                host["current"] = item["ioc_name"]
+
+        summary = {
+            "deployment": self.deployment_id,
+            "version": version,
+            "started_at": datetime.utcfromtimestamp(self.started_at).isoformat(),
+            "finished": self.finished.is_set(),
+            "duration_seconds": (self.finished_at or time.time()) - self.started_at,
+            "total": len(items),
+            "successful": by_state["deployed"],
+            "failed": by_state["unverified"] + by_state["failed"],
+            "by_state": by_state
+        }
+        if detailed:
+            summary["hosts"] = hosts
+            summary["errors"] = [
+                f"{item['box_ip']}/{item['ioc_name']}: {item['detail']}"
+                for item in items if item["state"] in ('unverified', 'failed')
+            ]
+        return summary
+
+    def snapshot(self) -> Dict:
+        """Summary plus every item's state, what a client starts from before streaming events"""
+        with self.lock:
+            items = sorted((dict(item) for item in self.items.values()),
+                           key=lambda item: (item["team_num"], item["box_ip"]))
+        return {**self.summary(), "items": items}
+
+    def _check_finished(self) -> None:
+        if not self.finished.is_set() and all(item["state"] in FINAL_STATES for item in self.items.values()):
+            self.finished_at = time.time()
+            self.finished.set()
+
+class DeploymentTracker:
+    """Holds the current deployment so executor workers can report progress on it"""
+
+    def __init__(self):
+        self.current: Optional[Deployment] = None
+        self.ids = itertools.count(1)
+        self.lock = threading.Lock()
+
+    def start(self, items: List[Tuple[int, str, str]]) -> Deployment:
+        """Begin tracking a new deployment of (team, box IP, IOC) items"""
+        with self.lock:
+            if self.current and not self.current.finished.is_set():
+                raise RuntimeError(f"Deployment {self.current.deployment_id} is still running")
+            self.current = Deployment(next(self.ids), items)
+            return self.current
+
+    def update(self, deployment_id: int, box_ip: str, ioc_name: str, state: str,
+               detail: Optional[str] = None, seconds: Optional[float] = None) -> None:
+        with self.lock:
+            deployment = self.current
+        if deployment and deployment.deployment_id == deployment_id:
+            deployment.update(box_ip, ioc_name, state, detail, seconds)
+
+deployment_tracker = DeploymentTracker()
@@ -133,6 +133,27 @@ class InventoryManager:
 
         self.logger.info(f"Created default inventory: {len(self.teams)} teams, {len(self.all_boxes)} boxes")
 
+    def create_synthetic_inventory(self, num_teams: int, boxes_per_team: int) -> None:
+        """Create a large fake inventory for load tests against the simulated transport"""
+        os_cycle = ['linux', 'windows', 'firewall']
+
+        for team_num in range(1, num_teams + 1):
+            team = Team(team_num=team_num, name=f"Team {team_num}")
+
+            for i in range(boxes_per_team):
+                box = Box(
+                    ip=f"10.{200 + team_num // 256}.{team_num % 256}.{i + 10}",
+                    name=f"team{team_num}-box{i + 1}",
+                    os=os_cycle[i % len(os_cycle)],
+                    team_num=team_num
+                )
+                team.boxes.append(box)
+                self.all_boxes.append(box)
+
+            self.teams[team_num] = team
+
+        self.logger.info(f"Created synthetic inventory: {len(self.teams)} teams, {len(self.all_boxes)} boxes")
+
     def generate_ansible_inventory(self) -> Path:
         """Generate Ansible inventory file"""
         inventory = {
@@ -1,18 +1,28 @@
 import asyncio
 import logging
-from typing import Optional, List, Dict, Any
-from datetime import datetime, timedelta
+import time
+from collections import deque
+from typing import Optional, List, Dict, Any, Union
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
 
 from sqlmodel import Session, select
 
+from fastapi_backend.core.check_cycle import CheckCycle, Recheck, cycle_tracker
 from fastapi_backend.core.competition_state import CompetitionState, CompetitionStatus
+from fastapi_backend.core.deployment import Deployment, deployment_tracker
 from fastapi_backend.core.scheduler import CheckScheduler
 from fastapi_backend.core.inventory_manager import InventoryManager
 from fastapi_backend.ansible.ioc_definition import IOCDefinitionLoader
-from fastapi_backend.ansible.worker_queue import IOCCheckExecutor, IOCTask
+from fastapi_backend.ansible.worker_queue import IOCCheckExecutor, IOCTask, IOCBoxTask, IOCInventoryTask, IOCDeployTask
+from fastapi_backend.ansible.async_executor import AsyncIOCCheckExecutor
+from fastapi_backend.ansible.agent_broker import TaskBroker
+from fastapi_backend.ansible.latency import latency_tracker
+from fastapi_backend.ansible.script_cache import ScriptCache
+from fastapi_backend.ansible.worker import CHECK_TIMEOUT, register_name
 from fastapi_backend.database.db_init import DatabaseInitializer
 from fastapi_backend.database.db_writer import engine, create_db_and_tables
+from fastapi_backend.database.result_writer import result_writer
 from fastapi_backend.database.models import CheckInstance, BlueTeams, IOCCheckResult
 
 class CompetitionOrchestrator:
@@ -29,12 +39,35 @@ class CompetitionOrchestrator:
         self.db_init = DatabaseInitializer()
         self.inventory_manager = InventoryManager()
         self.ioc_loader = IOCDefinitionLoader()
-        self.executor: Optional[IOCCheckExecutor] = None
+        self.executor: Optional[Union[IOCCheckExecutor, AsyncIOCCheckExecutor]] = None
         self.scheduler = CheckScheduler()
 
         # Configuration
         self.ansible_dir = Path("./ansible")
         self.ansible_dir.mkdir(exist_ok=True)
+        self.check_mode = "task"  # 'task' = playbook per IOC, 'box' = playbook per box, 'inventory' = one playbook
+        self.ansible_forks = 50  # Parallel hosts for 'inventory' check mode
+        self.ansible_runner = "subprocess"  # 'subprocess', 'ansible_runner' (in-process event stream) or 'callback' (results over a Unix socket)
+        self.executor_type = "thread"  # 'thread' = worker threads, 'async' = asyncio subprocesses in this loop
+        self.ansible_fork_server = False  # Fork playbook runs from one helper that imported Ansible once, instead of exec'ing ansible-playbook
+        self.agent_broker_address: Optional[str] = None  # e.g. 'unix:/tmp/rts_broker.sock' or '0.0.0.0:7700'
+        self.broker: Optional[TaskBroker] = None
+        self.max_checks_per_host = 2  # Checks allowed in flight against one box at a time
+        self.min_check_workers: Optional[int] = 4  # Worker pool bounds for autoscaling, None on either fixes the pool size
+        self.max_check_workers: Optional[int] = 64
+        self.queue_order = "fair"  # Scheduled checks per box: 'fair' (queue order), 'difficulty' (hardest first) or 'stale' (oldest result first)
+        self.check_transports: Dict[str, str] = {}  # OS -> native transport, e.g. {'linux': 'ssh', 'firewall': 'ssh', 'windows': 'psrp'}
+        self.simulation: Dict[str, Any] = {}  # SimulatedTransport options for the 'simulated' transport, e.g. {'latency_median': 0.5, 'failure_rate': 0.01}
+        self.synthetic_inventory: Optional[Dict[str, int]] = None  # Load tests: {'teams': 50, 'boxes': 10, 'iocs': 10} replaces the configured inventory and IOCs
+        self.check_overlap_policy = "coalesce"  # A tick while the last cycle is still in flight: 'skip', 'coalesce' (start when it finishes) or 'cancel' (drop its queued checks)
+        self.cache_check_scripts = False  # Stage check scripts on hosts by digest instead of uploading them on every run
+        self.script_cache = ScriptCache()
+        self.deploy_timeout = 120  # Seconds allowed for one IOC's deploy script and the check that verifies it
+
+        # Check cycles waiting on results, and summaries of finished ones
+        self.cycle_tasks: set = set()
+        self.cycle_history: deque = deque(maxlen=20)
+        self.deployment_task: Optional[asyncio.Task] = None
 
         # Set orchestrator reference in state
         self.state.orchestrator = self
@@ -64,6 +97,8 @@ class CompetitionOrchestrator:
             # 5. Set up scheduler
             self.logger.info("Step 5: Setting up scheduler...")
             self.scheduler.set_callback(self.run_checks)
+            self.scheduler.overlap_policy = self.check_overlap_policy
+            self.scheduler.set_overlap_callbacks(self._cycle_in_flight, self._cancel_stale_checks)
 
             # Update state
             self.state.num_teams = len(self.inventory_manager.teams)
@@ -95,14 +130,21 @@ class CompetitionOrchestrator:
         """Load team and box inventory"""
         try:
             # Load from config or use defaults
-            self.inventory_manager.load_from_config()
+            if self.synthetic_inventory:
+                self.inventory_manager.create_synthetic_inventory(
+                    self.synthetic_inventory.get('teams', 50),
+                    self.synthetic_inventory.get('boxes', 10)
+                )
+            else:
+                self.inventory_manager.load_from_config()
 
             # Generate Ansible inventory
             inventory_path = self.inventory_manager.generate_ansible_inventory()
             self.logger.info(f"Generated inventory at {inventory_path}")
 
-            # Save config for reference
-            self.inventory_manager.save_config()
+            # Save config for reference, a synthetic inventory must not replace the real one
+            if not self.synthetic_inventory:
+                self.inventory_manager.save_config()
 
         except Exception as e:
             self.logger.error(f"Inventory loading failed: {e}")
@@ -111,6 +153,10 @@ class CompetitionOrchestrator:
     async def _load_iocs(self) -> None:
         """Load IOC definitions from YAML files"""
         try:
+            if self.synthetic_inventory:
+                self.ioc_loader.create_synthetic_iocs(self.synthetic_inventory.get('iocs', 10))
+                return
+
             self.ioc_loader.load_ioc_definitions()
 
             # Validate scripts exist
@@ -127,13 +173,40 @@ class CompetitionOrchestrator:
         """Initialize the check executor with worker threads"""
         try:
             with Session(engine) as session:
-                self.executor = IOCCheckExecutor(session, num_workers=16)
+                if self.executor_type == "async":
+                    self.executor = AsyncIOCCheckExecutor(
+                        session,
+                        num_workers=64,
+                        check_mode=self.check_mode,
+                        forks=self.ansible_forks,
+                        max_per_host=self.max_checks_per_host,
+                        fork_server=self.ansible_fork_server,
+                        queue_order=self.queue_order,
+                        min_workers=self.min_check_workers,
+                        max_workers=self.max_check_workers
+                    )
+                else:
+                    self.executor = IOCCheckExecutor(
+                        session,
+                        num_workers=16,
+                        check_mode=self.check_mode,
+                        forks=self.ansible_forks,
+                        runner=self.ansible_runner,
+                        max_per_host=self.max_checks_per_host,
+                        fork_server=self.ansible_fork_server,
+                        queue_order=self.queue_order,
+                        min_workers=self.min_check_workers,
+                        max_workers=self.max_check_workers
+                    )
 
             # Pass components to executor
             self.executor.ioc_definitions = self.ioc_loader.ioc_definitions
             self.executor.os_ioc_mapping = self.ioc_loader.os_ioc_mapping
             self.executor.inventory_path = str(self.inventory_manager.inventory_path)
 
+            # Native transports bypass ansible-playbook for their OSes
+            self.executor.transports = self._create_transports()
+
             # Generate playbooks for all IOCs
             await self._generate_playbooks()
 
@@ -144,6 +217,45 @@ class CompetitionOrchestrator:
             self.logger.error(f"Executor initialization failed: {e}")
             raise
 
+    def _create_transports(self) -> Dict[str, Any]:
+        """Build the native check transports configured in check_transports"""
+        transports = {}
+        shared = {}  # One instance per transport type, shared across its OSes
+        boxes = {box.ip: box for box in self.inventory_manager.all_boxes}
+
+        for os_name, transport_name in self.check_transports.items():
+            if transport_name not in shared:
+                if transport_name == "ssh":
+                    from fastapi_backend.ansible.ssh_transport import SSHConnectionPool
+                    # The async executor awaits SSH checks on its own loop, thread workers use the pool's
+                    loop = asyncio.get_running_loop() if self.executor_type == "async" else None
+                    shared[transport_name] = SSHConnectionPool(boxes, loop=loop)
+                elif transport_name == "psrp":
+                    from fastapi_backend.ansible.psrp_transport import PSRPConnectionPool
+                    shared[transport_name] = PSRPConnectionPool(boxes)
+                elif transport_name == "simulated":
+                    from fastapi_backend.ansible.simulated_transport import SimulatedTransport
+                    shared[transport_name] = SimulatedTransport(boxes, **self.simulation)
+                else:
+                    raise ValueError(f"Unknown check transport: {transport_name}")
+
+            transports[os_name] = shared[transport_name]
+            self.logger.info(f"Using {transport_name} transport for {os_name} checks")
+
+        return transports
+
+    def _close_transports(self) -> None:
+        """Close native transports and their pooled connections"""
+        if not self.executor:
+            return
+
+        for transport in set(self.executor.transports.values()):
+            try:
+                transport.close()
+            except Exception as e:
+                self.logger.error(f"Error closing transport: {e}")
+        self.executor.transports = {}
+
     async def _generate_playbooks(self) -> None:
         """Pre-generate Ansible playbooks for all box/IOC combinations"""
         playbook_dir = self.ansible_dir / "playbooks"
@@ -163,13 +275,7 @@ class CompetitionOrchestrator:
                         'name': f'Check {ioc.name} on {box.ip}',
                         'hosts': box.ip,
                         'gather_facts': False,
-                        'tasks': [{
-                            'name': f'Execute {ioc.name} check',
-                            'script': f'../../iocs/{ioc.check_script}',
-                            'register': 'check_result',
-                            'failed_when': False,
-                            'changed_when': False
-                        }, {
+                        'tasks': self._check_tasks(ioc, box.os, 'check_result') + [{
                             'name': 'Display result',
                             'debug': {
                                 'var': 'check_result.stdout'
@@ -189,26 +295,130 @@ class CompetitionOrchestrator:
 
                     count += 1
 
+        # Batched playbooks run every IOC for a box in one ansible-playbook call
+        if self.check_mode == "box":
+            count += await self._generate_box_playbooks(playbook_dir)
+        elif self.check_mode == "inventory":
+            count += await self._generate_inventory_playbook(playbook_dir)
+
         self.logger.info(f"Generated {count} playbooks")
 
+    async def _generate_box_playbooks(self, playbook_dir: Path) -> int:
+        """Pre-generate one Ansible playbook per box covering all of its OS's IOCs"""
+        import yaml
+
+        count = 0
+        for team in self.inventory_manager.teams.values():
+            for box in team.boxes:
+                iocs = self.ioc_loader.get_iocs_for_os(box.os)
+                if not iocs:
+                    continue
+
+                tasks = []
+                for ioc in iocs:
+                    # Register each IOC under its own variable so results can be split apart
+                    register = register_name(ioc.name)
+                    tasks.extend(self._check_tasks(ioc, box.os, register))
+                    tasks.append({
+                        'name': f'Display {ioc.name} result',
+                        'debug': {
+                            'var': f'{register}.stdout'
+                        }
+                    })
+
+                playbook = [{
+                    'name': f'Check all IOCs on {box.ip}',
+                    'hosts': box.ip,
+                    'gather_facts': False,
+                    'tasks': tasks
+                }]
+
+                # Save playbook
+                playbook_path = playbook_dir / f'{box.ip}_all_iocs.yml'
+                with open(playbook_path, 'w') as f:
+                    yaml.dump(playbook, f)
+
+                # Cache the path
+                if self.executor:
+                    self.executor.box_playbook_cache[box.ip] = str(playbook_path)
+
+                count += 1
+
+        return count
+
+    async def _generate_inventory_playbook(self, playbook_dir: Path) -> int:
+        """Pre-generate a single free-strategy playbook checking every host in the inventory"""
+        import yaml
+
+        tasks = []
+        for os_name, iocs in self.ioc_loader.os_ioc_mapping.items():
+            for ioc in iocs:
+                # Hosts only run the IOCs for their own OS group
+                tasks.extend(self._check_tasks(ioc, os_name, register_name(ioc.name),
+                                               when=f"'{os_name}' in group_names"))
+
+        if not tasks:
+            return 0
+
+        playbook = [{
+            'name': 'Check all IOCs on all hosts',
+            'hosts': 'all',
+            'gather_facts': False,
+            'strategy': 'free',
+            'tasks': tasks
+        }]
+
+        # Save playbook
+        playbook_path = playbook_dir / 'all_hosts_iocs.yml'
+        with open(playbook_path, 'w') as f:
+            yaml.dump(playbook, f)
+
+        if self.executor:
+            self.executor.inventory_playbook_path = str(playbook_path)
+
+        return 1
+
+    def _check_tasks(self, ioc, os_name: str, register: str, when: Optional[str] = None) -> List[Dict]:
+        """Playbook tasks that run one IOC's check script and register its output"""
+        if self.cache_check_scripts:
+            try:
+                return self.script_cache.check_tasks(ioc, os_name, register, when=when)
+            except OSError as e:
+                self.logger.warning(f"Not caching check script for {ioc.name}: {e}")
+
+        task = {
+            'name': f'Execute {ioc.name} check',
+            'script': f'../../iocs/{ioc.check_script}',
+            'register': register,
+            'failed_when': False,
+            'changed_when': False
+        }
+        if when:
+            task['when'] = when
+        return [task]
+
     async def start_competition(self) -> None:
         """Start the competition"""
         if self.state.status != CompetitionStatus.NOT_STARTED:
             raise RuntimeError(f"Cannot start competition from status: {self.state.status}")
+        if self.agent_broker_address and deployment_tracker.current and not deployment_tracker.current.finished.is_set():
+            raise RuntimeError("Remote agents can't run IOC deploys, wait for the deployment to finish")
 
         self.logger.info("Starting competition...")
         self.state.set_status(CompetitionStatus.RUNNING)
 
-        # Start worker threads in executor
-        if self.executor:
+        # Start worker threads in executor, or hand the queue to remote agents
+        if self.executor and self.agent_broker_address:
+            if self.executor_type != "thread":
+                raise RuntimeError("Remote agents require the thread executor's task queue")
+            self.broker = TaskBroker(self.executor, self.agent_broker_address)
+            self.broker.start()
+        elif self.executor:
             self.executor.start_workers()
 
-        # Start scheduler for periodic checks
+        # Start scheduler for periodic checks, it runs the first check immediately
         await self.scheduler.start()
 
-        # Run initial check
-        await self.run_checks()
-
         self.logger.info("Competition started successfully")
 
     async def stop_competition(self) -> None:
@@ -220,11 +430,25 @@ class CompetitionOrchestrator:
 
         # Stop workers
         if self.executor:
-            self.executor.stop_workers()
+            await self._stop_executor()
+
+        # Cycles still waiting on results will never complete
+        for finish in list(self.cycle_tasks):
+            finish.cancel()
 
         self.state.set_status(CompetitionStatus.STOPPED)
         self.logger.info("Competition stopped")
 
+    async def _stop_executor(self) -> None:
+        """Stop executor workers, awaiting the async executor's shutdown"""
+        if self.broker:
+            self.broker.stop()
+            self.broker = None
+
+        stopped = self.executor.stop_workers()
+        if asyncio.iscoroutine(stopped):
+            await stopped
+
     async def run_checks(self) -> None:
         """Run checks for all teams and boxes"""
         if not self.state.can_run_checks():
@@ -237,14 +461,32 @@ class CompetitionOrchestrator:
         try:
             # Create new check instance
             with Session(engine) as session:
-                check_id = await self._create_check_instance(session)
+                check_ids = await self._create_check_instance(session)
+
+            # Track results for this cycle's check instances
+            cycle = CheckCycle(self.state.total_checks_run + 1, check_ids)
+            cycle_tracker.register(cycle)
+
+            # Retries for this cycle must finish before the next one starts
+            deadline = time.time() + self.state.check_interval_minutes * 60
+            self.executor.retries.start_cycle(deadline=deadline)
+            # Hosts that were unreachable last cycle get one probe check
+            self.executor.breaker.start_cycle()
+
+            # An edited check script gets a new digest, so point the playbooks at it
+            if self.cache_check_scripts and self.script_cache.changed():
+                self.logger.info("Check scripts changed, regenerating playbooks")
+                await self._generate_playbooks()
 
             # Queue all IOC checks
-            task_count = await self._queue_all_checks(check_id)
+            queued = await self._queue_all_checks(check_ids)
+            cycle.expect(queued)
+            self.logger.info(f"Queued {cycle.expected} IOC checks for cycle {cycle.cycle_num}")
 
-            # Wait for completion (with timeout)
-            # Note: In production, this would be async monitoring
-            self.logger.info(f"Queued {task_count} IOC checks")
+            # Scores are finalized in the background once every result is in
+            finish = asyncio.create_task(self._finish_cycle(cycle, deadline))
+            self.cycle_tasks.add(finish)
+            finish.add_done_callback(self.cycle_tasks.discard)
 
             # Update state
             self.state.increment_checks()
@@ -256,14 +498,55 @@ class CompetitionOrchestrator:
         except Exception as e:
             self.logger.error(f"Check cycle failed: {e}")
 
-    async def _create_check_instance(self, session: Session) -> int:
-        """Create a new check instance for all teams"""
+    async def _finish_cycle(self, cycle: CheckCycle, deadline: float) -> None:
+        """Wait for a cycle's results, then finalize its scores and advance last_check_id"""
+        # Last attempts may still be running when the retry deadline passes
+        give_up = deadline + CHECK_TIMEOUT
+
+        try:
+            while not cycle.completed.is_set() and time.time() < give_up:
+                await asyncio.sleep(1)
+
+            if not cycle.completed.is_set():
+                self.logger.warning(
+                    f"Cycle {cycle.cycle_num} timed out with {cycle.completed_count}/{cycle.expected} "
+                    f"results, finalizing partial scores"
+                )
+
+            scores = await asyncio.get_running_loop().run_in_executor(None, cycle.finalize, engine)
+            self.logger.info(f"Cycle {cycle.cycle_num} finished in {cycle.duration:.1f}s, scores: {scores}")
+
+        except Exception as e:
+            self.logger.error(f"Failed to finalize cycle {cycle.cycle_num}: {e}")
+
+        finally:
+            cycle_tracker.unregister(cycle)
+            self.cycle_history.append(cycle.summary())
+
+    def _cycle_in_flight(self) -> bool:
+        """Whether any check cycle is still waiting on results"""
+        return any(not cycle.completed.is_set() for cycle in cycle_tracker.active())
+
+    def _cancel_stale_checks(self) -> int:
+        """Drop the queued checks of cycles still in flight, returning how many were dropped"""
+        dropped = 0
+        for cycle in cycle_tracker.active():
+            if cycle.completed.is_set():
+                continue
+            cancelled = self.executor.task_queue.discard(set(cycle.teams))
+            cycle.cancel(cancelled)
+            dropped += cancelled
+            self.logger.info(f"Cancelled {cancelled} queued checks from cycle {cycle.cycle_num}")
+        return dropped
+
+    async def _create_check_instance(self, session: Session) -> Dict[int, int]:
+        """Create a new check instance for all teams, returning team_num -> check_id"""
         check_instances = []
 
         for team_num in self.inventory_manager.teams:
             check = CheckInstance(
                 blue_team_num=team_num,
-                timestamp=datetime.utcnow(),
+                timestamp=datetime.now(timezone.utc),
                 score=0
             )
             session.add(check)
@@ -271,28 +554,55 @@ class CompetitionOrchestrator:
 
         session.commit()
 
-        # Update team last_check_id
-        for check in check_instances:
-            team = session.get(BlueTeams, check.blue_team_num)
-            if team:
-                team.last_check_id = check.check_id
-                session.add(team)
-
-        session.commit()
-
-        # Return first check_id (they're sequential)
-        return check_instances[0].check_id if check_instances else 0
+        # last_check_id moves to these once the cycle is finalized
+        return {check.blue_team_num: check.check_id for check in check_instances}
 
-    async def _queue_all_checks(self, check_id: int) -> int:
-        """Queue all IOC checks for all teams and boxes"""
+    async def _queue_all_checks(self, check_ids: Dict[int, int], interactive: bool = False,
+                                box_ip: Optional[str] = None, ioc_name: Optional[str] = None) -> Dict[int, int]:
+        """Queue IOC checks for the teams in check_ids, optionally one box and/or IOC, returning tasks queued per team"""
         if not self.executor:
             raise RuntimeError("Executor not initialized")
 
-        task_count = 0
+        queued = {}
+        # Interactive checks run as single-IOC playbooks, a batch would re-run IOCs nobody asked for
+        batched = self.executor.check_mode == "box" and not interactive
+        transports = getattr(self.executor, 'transports', {})
+
+        # Inventory mode gathers every task into one playbook run
+        inventory_task = None
+        if self.executor.check_mode == "inventory" and not interactive:
+            inventory_task = IOCInventoryTask(
+                check_id=0,  # Each IOCTask carries its own team's check_id
+                playbook_path=self.executor.inventory_playbook_path or "",
+                forks=self.executor.forks,
+                interactive=interactive
+            )
 
         for team in self.inventory_manager.teams.values():
+            if team.team_num not in check_ids:
+                continue
+            queued[team.team_num] = 0
             for box in team.boxes:
-                iocs = self.ioc_loader.get_iocs_for_os(box.os)
+                if box_ip and box.ip != box_ip:
+                    continue
+                iocs = [
+                    ioc for ioc in self.ioc_loader.get_iocs_for_os(box.os)
+                    if not ioc_name or ioc.name == ioc_name
+                ]
+
+                # OSes with a native transport always run as individual tasks
+                native = box.os in transports
+
+                box_task = None
+                if batched and iocs and not native:
+                    box_task = IOCBoxTask(
+                        team_num=team.team_num,
+                        box_ip=box.ip,
+                        box_os=box.os,
+                        check_id=check_ids[team.team_num],
+                        playbook_path=self.executor.box_playbook_cache.get(box.ip, ""),
+                        interactive=interactive
+                    )
 
                 for ioc in iocs:
                     # Create task
@@ -302,51 +612,155 @@ class CompetitionOrchestrator:
                         box_os=box.os,
                         ioc_name=ioc.name,
                         ioc_script=ioc.check_script,
-                        check_id=check_id + team.team_num,  # Offset by team number
+                        check_id=check_ids[team.team_num],
                         playbook_path=self.executor.playbook_cache.get(f"{box.ip}_{ioc.name}", ""),
                         difficulty=ioc.difficulty,  # Add difficulty from IOC definition
-                        attempt=1
+                        attempt=1,
+                        interactive=interactive
                     )
 
-                    # Add to queue
-                    self.executor.task_queue.put(task)
-                    task_count += 1
+                    # Add to queue, or to the box's or inventory's batch in batched modes
+                    if inventory_task and not native:
+                        inventory_task.tasks.append(task)
+                    elif box_task:
+                        box_task.tasks.append(task)
+                    else:
+                        self.executor.task_queue.put_nowait(task)
+                    queued[team.team_num] += 1
+
+                if box_task:
+                    self.executor.task_queue.put_nowait(box_task)
+
+        if inventory_task and inventory_task.tasks:
+            self.executor.task_queue.put_nowait(inventory_task)
+
+        return queued
+
+    async def recheck(self, team_num: Optional[int] = None, box_ip: Optional[str] = None,
+                      ioc_name: Optional[str] = None, wait_seconds: float = 60) -> Dict[str, Any]:
+        """Re-run the checks for a team, box and/or IOC into the current cycle, returning their fresh results"""
+        if not self.executor:
+            raise RuntimeError("Executor not initialized")
+
+        check_ids = self._current_check_ids()
+        if team_num is not None:
+            check_ids = {t: check_id for t, check_id in check_ids.items() if t == team_num}
+        if not check_ids:
+            raise ValueError("No check cycle has run for the selected teams yet")
+
+        recheck = Recheck(check_ids, box_ip, ioc_name)
+        cycle_tracker.add_recheck(recheck)
+        try:
+            queued = sum((await self._queue_all_checks(
+                check_ids, interactive=True, box_ip=box_ip, ioc_name=ioc_name
+            )).values())
+            if not queued:
+                raise LookupError("No checks match the selected team, box and IOC")
 
-        return task_count
+            recheck.expect(queued)
+            self.logger.info(f"Queued {queued} re-checks (team={team_num}, box={box_ip}, ioc={ioc_name})")
+            finished = await asyncio.get_running_loop().run_in_executor(None, recheck.wait, wait_seconds)
+
+        finally:
+            cycle_tracker.remove_recheck(recheck)
+
+        # Checks still running keep going and are saved when they finish
+        return {"finished": finished, **recheck.summary()}
+
+    def _current_check_ids(self) -> Dict[int, int]:
+        """Each team's check instance in the newest running cycle, or else its last finalized one"""
+        active = sorted(cycle_tracker.active(), key=lambda cycle: cycle.cycle_num)
+        if active:
+            return dict(active[-1].check_ids)
+
+        with Session(engine) as session:
+            teams = session.exec(select(BlueTeams)).all()
+            return {team.team_num: team.last_check_id for team in teams if team.last_check_id}
 
     async def deploy_iocs(self) -> Dict[str, Any]:
-        """Deploy all IOCs to target systems"""
-        self.logger.info("Deploying IOCs to all systems...")
-
-        results = {
-            "total": 0,
-            "successful": 0,
-            "failed": 0,
-            "errors": []
-        }
+        """Queue every IOC's deploy on the executor, one ordered task per box, and return once they are queued"""
+        if not self.executor:
+            raise RuntimeError("Executor not initialized")
+
+        playbooks = await self._generate_deploy_playbooks()
+        boxes = [
+            (team.team_num, box) for team in self.inventory_manager.teams.values()
+            for box in team.boxes if playbooks.get(box.ip)
+        ]
+        deployment = deployment_tracker.start([
+            (team_num, box.ip, ioc_name) for team_num, box in boxes for ioc_name in playbooks[box.ip]
+        ])
+        self.logger.info(f"Deploying {deployment.summary()['total']} IOCs to {len(boxes)} boxes...")
+
+        # Boxes deploy in parallel up to the worker pool and host limits, each box's IOCs in order
+        for team_num, box in boxes:
+            self.executor.task_queue.put_nowait(IOCDeployTask(
+                team_num=team_num,
+                box_ip=box.ip,
+                box_os=box.os,
+                deployment_id=deployment.deployment_id,
+                playbooks=playbooks[box.ip],
+                timeout=self.deploy_timeout
+            ))
+
+        # Workers normally start with the competition, deployment comes before it
+        started_workers = bool(boxes) and not self.executor.started
+        if started_workers:
+            self.executor.start_workers()
+
+        self.deployment_task = asyncio.create_task(self._finish_deployment(deployment, started_workers))
+        return deployment.summary()
 
+    async def _finish_deployment(self, deployment: Deployment, started_workers: bool) -> None:
+        """Wait for a deployment's last box, then record how many IOCs are in place"""
+        try:
+            while not deployment.finished.is_set():
+                await asyncio.sleep(1)
+
+            summary = deployment.summary(detailed=False)
+            self.state.total_iocs_deployed = summary["successful"]
+            self.logger.info(
+                f"Deployment {deployment.deployment_id} finished in {summary['duration_seconds']:.1f}s: "
+                f"{summary['successful']}/{summary['total']} IOCs deployed and verified, {summary['failed']} not"
+            )
+
+        finally:
+            # Remote agents run the competition's checks, so workers started just for deploying stop again
+            if started_workers and self.agent_broker_address and self.state.status == CompetitionStatus.NOT_STARTED:
+                await self._stop_executor()
+
+    async def _generate_deploy_playbooks(self) -> Dict[str, Dict[str, str]]:
+        """Write a playbook per box and IOC that deploys the IOC and then runs its check, returning box IP -> IOC -> path"""
+        import yaml
+
+        playbook_dir = self.ansible_dir / "playbooks"
+        playbook_dir.mkdir(exist_ok=True)
+
+        playbooks: Dict[str, Dict[str, str]] = {}
         for team in self.inventory_manager.teams.values():
             for box in team.boxes:
-                iocs = self.ioc_loader.get_iocs_for_os(box.os)
-
-                for ioc in iocs:
+                for ioc in self.ioc_loader.get_iocs_for_os(box.os):
                     if not ioc.deploy_script:
                         continue
 
-                    results["total"] += 1
+                    # A failed deploy stops the play, so the check only runs after a clean deploy
+                    playbook = [{
+                        'name': f'Deploy {ioc.name} on {box.ip}',
+                        'hosts': box.ip,
+                        'gather_facts': False,
+                        'tasks': [{
+                            'name': f'Deploy {ioc.name}',
+                            'script': f'../../iocs/{ioc.deploy_script}'
+                        }] + self._check_tasks(ioc, box.os, 'check_result')
+                    }]
 
-                    try:
-                        # Run deploy script via Ansible
-                        # For MVP, we'll simulate this
-                        self.logger.info(f"Deploying {ioc.name} to {box.ip}")
-                        results["successful"] += 1
+                    playbook_path = playbook_dir / f'deploy_{box.ip}_{ioc.name}.yml'
+                    with open(playbook_path, 'w') as f:
+                        yaml.dump(playbook, f)
 
-                    except Exception as e:
-                        results["failed"] += 1
-                        results["errors"].append(f"{box.ip}/{ioc.name}: {str(e)}")
+                    playbooks.setdefault(box.ip, {})[ioc.name] = str(playbook_path)
 
-        self.state.total_iocs_deployed = results["successful"]
-        return results
+        return playbooks
 
     async def shutdown(self) -> None:
         """Shutdown orchestrator and cleanup"""
@@ -358,7 +772,12 @@ class CompetitionOrchestrator:
                 await self.stop_competition()
             elif self.executor:
                 # If competition wasn't running but executor exists, still stop workers
-                self.executor.stop_workers()
+                await self._stop_executor()
+
+            if self.deployment_task:
+                self.deployment_task.cancel()
+
+            self._close_transports()
 
             self.logger.info("Orchestrator shutdown complete")
 
@@ -383,7 +802,25 @@ class CompetitionOrchestrator:
             "scheduler": self.scheduler.get_status() if self.scheduler else {},
             "executor": {
                 "workers": self.executor.num_workers if self.executor else 0,
-                "queue_size": self.executor.task_queue.qsize() if self.executor else 0
+                "autoscaler": self.executor.autoscaler.get_stats() if self.executor and self.executor.autoscaler else None,
+                "check_mode": self.executor.check_mode if self.executor else None,
+                "runner": self.executor.runner if self.executor else None,
+                "queue_size": self.executor.task_queue.qsize() if self.executor else 0,
+                "dispatch": self.executor.task_queue.get_stats() if self.executor else None,
+                "circuits": self.executor.breaker.get_stats() if self.executor else None,
+                "result_writer": result_writer.get_stats(),
+                "agents": self.broker.get_stats() if self.broker else None,
+                "fork_server": self.executor.fork_server.get_stats() if self.executor and self.executor.fork_server else None,
+                "transports": {
+                    os_name: transport.get_stats()
+                    for os_name, transport in getattr(self.executor, 'transports', {}).items()
+                } if self.executor else {},
+                "timeouts": latency_tracker.get_stats()
+            },
+            "deployment": deployment_tracker.current.summary(detailed=False) if deployment_tracker.current else None,
+            "cycles": {
+                "active": [cycle.summary() for cycle in cycle_tracker.active()],
+                "recent": list(self.cycle_history)
             }
         }
 
@@ -8,21 +8,43 @@ class CheckScheduler:
     """
     Manages periodic execution of IOC checks.
     Runs checks every 5 minutes when competition is active.
+
+    When a tick finds the previous cycle still in flight, overlap_policy
+    decides what happens: 'skip' drops the tick, 'coalesce' folds it into the
+    running cycle and starts the next one as soon as that cycle finishes, and
+    'cancel' drops the running cycle's queued checks and starts a new one.
     """
 
-    def __init__(self, check_interval_minutes: int = 5):
+    OVERLAP_POLICIES = ('skip', 'coalesce', 'cancel')
+
+    def __init__(self, check_interval_minutes: int = 5, overlap_policy: str = 'coalesce'):
         self.logger = logging.getLogger(__name__)
         self.check_interval = check_interval_minutes
+        self.overlap_policy = overlap_policy
         self.running = False
         self.task: Optional[asyncio.Task] = None
         self.check_callback: Optional[Callable] = None
+        self.in_flight_callback: Optional[Callable[[], bool]] = None
+        self.cancel_callback: Optional[Callable[[], int]] = None
         self.last_check_time: Optional[datetime] = None
         self.next_check_time: Optional[datetime] = None
 
+        self.stats = {
+            'overlaps': 0,
+            'skipped': 0,
+            'coalesced': 0,
+            'cancelled_checks': 0
+        }
+
     def set_callback(self, callback: Callable) -> None:
         """Set the callback function to run checks"""
         self.check_callback = callback
 
+    def set_overlap_callbacks(self, in_flight: Callable[[], bool], cancel: Callable[[], int]) -> None:
+        """Set the callbacks that report a cycle still in flight and cancel its queued checks"""
+        self.in_flight_callback = in_flight
+        self.cancel_callback = cancel
+
     async def start(self) -> None:
         """Start the scheduler"""
         if self.running:
@@ -32,6 +54,9 @@ class CheckScheduler:
         if not self.check_callback:
             raise RuntimeError("No check callback set")
 
+        if self.overlap_policy not in self.OVERLAP_POLICIES:
+            raise RuntimeError(f"Unknown overlap policy: {self.overlap_policy}")
+
         self.running = True
         self.task = asyncio.create_task(self._run_scheduler())
         self.logger.info(f"Check scheduler started with {self.check_interval} minute interval")
@@ -62,7 +87,7 @@ class CheckScheduler:
                 await asyncio.sleep(self.check_interval * 60)
 
                 if self.running:
-                    await self._run_check()
+                    await self._run_tick()
 
             except asyncio.CancelledError:
                 break
@@ -71,6 +96,40 @@ class CheckScheduler:
                 # Continue running but wait a bit before retry
                 await asyncio.sleep(30)
 
+    async def _run_tick(self) -> None:
+        """Run a scheduled check, applying the overlap policy if the last cycle is still in flight"""
+        if self._in_flight():
+            self.stats['overlaps'] += 1
+
+            if self.overlap_policy == 'skip':
+                self.stats['skipped'] += 1
+                self.logger.warning("Previous check cycle still in flight, skipping this tick")
+                return
+
+            if self.overlap_policy == 'coalesce':
+                self.stats['coalesced'] += 1
+                self.logger.warning("Previous check cycle still in flight, next cycle starts when it finishes")
+                while self.running and self._in_flight():
+                    await asyncio.sleep(1)
+                if not self.running:
+                    return
+
+            elif self.overlap_policy == 'cancel' and self.cancel_callback:
+                cancelled = self.cancel_callback()
+                self.stats['cancelled_checks'] += cancelled
+                self.logger.warning(f"Previous check cycle still in flight, cancelled {cancelled} queued checks")
+
+        await self._run_check()
+
+    def _in_flight(self) -> bool:
+        if not self.in_flight_callback:
+            return False
+        try:
+            return self.in_flight_callback()
+        except Exception as e:
+            self.logger.error(f"Failed to check for a cycle in flight: {e}")
+            return False
+
     async def _run_check(self) -> None:
         """Execute a check cycle"""
         self.last_check_time = datetime.utcnow()
@@ -103,6 +162,8 @@ class CheckScheduler:
         return {
             "running": self.running,
             "check_interval_minutes": self.check_interval,
+            "overlap_policy": self.overlap_policy,
+            **self.stats,
             "last_check_time": self.last_check_time.isoformat() if self.last_check_time else None,
             "next_check_time": self.next_check_time.isoformat() if self.next_check_time else None
         }
\ No newline at end of file
@@ -1,15 +1,17 @@
-from sqlmodel import create_engine, SQLModel, Session
+from sqlmodel import SQLModel, Session
 from sqlalchemy import text
 import logging
 
+from fastapi_backend.database.db_writer import DATABASE_URL, create_db_engine, engine
 from fastapi_backend.database.models import *
 from fastapi_backend.utils.auth import *
 
 class DatabaseInitializer:
     """Initialize database schema and views"""
     
-    def __init__(self, database_url: str = "sqlite:///db/database.db"):
-        self.engine = create_engine(database_url)
+    def __init__(self, database_url: str = DATABASE_URL):
+        # The app's database shares the write engine, anything else gets its own with the same pragmas
+        self.engine = engine if database_url == DATABASE_URL else create_db_engine(database_url)
         self.logger = logging.getLogger(__name__)
     
     def initialize_database(self):
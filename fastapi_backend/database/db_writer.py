@@ -1,5 +1,6 @@
 import os
 from pathlib import Path
+from sqlalchemy import event
 from sqlmodel import SQLModel, create_engine, Session, Field
 from typing import Optional
 from fastapi_backend.database.models import Users,BlueTeams,CheckInstance,IOCCheckResult
@@ -7,10 +8,41 @@ from fastapi_backend.database.models import Users,BlueTeams,CheckInstance,IOCChe
 DB_PATH = Path(__file__).parent.parent.parent / "db" / "database.db"
 DB_PATH.parent.mkdir(parents=True, exist_ok=True)  # Create ../db/ if it doesn't exist
 
-# Create database engine
-DATABASE_URL = f"sqlite:///{DB_PATH}"
-engine = create_engine(DATABASE_URL, echo=True)  # Set echo=False to suppress SQL logs
+# RTS_DATABASE_URL points benchmarks and tests at a throwaway database
+DATABASE_URL = os.environ.get("RTS_DATABASE_URL", f"sqlite:///{DB_PATH}")
+SQL_ECHO = os.environ.get("RTS_SQL_ECHO", "").lower() in ("1", "true", "yes")  # Log every SQL statement
+
+# Set on every SQLite connection
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",  # Readers see the last commit instead of waiting on the writer
+    "synchronous": "NORMAL",  # With WAL, fsync at checkpoints rather than on every commit
+    "busy_timeout": 5000,  # Milliseconds to wait on a lock before "database is locked"
+    "mmap_size": 268435456,  # Read up to 256 MiB of the file through memory mapping
+    "cache_size": -65536  # 64 MiB page cache per connection (negative values are KiB)
+}
+
+def create_db_engine(url: str = DATABASE_URL, read_only: bool = False, echo: bool = SQL_ECHO, **kwargs):
+    """Engine for the scoring database, SQLite connections get SQLITE_PRAGMAS and read-only ones refuse writes"""
+    db_engine = create_engine(url, echo=echo, **kwargs)
+    if db_engine.dialect.name != "sqlite":
+        return db_engine
+
+    pragmas = {**SQLITE_PRAGMAS, "query_only": "ON"} if read_only else SQLITE_PRAGMAS
+
+    @event.listens_for(db_engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+    return db_engine
+
+# Check results, cycle scores and admin changes
+engine = create_db_engine()
+# API routes that only read, pooled so scoreboard and details requests don't queue for a connection
+read_engine = create_db_engine(read_only=True, pool_size=10, max_overflow=20)
 
 def create_db_and_tables():
     SQLModel.metadata.create_all(engine)
-    print(f"Database created at {DB_PATH}")
+    print(f"Database created at {engine.url.database}")
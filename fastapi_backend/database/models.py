@@ -1,4 +1,4 @@
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import List, Optional
 from sqlmodel import Field, Relationship, SQLModel
 
@@ -25,7 +25,7 @@ class CheckInstance(SQLModel, table=True):
 
     check_id: int = Field(primary_key=True)
     blue_team_num: int = Field(foreign_key="blue_teams.team_num")
-    timestamp: datetime = Field(default_factory=datetime.utcnow)
+    timestamp: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     score: int = Field(default=0)
 
     results: List["IOCCheckResult"] = Relationship(back_populates="check")
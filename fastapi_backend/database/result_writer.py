@@ -0,0 +1,218 @@
+import logging
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+from sqlmodel import Session, delete
+
+from fastapi_backend.ansible.latency import percentile
+from fastapi_backend.database.models import IOCCheckResult
+
+# (task, status, output_data, execution_time, submitted at)
+PendingResult = Tuple[object, int, dict, float, float]
+
+class ResultWriter:
+    """
+    The one thread that writes check results while the executor runs.
+    Workers submit results and go back to checking. The writer inserts
+    whatever has piled up in one transaction, flushing once batch_size
+    results are waiting or max_delay seconds after the oldest arrived, so
+    SQLite sees one writer and one commit per batch instead of a commit per
+    check from every worker. Results only count towards their cycle or
+    re-check once their batch has committed, so finalize() always sees them.
+    """
+
+    def __init__(self, batch_size: int = 200, max_delay: float = 0.25):
+        self.logger = logging.getLogger(__name__)
+        self.batch_size = batch_size
+        self.max_delay = max_delay
+
+        self.pending: deque = deque()
+        self.writing = 0  # Results taken off pending but not yet committed
+        self.engine = None
+        self.thread: Optional[threading.Thread] = None
+        self.running = False
+        self.cond = threading.Condition()
+
+        self.flush_seconds: deque = deque(maxlen=200)  # Time to write and commit each recent batch
+        self.result_seconds: deque = deque(maxlen=1000)  # Submit to commit for recent results
+        self.batch_sizes: deque = deque(maxlen=200)
+        self.stats = {
+            'submitted': 0,
+            'written': 0,
+            'failed': 0,
+            'batches': 0,
+            'size_flushes': 0,  # Batches flushed because batch_size results were waiting
+            'max_batch': 0
+        }
+
+    def start(self, db_engine) -> None:
+        """Start the writer thread, results submitted from now on are batched"""
+        with self.cond:
+            if self.running:
+                return
+            self.engine = db_engine
+            self.running = True
+        self.thread = threading.Thread(target=self._run, daemon=True, name="ResultWriter")
+        self.thread.start()
+        self.logger.info(f"Result writer started (batches of up to {self.batch_size}, {self.max_delay}s max delay)")
+
+    def stop(self, timeout: float = 30) -> None:
+        """Write everything still pending, then stop the thread"""
+        with self.cond:
+            if not self.running:
+                return
+            self.running = False
+            self.cond.notify_all()
+        if self.thread:
+            self.thread.join(timeout=timeout)
+            if self.thread.is_alive():
+                self.logger.warning(f"Result writer did not drain within {timeout}s")
+            self.thread = None
+
+    def submit(self, task, status: int, output_data: dict, execution_time: float) -> None:
+        """Queue one result for the next batch"""
+        with self.cond:
+            self.pending.append((task, status, output_data, execution_time, time.monotonic()))
+            self.stats['submitted'] += 1
+            if len(self.pending) == 1 or len(self.pending) >= self.batch_size:
+                self.cond.notify()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Block until every submitted result has been committed, returns False on timeout"""
+        with self.cond:
+            return self.cond.wait_for(lambda: not self.pending and not self.writing, timeout)
+
+    def get_stats(self) -> Dict:
+        """Counters, batch sizes and flush latency for the admin status API"""
+        with self.cond:
+            flushes = list(self.flush_seconds)
+            waits = list(self.result_seconds)
+            sizes = list(self.batch_sizes)
+            return {
+                **self.stats,
+                'running': self.running,
+                'queued': len(self.pending),
+                'mean_batch': round(sum(sizes) / len(sizes), 1) if sizes else None,
+                'flush_p50': round(percentile(flushes, 50), 4) if flushes else None,
+                'flush_p95': round(percentile(flushes, 95), 4) if flushes else None,
+                'result_latency_p95': round(percentile(waits, 95), 4) if waits else None
+            }
+
+    def _run(self) -> None:
+        while True:
+            with self.cond:
+                # Wait for a full batch, the oldest result's deadline or a stop
+                while self.running:
+                    if len(self.pending) >= self.batch_size:
+                        break
+                    if self.pending:
+                        remaining = self.pending[0][4] + self.max_delay - time.monotonic()
+                        if remaining <= 0:
+                            break
+                        self.cond.wait(remaining)
+                    else:
+                        self.cond.wait()
+
+                if not self.pending:
+                    if not self.running:
+                        return
+                    continue
+
+                full = len(self.pending) >= self.batch_size
+                batch = [self.pending.popleft() for _ in range(min(len(self.pending), self.batch_size))]
+                self.writing = len(batch)
+
+            self._write(batch, full)
+
+    def _write(self, batch: List[PendingResult], full: bool) -> None:
+        """Commit one batch, falling back to one transaction per result if the batch fails"""
+        start = time.monotonic()
+        written = failed = 0
+
+        with Session(self.engine) as db_session:
+            try:
+                write_results(db_session, [entry[:4] for entry in batch])
+                written = len(batch)
+            except Exception as e:
+                db_session.rollback()
+                self.logger.error(f"Batch of {len(batch)} results failed, writing them one by one: {e}")
+                for entry in batch:
+                    try:
+                        write_results(db_session, [entry[:4]])
+                        written += 1
+                    except Exception as e:
+                        db_session.rollback()
+                        failed += 1
+                        self.logger.error(f"Failed to save result for {entry[0].box_ip}/{entry[0].ioc_name}: {e}")
+
+        finished = time.monotonic()
+        with self.cond:
+            self.flush_seconds.append(finished - start)
+            self.batch_sizes.append(len(batch))
+            self.result_seconds.extend(finished - entry[4] for entry in batch)
+            self.stats['written'] += written
+            self.stats['failed'] += failed
+            self.stats['batches'] += 1
+            self.stats['max_batch'] = max(self.stats['max_batch'], len(batch))
+            if full:
+                self.stats['size_flushes'] += 1
+            self.writing = 0
+            self.cond.notify_all()
+
+def write_results(db_session, results: List[Tuple[object, int, dict, float]]) -> List[IOCCheckResult]:
+    """
+    Insert (task, status, output_data, execution_time) results in one
+    transaction, then count them towards their check cycles and re-checks.
+    """
+    from fastapi_backend.core.check_cycle import cycle_tracker, rescore_check_instance
+
+    rows = []
+    rechecked_here = set()  # Re-checks earlier in this batch, not yet known to the cycle tracker
+    for task, status, output_data, _ in results:
+        key = (task.check_id, task.box_ip, task.ioc_name)
+
+        # A re-check replaces the result it re-ran rather than adding a second one,
+        # and a running cycle's own check replaces a re-check that beat it
+        interactive = getattr(task, 'interactive', False)
+        if interactive or key in rechecked_here or cycle_tracker.was_rechecked(*key):
+            # Autoflush inserts this batch's earlier rows first, so the newest result wins
+            db_session.exec(delete(IOCCheckResult).where(
+                IOCCheckResult.check_instance_id == task.check_id,
+                IOCCheckResult.box_ip == task.box_ip,
+                IOCCheckResult.ioc_name == task.ioc_name
+            ))
+        if interactive:
+            rechecked_here.add(key)
+
+        row = IOCCheckResult(
+            check_instance_id=task.check_id,
+            box_ip=task.box_ip,
+            ioc_name=task.ioc_name,
+            difficulty=task.difficulty if hasattr(task, 'difficulty') else 0,
+            status=status,
+            error=output_data.get('error')
+        )
+        db_session.add(row)
+        rows.append(row)
+
+    db_session.commit()
+
+    rescore = set()
+    for task, status, output_data, _ in results:
+        if getattr(task, 'interactive', False):
+            # Re-checks don't count towards a cycle, a cycle that was already scored is rescored
+            if cycle_tracker.record_recheck(task, status, output_data.get('error')):
+                rescore.add(task.check_id)
+        else:
+            # Count it towards its check cycle
+            cycle_tracker.record(task.check_id)
+
+    for check_id in rescore:
+        rescore_check_instance(db_session, check_id)
+
+    return rows
+
+# Shared by every executor and the agent broker, save_check_result hands results here while it runs
+result_writer = ResultWriter()
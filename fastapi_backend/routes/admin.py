@@ -1,5 +1,8 @@
 from fastapi import APIRouter, HTTPException, Depends, Body, Query
+from fastapi.responses import StreamingResponse
 from typing import Dict, Any, Optional
+import asyncio
+import json
 from sqlmodel import Session, select
 import logging
 from fastapi_backend.database.models import Users
@@ -7,6 +10,7 @@ from fastapi_backend.database.db_writer import engine
 from fastapi_backend.utils.auth import Users, get_current_user, SECRET_KEY, hash_password
 from pydantic import BaseModel
 from fastapi_backend.core.competition_state import CompetitionStatus
+from fastapi_backend.core.deployment import deployment_tracker
 import bcrypt
 
 router = APIRouter(prefix="/admin", tags=["admin"])
@@ -27,6 +31,12 @@ class ChangePasswordRequest(BaseModel):
     user_id: int
     password: str
 
+class RecheckRequest(BaseModel):
+    team_num: Optional[int] = None
+    box_ip: Optional[str] = None
+    ioc_name: Optional[str] = None
+    wait_seconds: float = 60
+
 
 def get_orchestrator():
     """Dependency to get orchestrator instance"""
@@ -219,10 +229,66 @@ async def deploy_iocs(current_user: Users = Depends(get_current_user), orch=Depe
     except HTTPException:
         # Rethrow HTTPException without logging as error, just pass through
         raise
+    except RuntimeError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Failed to deploy IOCs: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/deploy_progress")
+async def deploy_progress(current_user: Users = Depends(get_current_user)) -> Dict[str, Any]:
+    """State of every IOC in the current or last deployment"""
+    await check_admin(current_user)
+    if deployment_tracker.current is None:
+        raise HTTPException(status_code=404, detail="No IOC deployment has been started")
+    return deployment_tracker.current.snapshot()
+
+@router.get("/deploy_progress/stream")
+async def stream_deploy_progress(current_user: Users = Depends(get_current_user)) -> StreamingResponse:
+    """
+    Server-sent events for the current deployment: a snapshot, then a progress
+    event per IOC state change as workers report it, and a summary at the end.
+    """
+    await check_admin(current_user)
+    deployment = deployment_tracker.current
+    if deployment is None:
+        raise HTTPException(status_code=404, detail="No IOC deployment has been started")
+
+    def event(name: str, data: Dict[str, Any]) -> str:
+        return f"event: {name}\ndata: {json.dumps(data)}\n\n"
+
+    async def events():
+        snapshot = deployment.snapshot()
+        version = snapshot["version"]
+        yield event("snapshot", snapshot)
+
+        idle = 0.0
+        while True:
+            current, changes = deployment.events_since(version)
+            if changes is None:
+                # Too far behind to replay, start over from the full state
+                snapshot = deployment.snapshot()
+                current = snapshot["version"]
+                yield event("snapshot", snapshot)
+            else:
+                for item in changes:
+                    yield event("progress", item)
+
+            if current != version:
+                version, idle = current, 0.0
+            if deployment.finished.is_set() and version == deployment.version:
+                yield event("summary", deployment.summary())
+                return
+
+            await asyncio.sleep(0.5)
+            idle += 0.5
+            if idle >= 15:
+                # Comment line so proxies don't close a quiet stream
+                yield ": keepalive\n\n"
+                idle = 0.0
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
 @router.post("/run_checks")
 async def run_checks(current_user: Users = Depends(get_current_user),orch=Depends(get_orchestrator)) -> Dict[str, Any]:
     """Manually trigger a check cycle"""
@@ -251,6 +317,42 @@ async def run_checks(current_user: Users = Depends(get_current_user),orch=Depend
         logger.error(f"Failed to run checks: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/recheck")
+async def recheck(req: RecheckRequest, current_user: Users = Depends(get_current_user), orch=Depends(get_orchestrator)) -> Dict[str, Any]:
+    """Re-run the checks for one team, box IP and/or IOC into the current cycle and return the fresh results"""
+    try:
+        await check_admin(current_user)
+        if req.team_num is None and not req.box_ip and not req.ioc_name:
+            raise HTTPException(status_code=400, detail="Choose a team, box IP or IOC, or use run_checks for everything")
+        if not orch.state.can_run_checks():
+            raise HTTPException(
+                status_code=400,
+                detail=f"Cannot run checks in state: {orch.state.status.value}"
+            )
+
+        results = await orch.recheck(
+            team_num=req.team_num,
+            box_ip=req.box_ip,
+            ioc_name=req.ioc_name,
+            wait_seconds=min(max(req.wait_seconds, 0), 600)
+        )
+        return {
+            "status": "success" if results["finished"] else "pending",
+            "message": f"{results['completed']}/{results['expected']} re-checks finished",
+            "details": results
+        }
+    # Fix HTTPExceptions being eaten elsewhere
+    except HTTPException:
+        # Rethrow HTTPException without logging as error, just pass through
+        raise
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Failed to run re-checks: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.post("/start_comp")
 async def start_competition(current_user: Users = Depends(get_current_user),orch=Depends(get_orchestrator)) -> Dict[str, Any]:
     """Start the competition"""
@@ -324,11 +426,19 @@ async def reset_data(current_user: Users = Depends(get_current_user),orch=Depend
         # Clear database (keeping teams and users)
         from sqlmodel import Session, delete
         from fastapi_backend.database.db_writer import engine
-        from fastapi_backend.database.models import CheckInstance, IOCCheckResult
+        from fastapi_backend.database.models import BlueTeams, CheckInstance, IOCCheckResult
 
         with Session(engine) as session:
             # Delete all check results
             session.exec(delete(IOCCheckResult))
+
+            # Finalized cycle scores live on the teams too
+            for team in session.exec(select(BlueTeams)).all():
+                team.total_score = 0
+                team.last_check_id = None
+                session.add(team)
+            session.flush()
+
             session.exec(delete(CheckInstance))
             session.commit()
 
@@ -3,7 +3,7 @@ from typing import Dict, Any, List
 from sqlmodel import Session, select
 from fastapi_backend.database.models import Users, TeamLatestIocDetails
 from fastapi_backend.utils.auth import get_current_user
-from fastapi_backend.database.db_writer import engine
+from fastapi_backend.database.db_writer import read_engine
 import logging
 
 router = APIRouter()
@@ -13,7 +13,7 @@ logger = logging.getLogger(__name__)
 async def get_status(current_user: Users = Depends(get_current_user)) -> Dict[str, Any]:
     """Gets IOC details for a specific team or all teams (if admin)"""
     try:
-        with Session(engine) as session:
+        with Session(read_engine) as session:
             query = select(TeamLatestIocDetails)
 
             if current_user.is_admin:
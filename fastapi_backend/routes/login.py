@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from pydantic import BaseModel
 from sqlmodel import Session, select
-from fastapi_backend.database.db_writer import engine
+from fastapi_backend.database.db_writer import read_engine
 from fastapi_backend.database.models import Users
 from fastapi_backend.utils.auth import get_current_user, SECRET_KEY, verify_password, hash_password
 from jose import JWTError, jwt
@@ -18,7 +18,7 @@ class LoginRequest(BaseModel):
 @router.post("/login")
 def login_user(data: LoginRequest):
     try:
-        with Session(engine) as session:
+        with Session(read_engine) as session:
             statement = select(Users).where(Users.username == data.username)
             user = session.exec(statement).first()
 
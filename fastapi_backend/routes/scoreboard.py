@@ -1,7 +1,7 @@
 from fastapi import APIRouter, HTTPException
 from typing import Dict, Any
 from sqlmodel import Session, select
-from fastapi_backend.database.db_writer import engine
+from fastapi_backend.database.db_writer import read_engine
 from fastapi_backend.database.models import BlueTeams, CheckInstance, BlueTeamsScoreboard
 import logging
 from datetime import datetime
@@ -12,7 +12,7 @@ logger = logging.getLogger(__name__)
 @router.get("/scoreboard", response_model=Dict[str, Any])
 async def get_scoreboard():
     try:
-        with Session(engine) as session:
+        with Session(read_engine) as session:
             statement = select(BlueTeamsScoreboard).order_by(BlueTeamsScoreboard.team_num.asc())
             results = session.exec(statement).all()
             if not results:
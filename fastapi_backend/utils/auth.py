@@ -3,7 +3,7 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlmodel import Session, select
 from fastapi_backend.database.models import Users
-from fastapi_backend.database.db_writer import engine
+from fastapi_backend.database.db_writer import engine, read_engine
 from fastapi_backend.database.models import Users
 import bcrypt
 
@@ -66,7 +66,7 @@ def get_user_from_token(token: str) -> Users:
         user_id = payload.get("sub")
         #print("Extracted user_id:", user_id)
 
-        with Session(engine) as session:
+        with Session(read_engine) as session:
             user = session.exec(select(Users).where(Users.user_id == user_id)).first()
             #print("Found user in DB:", user)
 
@@ -13,6 +13,29 @@ export interface DeployIOCsResponse {
   results: any; 
 }
 
+export type DeployState = "queued" | "deploying" | "deployed" | "unverified" | "failed";
+
+export interface DeployItem {
+  team_num: number;
+  box_ip: string;
+  ioc_name: string;
+  state: DeployState;
+  detail: string | null;
+  seconds: number | null;
+}
+
+export interface DeployProgress {
+  deployment: number;
+  version: number;
+  started_at: string;
+  finished: boolean;
+  duration_seconds: number;
+  total: number;
+  successful: number;
+  failed: number;
+  items: DeployItem[];
+}
+
 export interface RunChecksResponse {
   status: string;
   message: string;
@@ -177,6 +200,51 @@ export async function deployIOCs(): Promise<DeployIOCsResponse> {
   return response.json();
 }
 
+// Reads the deployment's server-sent events: a "snapshot" (DeployProgress), then a
+// "progress" DeployItem per state change and a final "summary". fetch is used instead
+// of EventSource because EventSource can't send the Authorization header.
+export async function streamDeployProgress(
+  onEvent: (event: string, data: any) => void,
+  signal: AbortSignal
+): Promise<void> {
+  const storedToken = localStorage.getItem("authToken");
+  const response = await fetch(`${API_BASE}/admin/deploy_progress/stream`, {
+    headers: { Authorization: `Bearer ${storedToken}` },
+    signal,
+  });
+  if (response.status === 404) {
+    return; // No deployment has been started
+  }
+  if (!response.ok || !response.body) {
+    const errorText = await response.text();
+    throw new Error(`Deploy progress failed: ${errorText}`);
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = "";
+  while (true) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+
+    // Events are separated by a blank line
+    let end;
+    while ((end = buffer.indexOf("\n\n")) !== -1) {
+      const block = buffer.slice(0, end);
+      buffer = buffer.slice(end + 2);
+
+      let event = "message";
+      let data = "";
+      for (const line of block.split("\n")) {
+        if (line.startsWith("event: ")) event = line.slice(7);
+        else if (line.startsWith("data: ")) data += line.slice(6);
+      }
+      if (data) onEvent(event, JSON.parse(data));
+    }
+  }
+}
+
 export async function runChecks(): Promise<RunChecksResponse> {
   const storedToken = localStorage.getItem("authToken");
   const response = await fetch(`${API_BASE}/admin/run_checks`, {
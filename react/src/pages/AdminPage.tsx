@@ -1,8 +1,11 @@
 // src/pages/AdminPage.tsx
 
-import React, { useState, useEffect } from "react";
+import React, { useState, useEffect, useMemo } from "react";
 import {
   deployIOCs,
+  streamDeployProgress,
+  type DeployItem,
+  type DeployProgress,
   runChecks,
   startCompetition,
   stopCompetition,
@@ -15,7 +18,7 @@ import {
 } from "../api/api"; // adjust path if needed
 import AppNavbar from "../components/navbar";
 import ProtectedRoute from "../components/protectedroute";
-import { Button, Table, Modal, Form } from "react-bootstrap";
+import { Button, Table, Modal, Form, ProgressBar } from "react-bootstrap";
 
 type User = {
   user_id: number;
@@ -45,6 +48,7 @@ const AdminController: React.FC = () => {
   const [systemStatus, setSystemStatus] = useState<any>(null);
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState<string | null>(null);
+  const [deployRun, setDeployRun] = useState(0); // Bumped to reconnect the deploy progress stream
 
   const fetchStatus = async () => {
     try {
@@ -115,7 +119,13 @@ const AdminController: React.FC = () => {
 
         <Button
           disabled={loading}
-          onClick={() => handleAction(deployIOCs, "IOCs deployed")}
+          onClick={() =>
+            handleAction(async () => {
+              const res = await deployIOCs();
+              setDeployRun((run) => run + 1);
+              return res;
+            }, "IOC deployment started")
+          }
           variant="primary"
           className="me-2"
         >
@@ -137,6 +147,8 @@ const AdminController: React.FC = () => {
       {status && <p className="text-success mt-2">{status}</p>}
       {error && <p className="text-danger mt-2">{error}</p>}
 
+      <DeployProgressPanel run={deployRun} />
+
       <h3 className="mt-4">System Status</h3>
       <pre
         style={{
@@ -156,6 +168,111 @@ const AdminController: React.FC = () => {
   );
 };
 
+const DeployProgressPanel: React.FC<{ run: number }> = ({ run }) => {
+  const [progress, setProgress] = useState<DeployProgress | null>(null);
+  const [error, setError] = useState<string | null>(null);
+
+  // Follow the current deployment, events update single IOCs in place
+  useEffect(() => {
+    const controller = new AbortController();
+    setError(null);
+
+    streamDeployProgress((event, data) => {
+      if (event === "snapshot") {
+        setProgress(data);
+      } else if (event === "progress") {
+        const changed: DeployItem = data;
+        setProgress((prev) =>
+          prev && {
+            ...prev,
+            items: prev.items.map((item) =>
+              item.box_ip === changed.box_ip && item.ioc_name === changed.ioc_name ? changed : item
+            ),
+          }
+        );
+      } else if (event === "summary") {
+        setProgress((prev) => prev && { ...prev, ...data, items: prev.items });
+      }
+    }, controller.signal).catch((err: any) => {
+      if (!controller.signal.aborted) setError(err.message || "Lost deploy progress");
+    });
+
+    return () => controller.abort();
+  }, [run]);
+
+  const hosts = useMemo(() => {
+    const byHost = new Map<string, { team_num: number; total: number; done: number; failed: number; current: string | null }>();
+    for (const item of progress?.items ?? []) {
+      const host = byHost.get(item.box_ip) ?? { team_num: item.team_num, total: 0, done: 0, failed: 0, current: null };
+      host.total += 1;
+      if (item.state === "deployed" || item.state === "unverified" || item.state === "failed") host.done += 1;
+      if (item.state === "unverified" || item.state === "failed") host.failed += 1;
+      if (item.state === "deploying") host.current = item.ioc_name;
+      byHost.set(item.box_ip, host);
+    }
+    return Array.from(byHost.entries());
+  }, [progress]);
+
+  if (error) return <p className="text-danger mt-2">{error}</p>;
+  if (!progress) return null;
+
+  const items = progress.items;
+  const deployed = items.filter((item) => item.state === "deployed").length;
+  const failed = items.filter((item) => item.state === "unverified" || item.state === "failed");
+
+  return (
+    <div className="deploy-progress mt-4">
+      <h3>
+        IOC Deployment {progress.deployment} {progress.finished ? "(finished)" : "(running)"}
+      </h3>
+      <ProgressBar className="mb-2">
+        <ProgressBar variant="success" now={(deployed / Math.max(items.length, 1)) * 100} key="deployed" />
+        <ProgressBar variant="danger" now={(failed.length / Math.max(items.length, 1)) * 100} key="failed" />
+      </ProgressBar>
+      <p>
+        {deployed} of {items.length} IOCs deployed and verified, {failed.length} failed
+      </p>
+
+      <div style={{ maxHeight: "300px", overflowY: "auto" }}>
+        <Table striped bordered hover size="sm">
+          <thead>
+            <tr>
+              <th>Team</th>
+              <th>Box</th>
+              <th>Done</th>
+              <th>Failed</th>
+              <th>Deploying</th>
+            </tr>
+          </thead>
+          <tbody>
+            {hosts.map(([box_ip, host]) => (
+              <tr key={box_ip}>
+                <td>{host.team_num}</td>
+                <td>{box_ip}</td>
+                <td>
+                  {host.done}/{host.total}
+                </td>
+                <td className={host.failed ? "text-danger" : undefined}>{host.failed}</td>
+                <td>{host.current ?? ""}</td>
+              </tr>
+            ))}
+          </tbody>
+        </Table>
+      </div>
+
+      {failed.length > 0 && (
+        <ul className="text-danger mt-2">
+          {failed.map((item) => (
+            <li key={`${item.box_ip}-${item.ioc_name}`}>
+              {item.box_ip} / {item.ioc_name}: {item.state} {item.detail ? `- ${item.detail}` : ""}
+            </li>
+          ))}
+        </ul>
+      )}
+    </div>
+  );
+};
+
 const ManageUsers: React.FC = () => {
   const [users, setUsers] = useState<User[]>([]);
   const [loading, setLoading] = useState<boolean>(true);
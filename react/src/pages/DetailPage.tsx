@@ -72,7 +72,7 @@ const DetailContent: React.FC = () => {
               <td>{d.box_ip}</td>
               <td>{d.ioc_name}</td>
               <td>{d.difficulty}</td>
-              <td>{d.status === 0 ? "✅ Pass" : "❌ Fail"}</td>
+              <td>{d.status === 0 ? "✅ Pass" : d.status === -2 ? "⚠️ Unreachable" : "❌ Fail"}</td>
               <td>{d.points}</td>
               <td>{d.error || "-"}</td>
             </tr>